@@ -0,0 +1,43 @@
+"""add avatar variant table
+
+Revision ID: b2c4d6e8f0a1
+Revises: 73fe9e640e2b
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2c4d6e8f0a1'
+down_revision = '73fe9e640e2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create avatarvariant table for content-hashed, pre-rendered avatar sizes"""
+    op.create_table('avatarvariant',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=32), nullable=False),
+        sa.Column('variant', sa.String(length=20), nullable=False),
+        sa.Column('content_type', sa.String(length=50), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'content_hash', 'variant', name='uq_avatarvariant_user_hash_variant')
+    )
+    op.create_index(op.f('ix_avatarvariant_id'), 'avatarvariant', ['id'], unique=False)
+    op.create_index(op.f('ix_avatarvariant_user_id'), 'avatarvariant', ['user_id'], unique=False)
+    op.create_index(op.f('ix_avatarvariant_content_hash'), 'avatarvariant', ['content_hash'], unique=False)
+
+
+def downgrade():
+    """Drop avatarvariant table"""
+    op.drop_index(op.f('ix_avatarvariant_content_hash'), table_name='avatarvariant')
+    op.drop_index(op.f('ix_avatarvariant_user_id'), table_name='avatarvariant')
+    op.drop_index(op.f('ix_avatarvariant_id'), table_name='avatarvariant')
+    op.drop_table('avatarvariant')
@@ -27,6 +27,13 @@ from app.db.models.user import User as DBUser
 from app.db.models.meeting import Meeting as DBMeeting
 from app.db.models.file_upload import FileUpload as DBFileUpload
 from app.db.session import get_sync_db
+from app.services.image_processing import (
+    get_image_pool,
+    is_thumbnailable,
+    remove_thumbnails,
+    ImagePoolSaturatedError,
+    THUMBNAIL_SIZES
+)
 
 router = APIRouter()
 
@@ -61,6 +68,24 @@ def agenda_item_to_response(db_item: DBAgendaItem) -> AgendaItem:
     )
 
 
+def candidate_upload_paths(file_path: str) -> List[str]:
+    """Possible on-disk locations for a stored upload path"""
+    return [
+        file_path,  # Original path from database
+        os.path.basename(file_path),  # Just filename in current directory
+        os.path.join("/app/uploads", os.path.basename(file_path)),  # Container upload directory
+        os.path.join("/uploads", os.path.basename(file_path)),  # Root upload directory
+    ]
+
+
+def resolve_upload_path(file_path: str) -> Optional[str]:
+    """Return the first existing location for a stored upload path, or None"""
+    for path in candidate_upload_paths(file_path):
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
 @router.post("/", response_model=AgendaItem, status_code=status.HTTP_201_CREATED)
 async def create_agenda_item(
     current_user: Annotated[User, Depends(get_current_user)],
@@ -332,6 +357,7 @@ async def upload_files_to_agenda_item(
     
     uploaded_files = []
     failed_files = []
+    image_paths = []
     upload_dir = "/app/uploads"
     
     # Ensure upload directory exists
@@ -389,6 +415,8 @@ async def upload_files_to_agenda_item(
             )
             
             db.add(file_upload)
+            if is_thumbnailable(mime_type):
+                image_paths.append(file_path)
             uploaded_files.append({
                 "id": None,  # Will be set after commit
                 "filename": file.filename,
@@ -418,6 +446,11 @@ async def upload_files_to_agenda_item(
         for i, file_record in enumerate(recent_files):
             if i < len(uploaded_files):
                 uploaded_files[-(i+1)]["id"] = file_record.id
+        
+        # Pre-render thumbnails in the background image pool
+        image_pool = get_image_pool()
+        for path in image_paths:
+            image_pool.schedule_thumbnails(path)
     
     response = {
         "uploaded": len(uploaded_files),
@@ -468,19 +501,9 @@ async def download_file_from_agenda_item(
     file_path = file_upload.filepath
     
     # Try multiple possible file locations
-    possible_paths = [
-        file_path,  # Original path from database
-        os.path.basename(file_path),  # Just filename in current directory
-        os.path.join("/app/uploads", os.path.basename(file_path)),  # Container upload directory
-        os.path.join("/uploads", os.path.basename(file_path)),  # Root upload directory
-    ]
-    
-    actual_file_path = None
-    for path in possible_paths:
-        if path and os.path.exists(path):
-            actual_file_path = path
-            break
-    
+    possible_paths = candidate_upload_paths(file_path)
+    actual_file_path = resolve_upload_path(file_path)
+
     if not actual_file_path:
         # If no file found, show error with debugging info
         import json
@@ -505,6 +528,71 @@ async def download_file_from_agenda_item(
     )
 
 
+# Thumbnail/preview endpoint for image attachments
+@router.get("/{item_id}/files/{file_id}/thumbnail")
+async def get_file_thumbnail(
+    item_id: int = Path(..., description="The ID of the agenda item"),
+    file_id: int = Path(..., description="The ID of the image file"),
+    variant: str = Query("thumb", description=f"Thumbnail variant: {', '.join(THUMBNAIL_SIZES)}"),
+    db: Session = Depends(get_sync_db)
+):
+    """
+    Get a WebP thumbnail or preview of an image attachment.
+    Thumbnails are rendered once in the image process pool and cached next to the file.
+    A file ID never changes content, so responses are cacheable indefinitely.
+    """
+    if variant not in THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid variant. Allowed: {', '.join(THUMBNAIL_SIZES)}"
+        )
+    
+    file_upload = db.query(DBFileUpload).filter(
+        DBFileUpload.id == file_id,
+        DBFileUpload.agenda_item_id == item_id
+    ).first()
+    
+    if not file_upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File with ID {file_id} not found for this agenda item"
+        )
+    
+    if not is_thumbnailable(file_upload.file_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Thumbnails are only available for raster image files"
+        )
+    
+    source_path = resolve_upload_path(file_upload.filepath)
+    if not source_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found on disk"
+        )
+    
+    try:
+        thumb_path = await get_image_pool().ensure_thumbnail(source_path, variant)
+    except ImagePoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Thumbnail generation is busy. Please try again shortly.",
+            headers={"Retry-After": "2"}
+        )
+    except Exception as e:
+        logger.warning(f"Thumbnail generation failed for file {file_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Could not generate a thumbnail for this file"
+        )
+    
+    return FileResponse(
+        path=thumb_path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
 # List files for an agenda item
 @router.get("/{item_id}/files")
 async def list_files_for_agenda_item(
@@ -548,7 +636,11 @@ async def list_files_for_agenda_item(
             "upload_date": file_upload.upload_date.isoformat(),
             "uploader": file_upload.user.username if file_upload.user else "Unknown",
             "file_exists": file_exists,
-            "download_url": f"/api/v1/agenda-items/{item_id}/files/{file_upload.id}/download"
+            "download_url": f"/api/v1/agenda-items/{item_id}/files/{file_upload.id}/download",
+            "thumbnail_url": (
+                f"/api/v1/agenda-items/{item_id}/files/{file_upload.id}/thumbnail"
+                if is_thumbnailable(file_upload.file_type) else None
+            )
         })
     
     return {
@@ -602,6 +694,7 @@ async def delete_file_from_agenda_item(
     try:
         if os.path.exists(file_upload.filepath):
             os.remove(file_upload.filepath)
+        remove_thumbnails(file_upload.filepath)
     except Exception as e:
         # Log error but continue with database deletion
         logger.warning(f"Could not delete file from disk: {e}")
@@ -3,6 +3,8 @@ Knowledge Base API Endpoints
 Admin functions for managing the dynamic terminology learning system
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
@@ -13,6 +15,7 @@ from app.core.logging import logger
 # Safe import of knowledge base service
 try:
     from app.services.knowledge_base import knowledge_service, KnowledgeSnapshot, TerminologyEntry
+    from app.services.knowledge_rebuild import knowledge_rebuilder
     KNOWLEDGE_BASE_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Knowledge base service not available: {e}")
@@ -24,6 +27,7 @@ except Exception as e:
     class TerminologyEntry:
         pass
     knowledge_service = None
+    knowledge_rebuilder = None
 
 router = APIRouter()
 
@@ -52,6 +56,9 @@ class KnowledgeStatsResponse(BaseModel):
     top_terms: List[Dict[str, Any]]
     last_snapshot: Optional[datetime]
 
+class RebuildRequest(BaseModel):
+    restart: bool = Field(False, description="Discard a partially completed rebuild and start over")
+
 class TermApprovalRequest(BaseModel):
     action: str = Field(..., description="'approve' or 'reject'")
 
@@ -71,6 +78,12 @@ async def create_knowledge_snapshot(
             detail="Knowledge base service is not available"
         )
     
+    if knowledge_rebuilder.running:
+        raise HTTPException(
+            status_code=409,
+            detail="A knowledge base rebuild is in progress"
+        )
+    
     try:
         # Run snapshot in background for better performance
         snapshot = await knowledge_service.snapshot_submissions()
@@ -92,6 +105,46 @@ async def create_knowledge_snapshot(
             detail=f"Failed to create knowledge snapshot: {str(e)}"
         )
 
+@router.post("/rebuild")
+async def start_knowledge_rebuild(
+    request: RebuildRequest,
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Recount the knowledge base from the full submission history
+    Runs in the background across a process pool; an interrupted rebuild resumes
+    unless restart is set. Poll GET /rebuild for progress.
+    """
+    if not KNOWLEDGE_BASE_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base service is not available"
+        )
+    
+    if not knowledge_rebuilder.start(restart=request.restart):
+        raise HTTPException(
+            status_code=409,
+            detail="A knowledge base rebuild is already in progress"
+        )
+    
+    logger.info(f"Knowledge base rebuild started by user {current_user.id} (restart={request.restart})")
+    return {"success": True, "message": "Knowledge base rebuild started", "progress": knowledge_rebuilder.stats()}
+
+@router.get("/rebuild")
+async def get_knowledge_rebuild_progress(
+    current_user: User = Depends(get_admin_user)
+):
+    """
+    Progress of the current or last knowledge base rebuild
+    """
+    if not KNOWLEDGE_BASE_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base service is not available"
+        )
+    
+    return knowledge_rebuilder.stats()
+
 @router.get("/terminology", response_model=List[TerminologyResponse])
 async def get_terminology(
     category: Optional[str] = None,
@@ -104,7 +157,8 @@ async def get_terminology(
     Filter by category and confidence level
     """
     try:
-        vocabulary = knowledge_service.get_domain_vocabulary(
+        vocabulary = await asyncio.to_thread(
+            knowledge_service.get_domain_vocabulary,
             category=category, 
             min_confidence=min_confidence
         )
@@ -138,9 +192,7 @@ async def get_knowledge_stats(
     Get statistics about the knowledge base
     """
     try:
-        import sqlite3
-        
-        with sqlite3.connect(knowledge_service.db_path) as conn:
+        def read_stats(conn) -> KnowledgeStatsResponse:
             # Get total terms
             total_terms = conn.execute('SELECT COUNT(*) FROM terminology').fetchone()[0]
             
@@ -184,14 +236,17 @@ async def get_knowledge_stats(
             last_snapshot = None
             if last_snapshot_raw:
                 last_snapshot = datetime.fromisoformat(last_snapshot_raw)
+            
+            return KnowledgeStatsResponse(
+                total_terms=total_terms,
+                approved_terms=approved_terms,
+                categories=categories,
+                top_terms=top_terms,
+                last_snapshot=last_snapshot
+            )
         
-        return KnowledgeStatsResponse(
-            total_terms=total_terms,
-            approved_terms=approved_terms,
-            categories=categories,
-            top_terms=top_terms,
-            last_snapshot=last_snapshot
-        )
+        # Off the event loop; runs concurrently with snapshot writes (WAL)
+        return await knowledge_service.db.aread(read_stats)
         
     except Exception as e:
         raise HTTPException(
@@ -241,15 +296,23 @@ async def analyze_text_terminology(
     Analyze a piece of text for terminology extraction (testing endpoint)
     """
     try:
-        terms = knowledge_service.extract_terminology(text)
+        matches = knowledge_service.find_terms(text)
+        terms: Dict[str, List[str]] = {}
+        for match in matches:
+            terms.setdefault(match.category, []).append(match.term)
         quality_issues = knowledge_service.analyze_writing_quality(text)
+        domain_context = await asyncio.to_thread(knowledge_service.get_enhanced_prompt_context, "general")
         
         return {
             "text_length": len(text),
             "word_count": len(text.split()),
             "extracted_terms": terms,
+            "term_matches": [
+                {"term": m.term, "category": m.category, "start": m.start, "end": m.end}
+                for m in matches
+            ],
             "writing_quality_issues": quality_issues,
-            "domain_context": knowledge_service.get_enhanced_prompt_context("general")
+            "domain_context": domain_context
         }
         
     except Exception as e:
@@ -268,8 +331,9 @@ async def get_enhanced_context(
     Available to all users for refinement
     """
     try:
-        enhanced_context = knowledge_service.get_enhanced_prompt_context(context_type)
-        vocabulary_count = len(knowledge_service.get_domain_vocabulary(min_confidence=0.6))
+        enhanced_context = await asyncio.to_thread(knowledge_service.get_enhanced_prompt_context, context_type)
+        vocabulary = await asyncio.to_thread(knowledge_service.get_domain_vocabulary, min_confidence=0.6)
+        vocabulary_count = len(vocabulary)
         
         return {
             "context_type": context_type,
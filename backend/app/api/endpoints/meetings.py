@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, Path, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, validator
 from sqlalchemy.orm import Session
 
@@ -8,6 +9,9 @@ from app.api.endpoints.auth import User, get_current_user
 from app.db.models.meeting import Meeting, MeetingType, EventType
 from app.db.models.agenda_item import AgendaItem as DBAgendaItem, AgendaItemType
 from app.db.session import get_sync_db
+from app.core.logging import logger
+from app.core.zipstream import stream_zip, safe_arcname_part
+from app.services.image_processing import is_thumbnailable
 from sqlalchemy.orm import joinedload
 # Legacy in-memory storage no longer needed - all data is in PostgreSQL
 
@@ -266,7 +270,11 @@ async def get_meeting_agenda(
                 "size": file_upload.file_size or 0,
                 "file_path": file_upload.file_path,
                 "type": file_upload.file_type or "other",
-                "upload_date": file_upload.upload_date.isoformat() if file_upload.upload_date else None
+                "upload_date": file_upload.upload_date.isoformat() if file_upload.upload_date else None,
+                "thumbnail_url": (
+                    f"/api/v1/agenda-items/{item.id}/files/{file_upload.id}/thumbnail"
+                    if is_thumbnailable(file_upload.file_type) else None
+                )
             })
         
         if item.item_type == AgendaItemType.STUDENT_UPDATE.value:
@@ -360,6 +368,94 @@ async def get_meeting_agenda(
     return agenda
 
 
+@router.get("/{meeting_id}/files.zip")
+async def download_meeting_files(
+    meeting_id: int = Path(..., description="The ID of the meeting"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_sync_db)
+):
+    """
+    Download every agenda item and presentation file for a meeting as one ZIP.
+    The archive is streamed as it is built, organized by presenter:
+    <presenter>/updates/<file> and <presenter>/presentation/<file>.
+    Students only receive presentation files for their own assignments.
+    """
+    # Import here to avoid circular imports
+    from app.api.endpoints.agenda_items import resolve_upload_path
+    from app.db.models.presentation_assignment import PresentationAssignment
+    
+    meeting = db.query(Meeting).options(
+        joinedload(Meeting.presentation_assignments)
+            .joinedload(PresentationAssignment.student),
+        joinedload(Meeting.presentation_assignments)
+            .joinedload(PresentationAssignment.files)
+    ).filter(Meeting.id == meeting_id).first()
+    
+    if not meeting:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Meeting with ID {meeting_id} not found"
+        )
+    
+    agenda_items = db.query(DBAgendaItem).options(
+        joinedload(DBAgendaItem.user),
+        joinedload(DBAgendaItem.file_uploads)
+    ).filter(
+        DBAgendaItem.meeting_id == meeting_id
+    ).order_by(DBAgendaItem.order_index, DBAgendaItem.created_at).all()
+    
+    is_privileged = current_user.role in ["admin", "faculty"]
+    
+    # Resolve everything up front so the stream never touches the database session
+    entries = []
+    missing = 0
+    
+    for item in agenda_items:
+        presenter = safe_arcname_part(item.user.full_name or item.user.username, f"user_{item.user_id}")
+        for file_upload in item.file_uploads:
+            path = resolve_upload_path(file_upload.filepath)
+            if not path:
+                missing += 1
+                continue
+            entries.append((f"{presenter}/updates/{safe_arcname_part(file_upload.filename)}", path))
+    
+    for assignment in meeting.presentation_assignments:
+        if not is_privileged and assignment.student_id != current_user.id:
+            continue
+        presenter = safe_arcname_part(
+            assignment.student.full_name or assignment.student.username,
+            f"user_{assignment.student_id}"
+        )
+        for file_record in assignment.files:
+            path = resolve_upload_path(file_record.filepath)
+            if not path:
+                missing += 1
+                continue
+            entries.append((f"{presenter}/presentation/{safe_arcname_part(file_record.original_filename)}", path))
+    
+    if not entries:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No files available for meeting {meeting_id}"
+        )
+    
+    if missing:
+        logger.warning(f"Meeting {meeting_id} bundle: skipped {missing} files missing on disk")
+    
+    archive_name = f"meeting_{meeting_id}_{meeting.start_time.strftime('%Y%m%d')}_files.zip"
+    
+    # Sync generator - Starlette iterates it in the threadpool, so file I/O stays off the event loop
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{archive_name}"',
+            "X-Bundle-File-Count": str(len(entries)),
+            "X-Bundle-Missing-Count": str(missing)
+        }
+    )
+
+
 @router.get("/integrity-check")
 async def check_meeting_data_integrity(
     current_user: User = Depends(get_current_user),
@@ -4,14 +4,19 @@ Test cases to validate conservative LLM behavior
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
 import os
 import json
+import time
 from datetime import datetime
 from app.api.endpoints.auth import User, get_current_user
-from app.api.endpoints.text import refine_text
-from pydantic import BaseModel
+from app.api.endpoints.text import perform_text_refinement
+from app.core.logging import logger
+from app.core.metrics import summarize
+from app.services.llm_scheduler import PRIORITY_BATCH
+from app.services.ollama_client import get_ollama_client
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
@@ -30,6 +35,25 @@ class TestResult(BaseModel):
     issues: List[str]
     length_ratio: float
     context: str
+    run: int = 1
+    latency_seconds: float = 0.0
+    queue_seconds: Optional[float] = None       # Waiting for a scheduler slot
+    generation_seconds: Optional[float] = None  # Holding the slot (the Ollama call)
+    tokens_per_sec: Optional[float] = None
+    parse_failed: bool = False
+    error: bool = False
+
+class QARunRequest(BaseModel):
+    concurrency: int = Field(2, ge=1, le=16, description="Test cases refined at the same time")
+    repeats: int = Field(1, ge=1, le=10, description="Runs per test case, for stable latency percentiles")
+    save_baseline: bool = Field(False, description="Store this run as the baseline for later comparisons")
+
+QA_REPORT_DIR = "/config/workspace/gitea/DoR-Dash/qa/LLM-QA"
+QA_BASELINE_FILE = "baseline.json"
+
+# Regressions flagged against the baseline
+LATENCY_REGRESSION = 0.2      # p95 more than 20% slower
+PASS_RATE_REGRESSION = 0.1    # pass rate down by more than 10 points
 
 # Test cases covering different scenarios
 TEST_CASES = [
@@ -104,18 +128,28 @@ TEST_CASES = [
     )
 ]
 
-async def run_single_test(test_case: TestCase, current_user: User) -> TestResult:
+async def run_single_test(test_case: TestCase, current_user: User, run: int = 1) -> TestResult:
     """Run a single test case and evaluate results"""
+    start = time.perf_counter()
     try:
         # Create a mock request object
         from app.api.endpoints.text import TextRefinementRequest
         request = TextRefinementRequest(
             text=test_case.input_text,
-            context=test_case.context
+            context=test_case.context,
+            use_cache=False,  # Always exercise the live model
+            allow_fast_path=False
         )
         
-        # Call the refinement function
-        result = await refine_text(request, current_user)
+        # Call the refinement function - QA runs yield to interactive users
+        result = await perform_text_refinement(request, priority=PRIORITY_BATCH)
+        latency = time.perf_counter() - start
+        
+        # Generation speed from Ollama's own timing, falling back to the time spent holding a slot
+        tokens = result.tokens or {}
+        tokens_per_sec = None
+        if tokens.get("eval_count"):
+            tokens_per_sec = tokens["eval_count"] / (tokens.get("eval_seconds") or tokens.get("generation_seconds") or latency)
         
         # Analyze the result
         issues = []
@@ -140,6 +174,9 @@ async def run_single_test(test_case: TestCase, current_user: User) -> TestResult
         if input_length < 50 and length_ratio > 1.5:
             issues.append("Short text was expanded unnecessarily")
         
+        if result.parse_failed:
+            issues.append("Model response was not valid refinement JSON")
+        
         passed = len(issues) == 0
         
         return TestResult(
@@ -149,7 +186,13 @@ async def run_single_test(test_case: TestCase, current_user: User) -> TestResult
             passed=passed,
             issues=issues,
             length_ratio=length_ratio,
-            context=test_case.context
+            context=test_case.context,
+            run=run,
+            latency_seconds=latency,
+            queue_seconds=tokens.get("queue_seconds"),
+            generation_seconds=tokens.get("generation_seconds"),
+            tokens_per_sec=tokens_per_sec,
+            parse_failed=result.parse_failed
         )
         
     except Exception as e:
@@ -160,10 +203,164 @@ async def run_single_test(test_case: TestCase, current_user: User) -> TestResult
             passed=False,
             issues=[f"Exception occurred: {str(e)}"],
             length_ratio=0.0,
-            context=test_case.context
+            context=test_case.context,
+            run=run,
+            latency_seconds=time.perf_counter() - start,
+            error=True
         )
 
-def generate_qa_report(results: List[TestResult], summary: Dict[str, Any]) -> str:
+async def run_test_suite(
+    test_cases: List[TestCase],
+    current_user: User,
+    concurrency: int = 2,
+    repeats: int = 1
+) -> List[TestResult]:
+    """
+    Run every test case `repeats` times with at most `concurrency` in flight.
+    Work is submitted at batch priority, so the scheduler keeps interactive
+    users ahead of the QA run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_bounded(test_case: TestCase, run: int) -> TestResult:
+        async with semaphore:
+            return await run_single_test(test_case, current_user, run)
+    
+    return list(await asyncio.gather(*(
+        run_bounded(test_case, run)
+        for run in range(1, repeats + 1)
+        for test_case in test_cases
+    )))
+
+def performance_stats(results: List[TestResult]) -> Dict[str, Any]:
+    """Pass rate, latency percentiles, tokens/sec and parse/error rates for a set of results"""
+    count = len(results)
+    completed = [r for r in results if not r.error]
+    speeds = [r.tokens_per_sec for r in completed if r.tokens_per_sec]
+    return {
+        "runs": count,
+        "pass_rate": round(sum(1 for r in results if r.passed) / count, 4) if count else 0.0,
+        "latency_seconds": summarize(r.latency_seconds for r in completed),
+        "queue_seconds": summarize(r.queue_seconds for r in completed if r.queue_seconds is not None),
+        "generation_seconds": summarize(r.generation_seconds for r in completed if r.generation_seconds is not None),
+        "tokens_per_sec": round(sum(speeds) / len(speeds), 2) if speeds else None,
+        "parse_failure_rate": round(sum(1 for r in completed if r.parse_failed) / len(completed), 4) if completed else 0.0,
+        "error_rate": round((count - len(completed)) / count, 4) if count else 0.0
+    }
+
+def performance_by_context(results: List[TestResult]) -> Dict[str, Dict[str, Any]]:
+    """performance_stats overall and per refinement context"""
+    contexts: Dict[str, List[TestResult]] = {}
+    for result in results:
+        contexts.setdefault(result.context, []).append(result)
+    stats = {"overall": performance_stats(results)}
+    for context in sorted(contexts):
+        stats[context] = performance_stats(contexts[context])
+    return stats
+
+def compare_to_baseline(current: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-context changes against a stored baseline, with regressions called out"""
+    changes = {}
+    regressions = []
+    baseline_stats = baseline.get("performance", {})
+    for context, stats in current.items():
+        before = baseline_stats.get(context)
+        if not before:
+            continue
+        p95_before = before["latency_seconds"]["p95"]
+        p95_now = stats["latency_seconds"]["p95"]
+        p95_change = (p95_now - p95_before) / p95_before if p95_before else None
+        change = {
+            "p50_seconds": round(stats["latency_seconds"]["p50"] - before["latency_seconds"]["p50"], 4),
+            "p95_seconds": round(p95_now - p95_before, 4),
+            "p95_change": round(p95_change, 4) if p95_change is not None else None,
+            "pass_rate": round(stats["pass_rate"] - before["pass_rate"], 4),
+            "parse_failure_rate": round(stats["parse_failure_rate"] - before["parse_failure_rate"], 4),
+            "tokens_per_sec": (
+                round(stats["tokens_per_sec"] - before["tokens_per_sec"], 2)
+                if stats["tokens_per_sec"] is not None and before.get("tokens_per_sec") is not None else None
+            )
+        }
+        changes[context] = change
+        if p95_change is not None and p95_change > LATENCY_REGRESSION:
+            regressions.append(f"{context}: p95 latency up {p95_change:.0%}")
+        if change["pass_rate"] < -PASS_RATE_REGRESSION:
+            regressions.append(f"{context}: pass rate down {-change['pass_rate']:.0%}")
+        if change["parse_failure_rate"] > 0:
+            regressions.append(f"{context}: parse failures up {change['parse_failure_rate']:.0%}")
+    return {
+        "baseline_created": baseline.get("created"),
+        "baseline_model": baseline.get("model"),
+        "changes": changes,
+        "regressions": regressions
+    }
+
+def load_qa_baseline() -> Optional[Dict[str, Any]]:
+    """The stored QA baseline, if one has been saved"""
+    path = os.path.join(QA_REPORT_DIR, QA_BASELINE_FILE)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read QA baseline {path}: {e}")
+        return None
+
+def save_qa_baseline(performance: Dict[str, Dict[str, Any]], run_options: QARunRequest) -> str:
+    """Store a run's performance stats as the baseline for later comparisons"""
+    os.makedirs(QA_REPORT_DIR, exist_ok=True)
+    path = os.path.join(QA_REPORT_DIR, QA_BASELINE_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "created": datetime.now().isoformat(),
+            "model": get_ollama_client().model,
+            "concurrency": run_options.concurrency,
+            "repeats": run_options.repeats,
+            "performance": performance
+        }, f, indent=2)
+    return path
+
+def format_performance_table(performance: Dict[str, Dict[str, Any]]) -> str:
+    """Markdown table of per-context performance stats"""
+    table = "| Context | Runs | Pass Rate | p50 | p95 | p99 | Queue p95 | Generation p95 | Tokens/s | Parse Failures | Errors |\n"
+    table += "|---------|------|-----------|-----|-----|-----|-----------|----------------|----------|----------------|--------|\n"
+    for context, stats in performance.items():
+        latency = stats["latency_seconds"]
+        tokens_per_sec = f"{stats['tokens_per_sec']:.1f}" if stats["tokens_per_sec"] is not None else "-"
+        table += (
+            f"| {context} | {stats['runs']} | {stats['pass_rate']:.0%} | {latency['p50']:.2f}s "
+            f"| {latency['p95']:.2f}s | {latency['p99']:.2f}s | {stats['queue_seconds']['p95']:.2f}s "
+            f"| {stats['generation_seconds']['p95']:.2f}s | {tokens_per_sec} "
+            f"| {stats['parse_failure_rate']:.0%} | {stats['error_rate']:.0%} |\n"
+        )
+    return table
+
+def format_baseline_comparison(comparison: Dict[str, Any]) -> str:
+    """Markdown section comparing a run against the stored baseline"""
+    section = f"Baseline from {comparison['baseline_created']} (model `{comparison['baseline_model']}`)\n\n"
+    section += "| Context | Δ p50 | Δ p95 | Δ Pass Rate | Δ Parse Failures | Δ Tokens/s |\n"
+    section += "|---------|-------|-------|-------------|------------------|------------|\n"
+    for context, change in comparison["changes"].items():
+        tokens_per_sec = f"{change['tokens_per_sec']:+.1f}" if change["tokens_per_sec"] is not None else "-"
+        section += (
+            f"| {context} | {change['p50_seconds']:+.2f}s | {change['p95_seconds']:+.2f}s "
+            f"| {change['pass_rate']:+.0%} | {change['parse_failure_rate']:+.0%} | {tokens_per_sec} |\n"
+        )
+    if comparison["regressions"]:
+        section += "\n**Regressions**:\n"
+        for regression in comparison["regressions"]:
+            section += f"- ⚠️ {regression}\n"
+    else:
+        section += "\n- ✅ No regressions against the baseline\n"
+    return section
+
+def generate_qa_report(
+    results: List[TestResult],
+    summary: Dict[str, Any],
+    performance: Optional[Dict[str, Dict[str, Any]]] = None,
+    comparison: Optional[Dict[str, Any]] = None
+) -> str:
     """Generate a detailed QA report in markdown format"""
     timestamp = datetime.now()
     
@@ -183,17 +380,35 @@ def generate_qa_report(results: List[TestResult], summary: Dict[str, Any]) -> st
 | Pass Rate | {summary['pass_rate']} |
 | Average Length Ratio | {summary['average_length_ratio']} |
 
-## Test Results
-
 """
     
-    for i, result in enumerate(results, 1):
+    if performance:
+        report += "## Performance\n\n"
+        report += f"Concurrency {summary.get('concurrency', 1)}, {summary.get('repeats', 1)} run(s) per test case\n\n"
+        report += format_performance_table(performance) + "\n"
+    
+    if comparison:
+        report += "## Baseline Comparison\n\n" + format_baseline_comparison(comparison) + "\n"
+    
+    report += "## Test Results\n\n"
+    
+    # One entry per test case (first run); repeated runs are summarized
+    runs_by_test: Dict[str, List[TestResult]] = {}
+    for result in results:
+        runs_by_test.setdefault(result.test_name, []).append(result)
+    
+    for i, result in enumerate((r for r in results if r.run == 1), 1):
         status_emoji = "✅" if result.passed else "❌"
+        runs = runs_by_test[result.test_name]
         report += f"""### {i}. {result.test_name} {status_emoji}
 
 **Context**: `{result.context}`  
 **Length Ratio**: {result.length_ratio:.2f}x  
-
+**Latency**: {result.latency_seconds:.2f}s  
+"""
+        if len(runs) > 1:
+            report += f"**Runs Passed**: {sum(1 for r in runs if r.passed)}/{len(runs)}  \n"
+        report += f"""
 **Input**:
 ```
 {result.input_text}
@@ -255,7 +470,7 @@ def save_qa_report(content: str) -> str:
     """Save the QA report to the qa/LLM-QA folder"""
     try:
         # Create QA directory structure
-        qa_dir = "/config/workspace/gitea/DoR-Dash/qa/LLM-QA"
+        qa_dir = QA_REPORT_DIR
         os.makedirs(qa_dir, exist_ok=True)
         
         # Generate filename with timestamp
@@ -272,22 +487,28 @@ def save_qa_report(content: str) -> str:
         raise HTTPException(status_code=500, detail=f"Failed to save QA report: {str(e)}")
 
 @router.post("/run-tests")
-async def run_all_tests(current_user: User = Depends(get_current_user)):
+async def run_all_tests(
+    run_options: Optional[QARunRequest] = None,
+    current_user: User = Depends(get_current_user)
+):
     """
-    Run all text refinement test cases
+    Run all text refinement test cases concurrently (optionally several times each),
+    report latency percentiles, tokens/sec and parse failures per context and
+    compare them with the stored baseline
     Only available to admin users
     """
     if current_user.role not in ["admin", "faculty"]:
         raise HTTPException(status_code=403, detail="Only admin/faculty can run tests")
     
-    results = []
+    run_options = run_options or QARunRequest()
     
-    for test_case in TEST_CASES:
-        result = await run_single_test(test_case, current_user)
-        results.append(result)
-        
-        # Small delay to avoid overwhelming the LLM
-        await asyncio.sleep(0.5)
+    started = time.perf_counter()
+    results = await run_test_suite(
+        TEST_CASES, current_user,
+        concurrency=run_options.concurrency,
+        repeats=run_options.repeats
+    )
+    wall_seconds = time.perf_counter() - started
     
     # Calculate summary statistics
     total_tests = len(results)
@@ -300,12 +521,26 @@ async def run_all_tests(current_user: User = Depends(get_current_user)):
         "passed": passed_tests,
         "failed": failed_tests,
         "pass_rate": f"{(passed_tests/total_tests*100):.1f}%" if total_tests > 0 else "0%",
-        "average_length_ratio": f"{avg_length_ratio:.2f}x"
+        "average_length_ratio": f"{avg_length_ratio:.2f}x",
+        "concurrency": run_options.concurrency,
+        "repeats": run_options.repeats,
+        "wall_seconds": round(wall_seconds, 2)
     }
     
+    performance = performance_by_context(results)
+    baseline = load_qa_baseline()
+    comparison = compare_to_baseline(performance, baseline) if baseline else None
+    
+    baseline_location = None
+    if run_options.save_baseline:
+        try:
+            baseline_location = save_qa_baseline(performance, run_options)
+        except OSError as e:
+            baseline_location = f"Failed to save baseline: {str(e)}"
+    
     # Generate and save QA report
     try:
-        report_content = generate_qa_report(results, summary)
+        report_content = generate_qa_report(results, summary, performance, comparison)
         report_path = save_qa_report(report_content)
         report_saved = True
         report_location = report_path
@@ -315,6 +550,9 @@ async def run_all_tests(current_user: User = Depends(get_current_user)):
     
     return {
         "summary": summary,
+        "performance": performance,
+        "baseline_comparison": comparison,
+        "baseline_saved": baseline_location,
         "results": results,
         "recommendations": [
             "Tests should mostly pass with minimal expansion",
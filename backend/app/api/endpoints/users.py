@@ -1,19 +1,9 @@
 from typing import List, Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, Path, status, UploadFile, File, Request
-from fastapi.responses import Response
+from fastapi.responses import Response, RedirectResponse
 from pydantic import EmailStr
 import os
 import redis
-import json
-import base64
-from datetime import datetime
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    Image = None
-import io
 
 from sqlalchemy.orm import Session
 from app.api.endpoints.auth import User, get_current_user, create_user as auth_create_user, update_user as auth_update_user, delete_user as auth_delete_user, get_all_users
@@ -23,43 +13,38 @@ from app.core.permissions import get_admin_user, get_faculty_or_admin_user, is_o
 from app.core.security import get_password_hash
 from app.core.config import settings
 from app.schemas.auth import UserCreate, UserUpdate, UserResponse
+from app.db.models.user import User as DBUser
+from app.services.image_processing import get_image_pool, process_avatar, ImagePoolSaturatedError, PIL_AVAILABLE
+from app.services.avatar_service import AvatarService
 
 router = APIRouter()
 
-# Redis connection for avatar caching
+# Redis connection for avatar caching (raw bytes, reused across requests)
+_avatar_redis = None
+
 def get_redis_client():
     """Get Redis client for avatar caching"""
+    global _avatar_redis
+    if _avatar_redis is not None:
+        return _avatar_redis
     try:
         r = redis.Redis(
             host=settings.REDIS_SERVER,
             port=settings.REDIS_PORT,
             db=0,
-            decode_responses=False
+            decode_responses=False,
+            socket_timeout=0.5
         )
         r.ping()  # Test connection
+        _avatar_redis = r
         return r
     except Exception as e:
         logger.warning(f"Redis not available for avatar caching: {e}")
         return None
 
-# Rate limiting for avatar requests  
-def check_rate_limit(user_id: int, redis_client, limit: int = 5, window: int = 60):
-    """Check if user has exceeded rate limit for avatar requests"""
-    if not redis_client:
-        return True  # Allow if Redis unavailable
-    
-    try:
-        rate_key = f"avatar_rate:{user_id}"
-        current_requests = redis_client.incr(rate_key)
-        
-        if current_requests == 1:
-            # First request in window, set expiration
-            redis_client.expire(rate_key, window)
-        
-        return current_requests <= limit
-    except Exception as e:
-        logger.warning(f"Rate limit check failed: {e}")
-        return True  # Allow on error
+# Content-hashed avatar URLs never change, so caches may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+AVATAR_CACHE_TTL = 24 * 60 * 60  # Redis copy of hot variants
 
 # Function to generate a new user ID - no longer needed with database auto-increment
 
@@ -354,6 +339,7 @@ async def upload_avatar(
     - Supported formats: JPG, PNG, WebP
     - Max file size: 5MB
     - Images are automatically resized to 200x200px
+    - 200/96/48px WebP and 200px JPEG variants are served at immutable content-hashed URLs
     """
     # Check permissions - only admins or the user themselves can update avatar
     if not is_owner_or_admin(user_id, current_user):
@@ -392,233 +378,135 @@ async def upload_avatar(
             detail="File size exceeds 5MB limit"
         )
     
+    # Check if PIL is available
+    if not PIL_AVAILABLE:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Image processing not available. PIL/Pillow not installed."
+        )
+    
     try:
-        # Check if PIL is available
-        if not PIL_AVAILABLE:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Image processing not available. PIL/Pillow not installed."
-            )
-        
-        # Process the image with PIL
-        image = Image.open(io.BytesIO(content))
-        
-        # Verify it's actually an image
-        image.verify()
-        # Re-open the image since verify() closes it
-        image = Image.open(io.BytesIO(content))
-        
-        # Check if image is already properly sized (from frontend cropper)
-        img_w, img_h = image.size
-        is_already_cropped = (img_w == 200 and img_h == 200)
-        
-        # Debug logging
-        logger.info(f"Avatar upload for user {user_id}: received image size {img_w}x{img_h}, mode: {image.mode}")
-        logger.info(f"Is already cropped: {is_already_cropped}")
-        
-        if is_already_cropped:
-            # Image is already cropped by frontend with user's preferred positioning and soft edges
-            # Just ensure it's in RGB mode for JPEG compatibility
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Convert RGBA to RGB with white background, preserving soft edges
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                
-                # Use proper alpha compositing to preserve soft edges
-                if image.mode == 'RGBA':
-                    # Split channels for better soft edge preservation
-                    r, g, b, a = image.split()
-                    rgb_image = Image.merge('RGB', (r, g, b))
-                    background.paste(rgb_image, (0, 0), a)
-                elif image.mode == 'LA':
-                    # Grayscale with alpha
-                    l, a = image.split()
-                    background.paste(image.convert('RGB'), (0, 0), a)
-                else:
-                    # Fallback for other modes
-                    background.paste(image, (0, 0), image if hasattr(image, 'mode') and 'A' in image.mode else None)
-                    
-                image = background
-            elif image.mode not in ('RGB', 'L'):
-                image = image.convert('RGB')
-        else:
-            # Image needs processing - do smart cropping as fallback
-            # Convert to RGB if necessary (for JPG compatibility)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Create white background for transparency
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            elif image.mode not in ('RGB', 'L'):
-                # Convert any other modes to RGB
-                image = image.convert('RGB')
-            
-            # Resize to 200x200 with smart cropping
-            # First, resize to make the smallest dimension 200px
-            if img_w < img_h:
-                new_w = 200
-                new_h = int((200 * img_h) / img_w)
-            else:
-                new_h = 200
-                new_w = int((200 * img_w) / img_h)
-            
-            image = image.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            
-            # Crop to 200x200 from center
-            left = (new_w - 200) // 2
-            top = (new_h - 200) // 2
-            image = image.crop((left, top, left + 200, top + 200))
-        
-        # Save processed image to memory buffer for database storage
-        image_buffer = io.BytesIO()
-        image.save(image_buffer, 'JPEG', quality=90, optimize=True)
-        avatar_data = image_buffer.getvalue()
-        content_type = 'image/jpeg'
-        
-        # Store avatar in database instead of file system
-        auth_update_user(db, user_id, {
-            "avatar_data": avatar_data,
-            "avatar_content_type": content_type,
-            "avatar_url": f"/api/v1/users/{user_id}/avatar/image"  # New endpoint for serving avatars
-        })
-        
-        # Clear Redis cache for this user's avatar so new image is served immediately
-        cache_key = f"avatar:{user_id}"
-        redis_client = get_redis_client()
-        if redis_client:
-            try:
-                redis_client.delete(cache_key)
-                logger.info(f"Cleared avatar cache for user {user_id} after upload")
-            except Exception as e:
-                logger.warning(f"Failed to clear avatar cache: {e}")
+        # Decode, crop and encode in the image process pool so the event loop stays free
+        processed = await get_image_pool().submit(process_avatar, content)
+    except ImagePoolSaturatedError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Avatar processing is busy. Please try again in a few seconds.",
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        logger.error(f"Error processing avatar: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process avatar image"
+        )
+    
+    logger.info(
+        f"Avatar upload for user {user_id}: received image size {processed['source_size']}, "
+        f"processing: {processed['processing']}"
+    )
+    try:
+        # Store every pre-rendered variant under its content hash - a new image gets new URLs,
+        # so nothing needs invalidating in browser, proxy or Redis caches
+        content_hash = processed["content_hash"]
+        avatar_url = AvatarService.replace_variants(db, user_id, content_hash, processed["variants"])
         
         return {
             "message": "Avatar uploaded successfully",
-            "avatar_url": f"/api/v1/users/{user_id}/avatar/image",
+            "avatar_url": avatar_url,
+            "avatar_variants": AvatarService.variant_urls(content_hash, list(processed["variants"])),
             "file_size": len(content),
-            "processed_size": f"{image.size[0]}x{image.size[1]}",
+            "processed_size": f"{processed['width']}x{processed['height']}",
             "storage": "database",
-            "processing": "preserved" if is_already_cropped else "cropped"
+            "processing": processed["processing"]
         }
         
     except Exception as e:
-        logger.error(f"Error processing avatar: {e}")
+        logger.error(f"Error storing avatar: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process avatar image"
         )
 
 
-# Get user avatar (with Redis caching and error handling)
-@router.get("/{user_id}/avatar/image")
-async def get_avatar(
-    user_id: int = Path(..., description="The ID of the user"),
+# Serve a content-hashed avatar variant (immutable)
+@router.get("/avatars/{content_hash}/{variant}")
+async def get_avatar_variant(
+    content_hash: str = Path(..., description="Content hash of the avatar", pattern="^[0-9a-f]{8,32}$"),
+    variant: str = Path(..., description="Variant name, e.g. 200.webp, 96.webp, 48.webp, 200.jpg"),
     db: Session = Depends(get_sync_db)
 ):
     """
-    Get a user's avatar image from database with Redis caching.
-    - Cached avatars are served from Redis for performance
-    - Falls back to database if cache miss
-    - Returns 404 if user has no avatar
-    - Enhanced error handling for rapid requests
+    Get one pre-rendered avatar variant by content hash.
+    - URLs change whenever the image changes, so responses are cached forever
+    - Raw bytes are cached in Redis, falling back to the database on a miss
     """
-    try:
-        cache_key = f"avatar:{user_id}"
-        redis_client = None
-        
-        # Try to get Redis client safely
-        try:
-            redis_client = get_redis_client()
-        except Exception as e:
-            logger.warning(f"Could not get Redis client for avatar {user_id}: {e}")
-        
-        # Rate limiting check
-        if redis_client and not check_rate_limit(user_id, redis_client):
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Too many avatar requests. Please wait before requesting again."
-            )
-        
-        # Try to get from Redis cache first
-        if redis_client:
-            try:
-                cached_data = redis_client.get(cache_key)
-                if cached_data:
-                    avatar_info = json.loads(cached_data)
-                    avatar_data = base64.b64decode(avatar_info['data'])
-                    content_type = avatar_info['content_type']
-                    
-                    return Response(
-                        content=avatar_data,
-                        media_type=content_type,
-                        headers={
-                            "Cache-Control": "public, max-age=3600",
-                            "X-Avatar-Source": "redis-cache"
-                        }
-                    )
-            except Exception as e:
-                logger.warning(f"Redis cache error for avatar {user_id}: {e}")
-        
-        # Get user from database with error handling
+    cache_key = f"avatar:{content_hash}:{variant}"
+    media_type = "image/webp" if variant.endswith(".webp") else "image/jpeg"
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": f'"{content_hash}-{variant}"'}
+    
+    redis_client = get_redis_client()
+    if redis_client:
         try:
-            all_users = get_all_users(db)
-            user = next((u for u in all_users if u["id"] == user_id), None)
+            cached = redis_client.get(cache_key)
+            if cached:
+                return Response(content=cached, media_type=media_type, headers={**headers, "X-Avatar-Source": "redis-cache"})
         except Exception as e:
-            logger.error(f"Database error getting user {user_id} for avatar: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Database error retrieving user"
-            )
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"User with ID {user_id} not found"
-            )
-        
-        # Check if user has avatar data in database
-        if not user.get("avatar_data") or not user.get("avatar_content_type"):
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User has no avatar"
-            )
-            
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        # Catch any other unexpected errors
-        logger.error(f"Unexpected error in get_avatar for user {user_id}: {e}")
+            logger.warning(f"Redis cache error for avatar {content_hash}: {e}")
+    
+    row = AvatarService.get_variant(db, content_hash, variant)
+    if row is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Internal server error retrieving avatar"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Avatar not found"
         )
     
-    avatar_data = user["avatar_data"]
-    content_type = user["avatar_content_type"]
-    
-    # Cache avatar in Redis for future requests
     if redis_client:
         try:
-            avatar_cache_data = {
-                'data': base64.b64encode(avatar_data).decode('utf-8'),
-                'content_type': content_type,
-                'cached_at': datetime.now().isoformat(),
-                'size': len(avatar_data)
-            }
-            # Cache for 1 hour
-            redis_client.setex(cache_key, 3600, json.dumps(avatar_cache_data))
-            logger.info(f"Avatar cached in Redis for user {user_id}")
+            redis_client.setex(cache_key, AVATAR_CACHE_TTL, row.data)
         except Exception as e:
             logger.warning(f"Failed to cache avatar in Redis: {e}")
     
-    logger.info(f"Avatar served from database for user {user_id}")
+    return Response(content=row.data, media_type=row.content_type, headers={**headers, "X-Avatar-Source": "database"})
+
+
+# Get user avatar (legacy URL - redirects to the current content-hashed variant)
+@router.get("/{user_id}/avatar/image")
+async def get_avatar(
+    user_id: int = Path(..., description="The ID of the user"),
+    db: Session = Depends(get_sync_db)
+):
+    """
+    Get a user's avatar image.
+    - Avatars with pre-rendered variants redirect to their immutable content-hashed URL
+    - Avatars uploaded before variants existed are served from the database
+    - Returns 404 if user has no avatar
+    """
+    content_hash = AvatarService.get_current_hash(db, user_id)
+    if content_hash:
+        return RedirectResponse(
+            url=AvatarService.variant_url(content_hash, "200.jpg"),
+            status_code=status.HTTP_302_FOUND,
+            headers={"Cache-Control": "public, max-age=300"}
+        )
+    
+    user = db.query(DBUser.avatar_data, DBUser.avatar_content_type).filter(DBUser.id == user_id).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} not found"
+        )
+    
+    if not user.avatar_data or not user.avatar_content_type:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User has no avatar"
+        )
+    
     return Response(
-        content=avatar_data,
-        media_type=content_type,
+        content=user.avatar_data,
+        media_type=user.avatar_content_type,
         headers={
             "Cache-Control": "public, max-age=3600",
             "X-Avatar-Source": "database"
@@ -655,15 +543,8 @@ async def delete_avatar(
             detail=f"User with ID {user_id} not found"
         )
     
-    # Clear avatar data from Redis cache
-    cache_key = f"avatar:{user_id}"
-    redis_client = get_redis_client()
-    if redis_client:
-        try:
-            redis_client.delete(cache_key)
-            logger.info(f"Avatar cache cleared for user {user_id}")
-        except Exception as e:
-            logger.warning(f"Failed to clear avatar cache: {e}")
+    # Content-hashed variants are simply dropped; their URLs are no longer referenced
+    AvatarService.delete_variants(db, user_id)
     
     # Clear avatar data from database
     auth_update_user(db, user_id, {
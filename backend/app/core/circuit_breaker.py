@@ -0,0 +1,93 @@
+"""
+Circuit breaker for calls to unreliable backends.
+After repeated failures the breaker opens and calls fail fast; once the reset
+timeout passes a single probe call is let through to test the backend again.
+"""
+import time
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half_open -> closed)"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._reset_due():
+            return HALF_OPEN
+        return self._state
+
+    def _reset_due(self) -> bool:
+        return self._opened_at is not None and time.monotonic() - self._opened_at >= self.reset_timeout
+
+    @property
+    def _probe_in_flight(self) -> bool:
+        # A probe that never reported back (e.g. cancelled) expires after one reset period
+        return (
+            self._probe_started_at is not None
+            and time.monotonic() - self._probe_started_at < self.reset_timeout
+        )
+
+    def is_open(self) -> bool:
+        """True while calls should fail fast (does not consume the half-open probe)"""
+        state = self.state
+        return state == OPEN or (state == HALF_OPEN and self._probe_in_flight)
+
+    def allow_request(self) -> bool:
+        """Whether a call may proceed; in half-open state only one probe is allowed"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._state = HALF_OPEN
+            self._probe_started_at = time.monotonic()
+            return True
+        return False
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe will be allowed"""
+        if self._opened_at is None:
+            return 1
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def record_success(self) -> None:
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        self.last_error = error
+        self._consecutive_failures += 1
+        if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                self.times_opened += 1
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+            self._probe_started_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "times_opened": self.times_opened,
+            "retry_after": self.retry_after() if self.state != CLOSED else 0,
+            "last_error": self.last_error
+        }
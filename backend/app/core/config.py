@@ -28,7 +28,50 @@ class Settings(BaseSettings):
     
     # Ollama API settings
     OLLAMA_API_URL: str = os.environ.get("OLLAMA_API_URL", "http://172.30.98.14:11434/api/generate")
-    
+    # Optional comma-separated list of generate URLs to load balance across (overrides OLLAMA_API_URL)
+    OLLAMA_API_URLS: str = os.environ.get("OLLAMA_API_URLS", "")
+    OLLAMA_MODEL: str = os.environ.get("OLLAMA_MODEL", "gemma3:4b")
+    OLLAMA_MAX_CONNECTIONS: int = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", "8"))
+    OLLAMA_TIMEOUT: float = float(os.environ.get("OLLAMA_TIMEOUT", "60"))
+    OLLAMA_CONNECT_TIMEOUT: float = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_FAILURE_THRESHOLD: int = int(os.environ.get("OLLAMA_FAILURE_THRESHOLD", "5"))
+    OLLAMA_RESET_TIMEOUT: float = float(os.environ.get("OLLAMA_RESET_TIMEOUT", "30"))
+    # Model warm-up: preload at startup and keep the model resident during working hours
+    OLLAMA_WARMUP_ENABLED: bool = os.environ.get("OLLAMA_WARMUP_ENABLED", "true").lower() == "true"
+    OLLAMA_KEEP_ALIVE: str = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_WORKING_HOURS: str = os.environ.get("OLLAMA_WORKING_HOURS", "07:00-19:00")
+    OLLAMA_WORKING_DAYS: str = os.environ.get("OLLAMA_WORKING_DAYS", "0,1,2,3,4")  # Monday = 0
+    OLLAMA_WARMUP_INTERVAL: float = float(os.environ.get("OLLAMA_WARMUP_INTERVAL", "600"))
+
+    # LLM scheduling (concurrency limit, queue admission, priorities) - limits are per Ollama backend
+    LLM_MAX_CONCURRENCY: int = int(os.environ.get("LLM_MAX_CONCURRENCY", "2"))
+    LLM_MIN_CONCURRENCY: int = int(os.environ.get("LLM_MIN_CONCURRENCY", "1"))
+    LLM_LATENCY_TOLERANCE: float = float(os.environ.get("LLM_LATENCY_TOLERANCE", "2.0"))
+    LLM_MAX_QUEUE: int = int(os.environ.get("LLM_MAX_QUEUE", "16"))
+    LLM_QUEUE_TIMEOUT: float = float(os.environ.get("LLM_QUEUE_TIMEOUT", "30"))
+    LLM_FACULTY_PRIORITY: bool = os.environ.get("LLM_FACULTY_PRIORITY", "true").lower() == "true"
+    # Prompt sizing - num_ctx is fixed at the context limit (changing it reloads the model),
+    # num_predict is chosen per request up to its limit
+    LLM_MAX_CONTEXT_TOKENS: int = int(os.environ.get("LLM_MAX_CONTEXT_TOKENS", "2048"))
+    LLM_MAX_PREDICT_TOKENS: int = int(os.environ.get("LLM_MAX_PREDICT_TOKENS", "768"))
+
+    # Text refinement result cache
+    TEXT_REFINEMENT_CACHE_SIZE: int = int(os.environ.get("TEXT_REFINEMENT_CACHE_SIZE", "1000"))
+    TEXT_REFINEMENT_CACHE_TTL: int = int(os.environ.get("TEXT_REFINEMENT_CACHE_TTL", "86400"))
+
+    # Image processing settings (thumbnails, previews)
+    IMAGE_WORKERS: int = int(os.environ.get("IMAGE_WORKERS", "2"))
+    IMAGE_QUEUE_LIMIT: int = int(os.environ.get("IMAGE_QUEUE_LIMIT", "16"))
+
+    # Knowledge base rebuild (full recount of all submissions)
+    KNOWLEDGE_REBUILD_WORKERS: int = int(os.environ.get("KNOWLEDGE_REBUILD_WORKERS", str(os.cpu_count() or 2)))
+    KNOWLEDGE_REBUILD_CHUNK: int = int(os.environ.get("KNOWLEDGE_REBUILD_CHUNK", "1000"))
+
+    @property
+    def OLLAMA_BACKEND_URLS(self) -> List[str]:
+        urls = [url.strip() for url in self.OLLAMA_API_URLS.split(",") if url.strip()]
+        return urls or [self.OLLAMA_API_URL]
+
     # Database connection string - async
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
@@ -0,0 +1,210 @@
+"""
+Tolerant JSON object extraction for LLM output.
+A single-pass scanner that finds the first balanced JSON object containing a
+required key anywhere in free-form model output (prose, markdown fences, ...),
+can be fed token by token to stream one string field as it is written, and
+repairs output that was cut off mid-object (e.g. by a num_predict limit).
+"""
+import json
+import re
+from typing import Any, List, Optional
+
+ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+TRAILING_COMMA = re.compile(r",\s*([}\]])")
+DANGLING_KEY = re.compile(r',?\s*"(?:[^"\\]|\\.)*"\s*(?=[}\]]*$)')
+
+
+def _loads(text: str) -> Any:
+    """json.loads, retried once without trailing commas"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(TRAILING_COMMA.sub(r"\1", text))
+
+
+def _find_key(value: Any, key: str) -> Optional[dict]:
+    """First dict (depth-first) that has key"""
+    if isinstance(value, dict):
+        if key in value:
+            return value
+        children = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return None
+    for child in children:
+        found = _find_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+class JSONObjectExtractor:
+    """
+    Incremental extractor for the first JSON object containing required_key.
+
+    feed() returns newly decoded characters of stream_key's string value (if the
+    candidate object is writing it), so callers can forward text as it arrives.
+    finish() returns the parsed object, repairing a truncated one if needed.
+    """
+
+    def __init__(self, required_key: str = "refined_text", stream_key: Optional[str] = "refined_text"):
+        self.required_key = required_key
+        self.stream_key = stream_key
+
+        self._buffer = ""
+        self._pos = 0
+        self._start: Optional[int] = None  # Index of the current candidate's opening brace
+        self._stack: List[str] = []
+        self._expect_key: List[bool] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._streaming = False
+
+        self.result: Optional[dict] = None
+        self.repaired = False
+        self.streamed_text = ""
+        self.stream_complete = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _reset_candidate(self) -> None:
+        self._start = None
+        self._stack = []
+        self._expect_key = []
+        self._last_key = None
+        self._streaming = False
+        if not self.stream_complete:
+            self.streamed_text = ""
+
+    def feed(self, chunk: str) -> str:
+        """Consume more output; returns newly decoded text of the streamed field"""
+        if self.done:
+            return ""
+        self._buffer += chunk
+        buf = self._buffer
+        out = []
+
+        while self._pos < len(buf) and not self.done:
+            ch = buf[self._pos]
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = self._pos
+                    self._stack = ["{"]
+                    self._expect_key = [True]
+                self._pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    if ch == "u":
+                        if self._pos + 5 > len(buf):
+                            break  # Wait for the rest of the \uXXXX sequence
+                        if self._streaming:
+                            try:
+                                out.append(chr(int(buf[self._pos + 1:self._pos + 5], 16)))
+                            except ValueError:
+                                pass
+                        self._pos += 5
+                    else:
+                        if self._streaming:
+                            out.append(ESCAPES.get(ch, ch))
+                        self._pos += 1
+                    self._escape = False
+                    continue
+                if ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string()
+                elif self._streaming:
+                    out.append(ch)
+                self._pos += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+                depth_one = len(self._stack) == 1
+                if (
+                    depth_one and not self._expect_key[-1] and not self.stream_complete
+                    and self.stream_key is not None and self._last_key == self.stream_key
+                ):
+                    self._streaming = True
+            elif ch in "{[":
+                self._stack.append(ch)
+                self._expect_key.append(ch == "{")
+            elif ch in "}]":
+                self._stack.pop()
+                self._expect_key.pop()
+                if not self._stack:
+                    self._close_candidate(self._pos)
+            elif ch == ":":
+                self._expect_key[-1] = False
+            elif ch == ",":
+                self._expect_key[-1] = self._stack[-1] == "{"
+            self._pos += 1
+
+        delta = "".join(out)
+        self.streamed_text += delta
+        return delta
+
+    def _end_string(self) -> None:
+        if self._streaming:
+            self._streaming = False
+            self.stream_complete = True
+        elif len(self._stack) == 1 and self._expect_key[-1]:
+            raw = self._buffer[self._string_start:self._pos + 1]
+            try:
+                self._last_key = json.loads(raw)
+            except json.JSONDecodeError:
+                self._last_key = None
+
+    def _close_candidate(self, end: int) -> None:
+        text = self._buffer[self._start:end + 1]
+        try:
+            found = _find_key(_loads(text), self.required_key)
+        except json.JSONDecodeError:
+            found = None
+        if found is not None:
+            self.result = found
+        else:
+            self._reset_candidate()
+
+    def finish(self) -> Optional[dict]:
+        """Parsed object, repairing a candidate that was cut off before it closed"""
+        if self.done or self._start is None:
+            return self.result
+
+        fragment = self._buffer[self._start:]
+        if self._in_string:
+            if self._escape:
+                fragment = fragment[:-1]
+            fragment += '"'
+        fragment = fragment.rstrip().rstrip(",")
+        if fragment.endswith(":"):
+            fragment += " null"
+        closers = "".join("}" if opener == "{" else "]" for opener in reversed(self._stack))
+
+        for attempt in (fragment + closers, DANGLING_KEY.sub("", fragment) + closers):
+            try:
+                found = _find_key(_loads(attempt), self.required_key)
+            except json.JSONDecodeError:
+                continue
+            if found is not None:
+                self.result = found
+                self.repaired = True
+                break
+        return self.result
+
+
+def extract_json_object(text: str, required_key: str = "refined_text") -> Optional[dict]:
+    """One-shot helper: first (possibly repaired) JSON object in text containing required_key"""
+    extractor = JSONObjectExtractor(required_key=required_key, stream_key=None)
+    extractor.feed(text)
+    return extractor.finish()
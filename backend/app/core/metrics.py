@@ -0,0 +1,67 @@
+"""
+Lightweight in-process metrics for DoR-Dash.
+Rolling latency windows with percentile summaries - no external metrics stack required.
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 for empty input)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99 of a set of samples"""
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        "count": count,
+        "mean": round(sum(ordered) / count, 4) if count else 0.0,
+        "p50": round(percentile(ordered, 50), 4),
+        "p95": round(percentile(ordered, 95), 4),
+        "p99": round(percentile(ordered, 99), 4),
+        "max": round(ordered[-1], 4) if count else 0.0,
+    }
+
+
+class LatencyRecorder:
+    """Keeps the most recent samples (seconds) plus lifetime totals"""
+
+    def __init__(self, window: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.total_count = 0
+        self.total_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.total_count += 1
+        self.total_seconds += seconds
+
+    def time(self) -> "_Timer":
+        """Context manager that records the elapsed time of its block"""
+        return _Timer(self)
+
+    def summary(self) -> Dict[str, float]:
+        stats = summarize(self._samples)
+        stats["total_count"] = self.total_count
+        return stats
+
+
+class _Timer:
+    def __init__(self, recorder: LatencyRecorder):
+        self._recorder = recorder
+        self._start: Optional[float] = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._recorder.record(time.perf_counter() - self._start)
+        return False
@@ -0,0 +1,198 @@
+"""
+Prompt token budgeting for DoR-Dash.
+Estimates token counts without loading the model tokenizer, trims optional
+prompt context by priority so the prompt fits the context window, and sizes
+num_predict per request. num_ctx stays fixed: it is a runner option, so every
+new value makes Ollama reload the model.
+"""
+import math
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import summarize
+
+# Ollama generation options for text refinement (Gemma 3 4B, CPU-only, conservative formatting)
+# num_ctx (fixed) and num_predict (from the input length) are added by PromptBudget
+REFINEMENT_OPTIONS = {
+    "temperature": 0.2,      # Slightly higher for more natural minimal fixes
+    "top_p": 0.7,
+    "top_k": 15,
+    "repeat_penalty": 1.1,
+    "num_thread": 4,         # Optimize CPU thread usage
+    "num_gpu": 0            # Force CPU-only processing
+}
+
+# Options that select the Ollama runner. Every call to the refinement model - requests,
+# warm-up, health checks and breaker probes - sends these, so they all share one loaded
+# runner instead of making Ollama reload or evict it
+RUNNER_OPTIONS = {**REFINEMENT_OPTIONS, "num_ctx": settings.LLM_MAX_CONTEXT_TOKENS}
+
+# Words, digit runs, single punctuation marks and newlines
+TOKEN_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate SentencePiece token count: about one token per four letters of a
+    word, one per digit and one per punctuation mark or newline. Errs slightly
+    high so budgets stay on the safe side.
+    """
+    count = 0
+    for match in TOKEN_RE.finditer(text):
+        piece = match.group(0)
+        if piece[0].isdigit():
+            count += len(piece)
+        elif piece[0].isalpha():
+            count += math.ceil(len(piece) / 4)
+        else:
+            count += 1
+    return count
+
+
+@dataclass
+class PromptPlan:
+    prompt: str
+    options: Dict[str, Any]
+    context: str = ""
+    accounting: Dict[str, Any] = field(default_factory=dict)
+
+
+class PromptBudget:
+    """
+    Assembles prompts within a context window.
+
+    The base prompt (template plus user text) is always kept. Optional context
+    lines are added in priority order while they fit; a line that does not fit
+    is cut back term by term before being dropped.
+    """
+
+    def __init__(
+        self,
+        max_ctx: int = 2048,
+        min_predict: int = 128,
+        max_predict: int = 768,
+        expansion: float = 1.3,
+        response_overhead: int = 64,
+        window: int = 1000
+    ):
+        self.max_ctx = max_ctx
+        self.min_predict = min_predict
+        self.max_predict = max_predict
+        self.expansion = expansion
+        self.response_overhead = response_overhead
+
+        # Metrics
+        self._lock = threading.Lock()
+        self._prompt_tokens: Deque[int] = deque(maxlen=window)
+        self._num_predict: Deque[int] = deque(maxlen=window)
+        self.plans = 0
+        self.context_trimmed = 0
+        self.overflows = 0
+
+    def size_predict(self, text_tokens: int) -> int:
+        """Room for the refined text (which may grow a little) plus the JSON wrapper and suggestions"""
+        wanted = math.ceil(text_tokens * self.expansion) + self.response_overhead
+        return max(self.min_predict, min(self.max_predict, wanted))
+
+    def runner_options(self, base_options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Options that decide which Ollama runner serves a call; keep them identical across calls"""
+        options = dict(base_options or {})
+        options["num_ctx"] = self.max_ctx
+        return options
+
+    def _fit_line(self, line: str, budget: int) -> Optional[str]:
+        """The line, or its longest "Label: a, b, ..." prefix that fits budget tokens"""
+        if estimate_tokens(line) <= budget:
+            return line
+        label, sep, terms = line.partition(": ")
+        if not sep:
+            return None
+        items = terms.split(", ")
+        while len(items) > 1:
+            items.pop()
+            candidate = f"{label}: {', '.join(items)}"
+            if estimate_tokens(candidate) <= budget:
+                return candidate
+        return None
+
+    def build(
+        self,
+        base_prompt: str,
+        text: str,
+        context_lines: Optional[List[str]] = None,
+        context_prefix: str = "\n\n",
+        context_suffix: str = "",
+        base_options: Optional[Dict[str, Any]] = None
+    ) -> PromptPlan:
+        """
+        Fit base_prompt plus as much of context_lines (highest priority first) as
+        the window allows. Returns the prompt, sized options and token accounting.
+        """
+        context_lines = [line for line in (context_lines or []) if line.strip()]
+        text_tokens = estimate_tokens(text)
+        base_tokens = estimate_tokens(base_prompt)
+        num_predict = self.size_predict(text_tokens)
+
+        available = self.max_ctx - num_predict - base_tokens
+        if context_lines:
+            available -= estimate_tokens(context_prefix + context_suffix)
+
+        kept: List[str] = []
+        trimmed = 0
+        for line in context_lines:
+            fitted = self._fit_line(line, available) if available > 0 else None
+            if fitted is None:
+                trimmed += 1
+                continue
+            if fitted != line:
+                trimmed += 1
+            kept.append(fitted)
+            available -= estimate_tokens(fitted) + 1  # Joining newline
+
+        context = ""
+        if kept:
+            context = context_prefix + "\n".join(kept) + context_suffix
+        prompt = base_prompt + context
+        prompt_tokens = estimate_tokens(prompt)
+
+        overflow = prompt_tokens + num_predict > self.max_ctx
+        if overflow:
+            # Give up answer room before letting Ollama cut the front of the prompt
+            num_predict = max(self.min_predict, self.max_ctx - prompt_tokens)
+        options = self.runner_options(base_options)
+        options["num_predict"] = num_predict
+
+        accounting = {
+            "text_tokens": text_tokens,
+            "prompt_tokens": prompt_tokens,
+            "context_tokens": prompt_tokens - base_tokens,
+            "context_lines": len(kept),
+            "context_lines_trimmed": trimmed,
+            "num_ctx": self.max_ctx,
+            "num_predict": num_predict,
+            "overflow": overflow,
+        }
+
+        with self._lock:
+            self.plans += 1
+            self.context_trimmed += 1 if trimmed else 0
+            self.overflows += 1 if overflow else 0
+            self._prompt_tokens.append(prompt_tokens)
+            self._num_predict.append(num_predict)
+
+        return PromptPlan(prompt=prompt, options=options, context=context, accounting=accounting)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "num_ctx": self.max_ctx,
+                "plans": self.plans,
+                "context_trimmed": self.context_trimmed,
+                "overflows": self.overflows,
+                "prompt_tokens": summarize(self._prompt_tokens),
+                "num_predict": summarize(self._num_predict),
+            }
@@ -0,0 +1,186 @@
+"""
+SQLite connection management for DoR-Dash.
+One database file gets a single writer connection owned by a dedicated thread
+(writes are queued and each runs in its own transaction) and a small pool of
+read-only connections. WAL mode lets readers proceed while a write is in
+progress, and the async wrappers keep sqlite off the event loop.
+"""
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from app.core.metrics import LatencyRecorder
+
+T = TypeVar("T")
+
+# Applied to every connection. NORMAL is durable across application crashes in
+# WAL mode (only an OS crash can lose the last commits)
+CONNECTION_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",        # KiB (16 MB page cache per connection)
+    "mmap_size": str(64 * 1024 * 1024),
+    "busy_timeout": "5000",        # ms - other processes (scripts) may hold the write lock
+}
+
+_STOP = object()
+
+
+class SQLiteConnectionManager:
+    """WAL-mode SQLite access with one writer thread and pooled readers"""
+
+    def __init__(self, db_path: str, readers: int = 4, pragmas: Optional[Dict[str, str]] = None):
+        self.db_path = db_path
+        self.max_readers = max(1, readers)
+        self.pragmas = {**CONNECTION_PRAGMAS, **(pragmas or {})}
+        self._lock = threading.Lock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._writes: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+        # Metrics
+        self.read_time = LatencyRecorder(window=1000)
+        self.write_time = LatencyRecorder(window=1000)
+        self.write_wait = LatencyRecorder(window=1000)
+        self.write_errors = 0
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    # Writes
+
+    def _ensure_writer(self) -> None:
+        """Start the writer thread lazily so importing a service never opens the database"""
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._writer = threading.Thread(
+                target=self._write_loop, args=(conn,), name=f"sqlite-writer:{os.path.basename(self.db_path)}",
+                daemon=True
+            )
+            self._writer.start()
+
+    def _write_loop(self, conn: sqlite3.Connection) -> None:
+        while True:
+            job = self._writes.get()
+            if job is _STOP:
+                break
+            fn, future, queued_at = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.write_wait.record(time.perf_counter() - queued_at)
+            start = time.perf_counter()
+            try:
+                with conn:
+                    result = fn(conn)
+            except Exception as e:
+                self.write_errors += 1
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self.write_time.record(time.perf_counter() - start)
+        conn.close()
+
+    def submit_write(self, fn: Callable[[sqlite3.Connection], T]) -> "Future[T]":
+        """Queue fn(conn) to run in one transaction on the writer thread"""
+        self._ensure_writer()
+        future: Future = Future()
+        self._writes.put((fn, future, time.perf_counter()))
+        return future
+
+    def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn(conn) in a write transaction and wait for the result"""
+        if threading.current_thread() is self._writer:
+            raise RuntimeError("write() called from inside a write transaction")
+        return self.submit_write(fn).result()
+
+    async def awrite(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Async write: the event loop is not blocked while the transaction runs"""
+        return await asyncio.wrap_future(self.submit_write(fn))
+
+    # Reads
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection from the pool"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._open_reader() or self._readers.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def _open_reader(self) -> Optional[sqlite3.Connection]:
+        """A new pooled connection, or None when the pool is at its limit"""
+        if not os.path.exists(self.db_path):
+            # Readers can't create the database (or switch it to WAL) - let the writer do it
+            self.write(lambda conn: None)
+        with self._lock:
+            if len(self._all_readers) >= self.max_readers:
+                return None
+            conn = self._connect(read_only=True)
+            self._all_readers.append(conn)
+            return conn
+
+    def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn(conn) on a pooled read-only connection"""
+        start = time.perf_counter()
+        try:
+            with self.reader() as conn:
+                return fn(conn)
+        finally:
+            self.read_time.record(time.perf_counter() - start)
+
+    async def aread(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Async read in a worker thread"""
+        return await asyncio.to_thread(self.read, fn)
+
+    # Lifecycle
+
+    def close(self) -> None:
+        """Stop the writer (after queued writes finish) and close pooled readers"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            readers, self._all_readers = self._all_readers, []
+        if writer is not None:
+            self._writes.put(_STOP)
+            writer.join()
+        while True:
+            try:
+                self._readers.get_nowait()
+            except queue.Empty:
+                break
+        for conn in readers:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "db_path": self.db_path,
+            "readers": len(self._all_readers),
+            "max_readers": self.max_readers,
+            "idle_readers": self._readers.qsize(),
+            "queued_writes": self._writes.qsize(),
+            "write_errors": self.write_errors,
+            "read_seconds": self.read_time.summary(),
+            "write_seconds": self.write_time.summary(),
+            "write_wait_seconds": self.write_wait.summary()
+        }
@@ -0,0 +1,164 @@
+"""
+Single-pass terminology matching for DoR-Dash.
+An Aho-Corasick automaton finds every literal vocabulary term in one scan of
+the text, and one combined compiled regex handles the structural patterns
+(abbreviations, capitalized phrases). Matches carry their category and offsets.
+"""
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+
+# Case folding that keeps offsets stable (str.lower can change string length)
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+@dataclass(frozen=True)
+class TermMatch:
+    term: str
+    category: str
+    start: int
+    end: int
+
+
+class AhoCorasick:
+    """Multi-pattern literal matcher: all occurrences of all keywords in one pass"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, object]]] = [[]]  # (keyword length, value)
+        self._delta: List[Dict[str, int]] = []
+        self._built = False
+
+    def add(self, keyword: str, value: object) -> None:
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(keyword), value))
+        self._built = False
+
+    def build(self) -> None:
+        """
+        Compute failure links (breadth-first), merge outputs along them and fold
+        the links into a full transition table, so scanning is one dict lookup
+        per character
+        """
+        queue = deque()
+        order = []
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+        # Breadth-first order guarantees a state's fail target is complete before it
+        self._delta = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        for state in order:
+            transitions = dict(self._delta[self._fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+        self._built = True
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, value) for every keyword occurrence, overlapping included"""
+        if not self._built:
+            self.build()
+        delta, output = self._delta, self._output
+        state = 0
+        for index, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if output[state]:
+                for length, value in output[state]:
+                    yield index + 1 - length, index + 1, value
+
+
+class TermMatcher:
+    """
+    Category-tagged term extraction.
+
+    vocabulary maps category -> literal terms (matched case-insensitively on
+    word boundaries). structural is a list of (regex, classify) rules combined
+    into one alternation; classify maps the matched text to the (category, term)
+    pairs it should be recorded as - none to skip it.
+
+    Within a category, overlapping matches are resolved leftmost-longest, so
+    "RT-PCR" is one match rather than also counting "PCR".
+    """
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, Iterable[str]],
+        structural: Optional[List[Tuple[str, Callable[[str], Iterable[Tuple[str, str]]]]]] = None
+    ):
+        self._automaton = AhoCorasick()
+        for category, terms in vocabulary.items():
+            for term in terms:
+                self._automaton.add(term.translate(ASCII_LOWER), category)
+        self._automaton.build()
+
+        self._rules = list(structural or [])
+        self._structural: Optional[Pattern] = None
+        if self._rules:
+            self._structural = re.compile("|".join(
+                f"(?P<r{index}>{pattern})" for index, (pattern, _) in enumerate(self._rules)
+            ))
+
+    def find(self, text: str) -> List[TermMatch]:
+        """All matches in text, ordered by offset"""
+        candidates: Dict[str, List[TermMatch]] = defaultdict(list)
+
+        folded = text.translate(ASCII_LOWER)
+        length = len(text)
+        for start, end, category in self._automaton.iter(folded):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < length and _is_word_char(text[end]):
+                continue
+            candidates[category].append(TermMatch(folded[start:end], category, start, end))
+
+        if self._structural is not None:
+            for match in self._structural.finditer(text):
+                _, classify = self._rules[int(match.lastgroup[1:])]
+                for category, term in classify(match.group()):
+                    candidates[category].append(TermMatch(term, category, match.start(), match.end()))
+
+        matches: List[TermMatch] = []
+        for category_matches in candidates.values():
+            category_matches.sort(key=lambda m: (m.start, -m.end))
+            last_end = -1
+            for match in category_matches:
+                if match.start >= last_end:
+                    matches.append(match)
+                    last_end = match.end
+        matches.sort(key=lambda m: (m.start, m.category))
+        return matches
+
+    def extract(self, text: str) -> Dict[str, List[str]]:
+        """category -> matched terms in text order (duplicates kept, as counts matter)"""
+        found: Dict[str, List[str]] = defaultdict(list)
+        for match in self.find(text):
+            found[match.category].append(match.term)
+        return dict(found)
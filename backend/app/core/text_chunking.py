@@ -0,0 +1,79 @@
+"""
+Text chunking for DoR-Dash.
+Splits long text at paragraph, then sentence, then word boundaries into pieces
+that fit a model context, keeping the original separators so the processed
+pieces can be stitched back together in order.
+"""
+import re
+from typing import List, Tuple
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+WORD_BREAK = re.compile(r"\s+")
+
+
+def _split_keep(text: str, pattern: re.Pattern) -> List[Tuple[str, str]]:
+    """Split text into (piece, separator_after) pairs"""
+    pieces = []
+    pos = 0
+    for match in pattern.finditer(text):
+        pieces.append((text[pos:match.start()], match.group(0)))
+        pos = match.end()
+    pieces.append((text[pos:], ""))
+    return pieces
+
+
+def _split_oversized(piece: str, max_chars: int) -> List[Tuple[str, str]]:
+    """Break a piece longer than max_chars into sentences, then words, then characters"""
+    if len(piece) <= max_chars:
+        return [(piece, "")]
+
+    for pattern in (SENTENCE_BREAK, WORD_BREAK):
+        parts = _split_keep(piece, pattern)
+        if len(parts) > 1:
+            result = []
+            for part, sep in parts:
+                sub = _split_oversized(part, max_chars)
+                sub[-1] = (sub[-1][0], sub[-1][1] + sep)
+                result.extend(sub)
+            return result
+
+    # A single unbroken run of characters
+    return [(piece[i:i + max_chars], "") for i in range(0, len(piece), max_chars)]
+
+
+def split_into_chunks(text: str, max_chars: int) -> Tuple[List[str], List[str]]:
+    """
+    Split text into chunks of at most max_chars.
+
+    Returns (chunks, separators) where separators[i] is the original text that
+    followed chunks[i], so join_chunks(chunks, separators) == text.
+    """
+    units: List[Tuple[str, str]] = []
+    for paragraph, sep in _split_keep(text, PARAGRAPH_BREAK):
+        sub = _split_oversized(paragraph, max_chars)
+        sub[-1] = (sub[-1][0], sub[-1][1] + sep)
+        units.extend(sub)
+
+    # Greedily pack neighbouring units into chunks
+    chunks: List[str] = []
+    separators: List[str] = []
+    current, current_sep = "", ""
+    for unit, sep in units:
+        if current and len(current) + len(current_sep) + len(unit) > max_chars:
+            chunks.append(current)
+            separators.append(current_sep)
+            current, current_sep = unit, sep
+        elif current:
+            current = current + current_sep + unit
+            current_sep = sep
+        else:
+            current, current_sep = unit, sep
+    chunks.append(current)
+    separators.append(current_sep)
+    return chunks, separators
+
+
+def join_chunks(chunks: List[str], separators: List[str]) -> str:
+    """Reassemble chunks with their original separators"""
+    return "".join(chunk + sep for chunk, sep in zip(chunks, separators))
@@ -0,0 +1,95 @@
+"""
+Streaming ZIP archive builder for DoR-Dash.
+Writes archives incrementally so large bundles never sit in memory or on disk.
+"""
+import io
+import os
+import zipfile
+from typing import Iterable, Iterator, Set, Tuple
+
+# Read/yield granularity - bounds memory per archive to roughly this size
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that zipfile writes into and the generator drains."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # zipfile needs absolute offsets for the central directory
+        return self._offset
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def safe_arcname_part(name: str, fallback: str = "unnamed") -> str:
+    """Strip path separators and control characters from a single archive path component"""
+    cleaned = "".join(c for c in name if c.isprintable() and c not in '/\\:*?"<>|').strip(" .")
+    return cleaned or fallback
+
+
+def _unique_arcname(arcname: str, used: Set[str]) -> str:
+    """Append ' (n)' before the extension until the name is unused in the archive"""
+    if arcname not in used:
+        used.add(arcname)
+        return arcname
+    root, ext = os.path.splitext(arcname)
+    counter = 2
+    while f"{root} ({counter}){ext}" in used:
+        counter += 1
+    unique = f"{root} ({counter}){ext}"
+    used.add(unique)
+    return unique
+
+
+def stream_zip(entries: Iterable[Tuple[str, str]], chunk_size: int = ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of (arcname, filesystem path) entries chunk by chunk.
+
+    Files are stored without recompression (attachments are mostly PDFs,
+    slides and images that are already compressed), so the cost is pure I/O.
+    Duplicate archive names get a numeric suffix.
+    """
+    sink = _ChunkSink()
+    used_names: Set[str] = set()
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, path in entries:
+            info = zipfile.ZipInfo.from_file(path, _unique_arcname(arcname, used_names))
+            info.compress_type = zipfile.ZIP_STORED
+            force_zip64 = info.file_size > zipfile.ZIP64_LIMIT
+
+            with open(path, "rb") as source, archive.open(info, mode="w", force_zip64=force_zip64) as target:
+                while True:
+                    block = source.read(chunk_size)
+                    if not block:
+                        break
+                    target.write(block)
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            # Flush the data descriptor written when the entry closes
+            data = sink.drain()
+            if data:
+                yield data
+
+    # Central directory is written on close
+    data = sink.drain()
+    if data:
+        yield data
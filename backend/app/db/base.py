@@ -6,3 +6,4 @@ from app.db.models.meeting import Meeting  # noqa
 from app.db.models.agenda_item import AgendaItem  # noqa
 from app.db.models.file_upload import FileUpload  # noqa
 from app.db.models.registration_request import RegistrationRequest  # noqa
+from app.db.models.avatar_variant import AvatarVariant  # noqa
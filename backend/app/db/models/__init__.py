@@ -8,4 +8,5 @@ from .student_update import StudentUpdate
 from .faculty_update import FacultyUpdate, AnnouncementType
 from .presentation import AssignedPresentation
 from .presentation_assignment import PresentationAssignment, PresentationType
-from .presentation_assignment_file import PresentationAssignmentFile
\ No newline at end of file
+from .presentation_assignment_file import PresentationAssignmentFile
+from .avatar_variant import AvatarVariant
\ No newline at end of file
@@ -0,0 +1,28 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, ForeignKey, LargeBinary, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base_class import Base
+
+
+class AvatarVariant(Base):
+    """
+    Pre-rendered avatar image (one row per size/format).
+    Addressed by content hash so URLs are immutable and cacheable forever.
+    """
+    __table_args__ = (
+        UniqueConstraint("user_id", "content_hash", "variant", name="uq_avatarvariant_user_hash_variant"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    content_hash: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    variant: Mapped[str] = mapped_column(String(20), nullable=False)  # e.g. '200.jpg', '48.webp'
+    content_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
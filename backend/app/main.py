@@ -103,15 +103,29 @@ async def root():
     return RedirectResponse(url="/docs")
 
 
+def llm_health() -> str:
+    """
+    Public summary of the Ollama backends (no network calls). Per-backend
+    endpoints and circuit breaker detail are on the authenticated /text/metrics.
+    """
+    from app.services.ollama_client import ollama_client
+    from app.core.circuit_breaker import CLOSED
+    if ollama_client.is_unavailable():
+        return "unavailable"
+    if any(backend.breaker.state != CLOSED for backend in ollama_client.backends):
+        return "degraded"
+    return "available"
+
+
 @app.get("/health", tags=["health"])
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "message": "DoR-Dash API is running"}
+    return {"status": "healthy", "message": "DoR-Dash API is running", "llm": llm_health()}
 
 @app.get("/api/v1/health", tags=["health"])
 async def health_check_v1():
     """Health check endpoint under API v1 prefix"""
-    return {"status": "healthy", "message": "DoR-Dash API is running"}
+    return {"status": "healthy", "message": "DoR-Dash API is running", "llm": llm_health()}
 
 # Startup and shutdown events for background tasks
 @app.on_event("startup")
@@ -127,6 +141,20 @@ async def startup_event():
         logger.warning(f"Failed to start background tasks: {e}")
         # Don't let background task failures crash the main application
 
+    try:
+        from app.services.ollama_client import ollama_client
+        await ollama_client.start()
+        ollama_client.start_probing()
+    except Exception as e:
+        logger.warning(f"Failed to start Ollama client: {e}")
+
+    try:
+        # Preload the model in the background - startup doesn't wait for it
+        from app.services.model_warmup import model_warmup
+        model_warmup.start()
+    except Exception as e:
+        logger.warning(f"Failed to start model warm-up: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up background tasks when the application shuts down"""
@@ -138,4 +166,29 @@ async def shutdown_event():
         logger.warning(f"Could not import background tasks module: {e}")
     except Exception as e:
         logger.warning(f"Failed to stop background tasks: {e}")
-        # Don't let background task failures crash the shutdown
\ No newline at end of file
+        # Don't let background task failures crash the shutdown
+
+    try:
+        from app.services.image_processing import image_pool
+        image_pool.shutdown()
+    except Exception as e:
+        logger.warning(f"Failed to stop image processing pool: {e}")
+
+    try:
+        from app.services.model_warmup import model_warmup
+        model_warmup.stop()
+    except Exception as e:
+        logger.warning(f"Failed to stop model warm-up: {e}")
+
+    try:
+        from app.services.ollama_client import ollama_client
+        await ollama_client.stop()
+    except Exception as e:
+        logger.warning(f"Failed to stop Ollama client: {e}")
+
+    try:
+        from app.services.knowledge_base import knowledge_service
+        # Waits for queued knowledge base writes to commit
+        knowledge_service.db.close()
+    except Exception as e:
+        logger.warning(f"Failed to close knowledge base connections: {e}")
\ No newline at end of file
@@ -0,0 +1,80 @@
+"""
+Avatar service layer for DoR-Dash.
+Stores pre-rendered avatar variants and builds their content-hashed URLs.
+"""
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.models.avatar_variant import AvatarVariant
+from app.db.models.user import User
+
+# Default variant used for the user's avatar_url
+DEFAULT_AVATAR_VARIANT = "200.webp"
+
+class AvatarService:
+    """Service class for avatar variant storage and lookup."""
+
+    @staticmethod
+    def variant_url(content_hash: str, variant: str) -> str:
+        """Immutable URL for one avatar variant."""
+        return f"{settings.API_V1_STR}/users/avatars/{content_hash}/{variant}"
+
+    @staticmethod
+    def variant_urls(content_hash: str, variants: List[str]) -> Dict[str, str]:
+        """Immutable URLs for each variant name."""
+        return {name: AvatarService.variant_url(content_hash, name) for name in variants}
+
+    @staticmethod
+    def replace_variants(
+        db: Session,
+        user_id: int,
+        content_hash: str,
+        variants: Dict[str, Dict[str, object]]
+    ) -> str:
+        """
+        Replace a user's avatar variants and point avatar_url at the new hash.
+        Returns the new avatar_url.
+        """
+        db.query(AvatarVariant).filter(AvatarVariant.user_id == user_id).delete(synchronize_session=False)
+
+        for name, rendered in variants.items():
+            db.add(AvatarVariant(
+                user_id=user_id,
+                content_hash=content_hash,
+                variant=name,
+                content_type=rendered["content_type"],
+                data=rendered["data"]
+            ))
+
+        avatar_url = AvatarService.variant_url(content_hash, DEFAULT_AVATAR_VARIANT)
+        db.query(User).filter(User.id == user_id).update(
+            {
+                "avatar_url": avatar_url,
+                "avatar_data": variants["200.jpg"]["data"],
+                "avatar_content_type": variants["200.jpg"]["content_type"]
+            },
+            synchronize_session=False
+        )
+        db.commit()
+        return avatar_url
+
+    @staticmethod
+    def get_variant(db: Session, content_hash: str, variant: str) -> Optional[AvatarVariant]:
+        """Look up a single variant by content hash (identical hashes hold identical bytes)."""
+        return db.query(AvatarVariant).filter(
+            AvatarVariant.content_hash == content_hash,
+            AvatarVariant.variant == variant
+        ).first()
+
+    @staticmethod
+    def get_current_hash(db: Session, user_id: int) -> Optional[str]:
+        """Content hash of the user's current avatar, if variants exist."""
+        row = db.query(AvatarVariant.content_hash).filter(
+            AvatarVariant.user_id == user_id
+        ).first()
+        return row[0] if row else None
+
+    @staticmethod
+    def delete_variants(db: Session, user_id: int) -> None:
+        """Delete every stored variant for a user (caller commits)."""
+        db.query(AvatarVariant).filter(AvatarVariant.user_id == user_id).delete(synchronize_session=False)
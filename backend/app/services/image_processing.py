@@ -0,0 +1,285 @@
+"""
+Image Processing Service for DoR-Dash
+Runs CPU-heavy Pillow work (thumbnails, previews, avatars) in a bounded process pool
+so image decoding and resizing never block the event loop
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+
+# Named thumbnail variants: longest edge in pixels
+THUMBNAIL_SIZES = {
+    "thumb": 256,
+    "preview": 1024,
+}
+
+# Image types Pillow can rasterize (SVG is vector and served as-is)
+THUMBNAIL_MIME_TYPES = {
+    "image/jpeg", "image/jpg", "image/png", "image/gif",
+    "image/webp", "image/bmp", "image/tiff"
+}
+
+# Square avatar edge in pixels (matches the frontend cropper output)
+AVATAR_SIZE = 200
+
+# Avatar variants rendered at upload time: name -> (edge in pixels, Pillow format)
+AVATAR_VARIANTS = {
+    "200.jpg": (200, "JPEG"),
+    "200.webp": (200, "WEBP"),
+    "96.webp": (96, "WEBP"),
+    "48.webp": (48, "WEBP"),
+}
+
+VARIANT_CONTENT_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+
+class ImagePoolSaturatedError(Exception):
+    """Raised when the image pool queue is full and work should be retried later"""
+
+
+def is_thumbnailable(mime_type: Optional[str]) -> bool:
+    """Check whether an upload's MIME type supports thumbnail generation"""
+    return bool(mime_type) and mime_type.lower() in THUMBNAIL_MIME_TYPES
+
+
+def thumbnail_path(source_path: str, variant: str) -> str:
+    """Location of a cached thumbnail, stored next to the source blob"""
+    return f"{source_path}.{variant}.webp"
+
+
+def generate_thumbnail(source_path: str, dest_path: str, max_edge: int) -> Dict[str, Any]:
+    """
+    Render a WebP thumbnail of source_path into dest_path.
+    Runs inside a worker process - must stay a picklable module-level function.
+    """
+    with Image.open(source_path) as image:
+        # Let the JPEG decoder downscale while decoding - much cheaper than a full decode
+        image.draft("RGB", (max_edge, max_edge))
+        image.seek(0)  # First frame only for animated GIF/WebP
+
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+        # Write atomically so concurrent readers never see a partial file
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        image.save(tmp_path, "WEBP", quality=80, method=4)
+        os.replace(tmp_path, dest_path)
+
+        return {"path": dest_path, "width": image.width, "height": image.height}
+
+
+def _flatten_to_rgb(image, preserve_soft_edges: bool = False):
+    """Composite transparent images onto white and return an RGB/L image for JPEG output"""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+
+        if image.mode == 'RGBA' and preserve_soft_edges:
+            # Split channels for better soft edge preservation
+            r, g, b, a = image.split()
+            background.paste(Image.merge('RGB', (r, g, b)), (0, 0), a)
+        elif image.mode == 'LA':
+            # Grayscale with alpha
+            background.paste(image.convert('RGB'), (0, 0), image.split()[-1])
+        else:
+            background.paste(image, mask=image.split()[-1])
+        return background
+
+    if image.mode not in ('RGB', 'L'):
+        return image.convert('RGB')
+    return image
+
+
+def process_avatar(content: bytes, size: int = AVATAR_SIZE) -> Dict[str, Any]:
+    """
+    Validate, square-crop and encode an uploaded avatar.
+    Runs inside a worker process - must stay a picklable module-level function.
+    Images already cropped to size x size by the frontend cropper are only flattened.
+    """
+    # Verify it's actually an image (verify() invalidates the handle, so reopen after)
+    with Image.open(io.BytesIO(content)) as probe:
+        probe.verify()
+
+    image = Image.open(io.BytesIO(content))
+    source_w, source_h = image.size
+    is_already_cropped = (source_w == size and source_h == size)
+
+    if is_already_cropped:
+        # Cropped by the frontend with the user's positioning and soft edges
+        image = _flatten_to_rgb(image, preserve_soft_edges=True)
+    else:
+        # Smart cropping fallback: let JPEG decode at reduced scale, then scale the short edge to size
+        image.draft('RGB', (size, size))
+        img_w, img_h = image.size
+        image = _flatten_to_rgb(image)
+
+        if img_w < img_h:
+            new_w, new_h = size, int((size * img_h) / img_w)
+        else:
+            new_w, new_h = int((size * img_w) / img_h), size
+
+        image = image.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+        # Crop to size x size from center
+        left = (new_w - size) // 2
+        top = (new_h - size) // 2
+        image = image.crop((left, top, left + size, top + size))
+
+    # Render every variant once; they are served as immutable bytes afterwards
+    variants = {}
+    for name, (edge, fmt) in AVATAR_VARIANTS.items():
+        rendered = image if edge == image.size[0] else image.resize((edge, edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        if fmt == "JPEG":
+            rendered.save(buffer, fmt, quality=90, optimize=True)
+        else:
+            rendered.save(buffer, fmt, quality=85, method=4)
+        variants[name] = {"data": buffer.getvalue(), "content_type": VARIANT_CONTENT_TYPES[fmt]}
+
+    canonical = variants["200.jpg"]["data"]
+
+    return {
+        "data": canonical,
+        "content_type": "image/jpeg",
+        "content_hash": hashlib.sha256(canonical).hexdigest()[:16],
+        "variants": variants,
+        "width": image.size[0],
+        "height": image.size[1],
+        "source_size": f"{source_w}x{source_h}",
+        "processing": "preserved" if is_already_cropped else "cropped"
+    }
+
+
+class ImageProcessingPool:
+    """Bounded process pool for Pillow work with a capped number of queued jobs"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._background = set()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the executor lazily so importing this module never forks"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def saturated(self) -> bool:
+        return self._pending >= self.max_pending
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        """
+        Run fn(*args) in a worker process.
+        Raises ImagePoolSaturatedError instead of queueing past max_pending.
+        """
+        if self.saturated:
+            self.rejected += 1
+            raise ImagePoolSaturatedError(
+                f"Image processing queue is full ({self._pending}/{self.max_pending} jobs pending)"
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    async def ensure_thumbnail(self, source_path: str, variant: str) -> str:
+        """Return the cached thumbnail path, generating it in the pool if needed"""
+        dest_path = thumbnail_path(source_path, variant)
+        if os.path.exists(dest_path):
+            return dest_path
+        await self.submit(generate_thumbnail, source_path, dest_path, THUMBNAIL_SIZES[variant])
+        return dest_path
+
+    async def warm_thumbnails(self, source_path: str) -> None:
+        """Background job: pre-render every thumbnail variant for a new upload"""
+        for variant in THUMBNAIL_SIZES:
+            try:
+                await self.ensure_thumbnail(source_path, variant)
+            except ImagePoolSaturatedError:
+                # Generated lazily on first request instead
+                logger.info(f"Image pool busy, deferring {variant} thumbnail for {source_path}")
+                return
+            except Exception as e:
+                logger.warning(f"Could not generate {variant} thumbnail for {source_path}: {e}")
+                return
+
+    def schedule_thumbnails(self, source_path: str) -> None:
+        """Fire-and-forget thumbnail warm-up, keeping a reference so the task isn't collected"""
+        task = asyncio.create_task(self.warm_thumbnails(source_path))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def remove_thumbnails(source_path: str) -> None:
+    """Delete every cached thumbnail variant for a source blob"""
+    for variant in THUMBNAIL_SIZES:
+        try:
+            os.remove(thumbnail_path(source_path, variant))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete {variant} thumbnail for {source_path}: {e}")
+
+
+# Global instance
+image_pool = ImageProcessingPool(
+    max_workers=settings.IMAGE_WORKERS,
+    max_pending=settings.IMAGE_QUEUE_LIMIT
+)
+
+def get_image_pool() -> ImageProcessingPool:
+    """Get the global image processing pool instance"""
+    return image_pool
@@ -12,44 +12,72 @@ from collections import Counter, defaultdict
 from dataclasses import dataclass, asdict
 import sqlite3
 import os
+import threading
 from pathlib import Path
+from app.core.cache import MemoryTTLCache
 from app.core.logging import logger
+from app.core.sqlite_pool import SQLiteConnectionManager
+from app.core.term_matcher import TermMatch, TermMatcher
 
-# Scientific/Medical terminology patterns
-DOMAIN_PATTERNS = {
+# Scientific/Medical terminology - literal terms per category, matched
+# case-insensitively on word boundaries in one pass (see app.core.term_matcher)
+DOMAIN_VOCABULARY = {
     'medical_terms': [
-        r'\b(?:carcinoma|sarcoma|melanoma|lymphoma|leukemia)\b',
-        r'\b(?:chemotherapy|radiotherapy|immunotherapy|targeted therapy)\b',
-        r'\b(?:metastasis|metastatic|invasion|angiogenesis)\b',
-        r'\b(?:oncology|oncologist|tumor|malignant|benign)\b',
-        r'\b(?:biopsy|histology|pathology|cytology)\b'
+        'carcinoma', 'sarcoma', 'melanoma', 'lymphoma', 'leukemia',
+        'chemotherapy', 'radiotherapy', 'immunotherapy', 'targeted therapy',
+        'metastasis', 'metastatic', 'invasion', 'angiogenesis',
+        'oncology', 'oncologist', 'tumor', 'malignant', 'benign',
+        'biopsy', 'histology', 'pathology', 'cytology'
     ],
     'research_methods': [
-        r'\b(?:Western blot|PCR|qPCR|RT-PCR|ELISA|immunofluorescence)\b',
-        r'\b(?:MTT assay|flow cytometry|microscopy|spectroscopy)\b',
-        r'\b(?:cell culture|transfection|knockout|overexpression)\b',
-        r'\b(?:statistical analysis|p-value|significance|correlation)\b',
-        r'\b(?:ANOVA|t-test|Mann-Whitney|Wilcoxon)\b'
+        'Western blot', 'PCR', 'qPCR', 'RT-PCR', 'ELISA', 'immunofluorescence',
+        'MTT assay', 'flow cytometry', 'microscopy', 'spectroscopy',
+        'cell culture', 'transfection', 'knockout', 'overexpression',
+        'statistical analysis', 'p-value', 'significance', 'correlation',
+        'ANOVA', 't-test', 'Mann-Whitney', 'Wilcoxon'
     ],
     'abbreviations': [
-        r'\b[A-Z]{2,6}\b',  # General abbreviations (2-6 caps)
-        r'\b(?:DNA|RNA|mRNA|siRNA|miRNA|lncRNA)\b',
-        r'\b(?:ATP|ADP|NADH|FADH2|ROS)\b',
-        r'\b(?:DMSO|PBS|EDTA|Tris|BSA)\b'
+        'DNA', 'RNA', 'mRNA', 'siRNA', 'miRNA', 'lncRNA',
+        'ATP', 'ADP', 'NADH', 'FADH2', 'ROS',
+        'DMSO', 'PBS', 'EDTA', 'Tris', 'BSA'
     ],
     'technical_terms': [
-        r'\b(?:dose-response|concentration|dilution|gradient)\b',
-        r'\b(?:proliferation|differentiation|apoptosis|necrosis)\b',
-        r'\b(?:signaling pathway|cascade|upstream|downstream)\b',
-        r'\b(?:biomarker|endpoint|outcome|efficacy)\b'
+        'dose-response', 'concentration', 'dilution', 'gradient',
+        'proliferation', 'differentiation', 'apoptosis', 'necrosis',
+        'signaling pathway', 'cascade', 'upstream', 'downstream',
+        'biomarker', 'endpoint', 'outcome', 'efficacy'
     ],
     'funding_terms': [
-        r'\b(?:NIH|NSF|DoD|CPRIT|R01|R21|R03)\b',
-        r'\b(?:grant|funding|budget|proposal|application)\b',
-        r'\b(?:preliminary data|pilot study|feasibility)\b'
+        'NIH', 'NSF', 'DoD', 'CPRIT', 'R01', 'R21', 'R03',
+        'grant', 'funding', 'budget', 'proposal', 'application',
+        'preliminary data', 'pilot study', 'feasibility'
     ]
 }
 
+# Abbreviations common enough not to report as new
+COMMON_ABBREVIATIONS = {'DNA', 'RNA', 'ATP', 'NIH', 'PCR'}
+SENTENCE_WORDS = {'the', 'this', 'that', 'they', 'then'}
+
+def _classify_caps(token: str) -> List[Tuple[str, str]]:
+    """All-caps token: a general abbreviation, and a new one if short and uncommon"""
+    found = [('abbreviations', token.lower())]
+    if len(token) <= 5 and token not in COMMON_ABBREVIATIONS:
+        found.append(('new_abbreviations', token))
+    return found
+
+def _classify_capitalized(phrase: str) -> List[Tuple[str, str]]:
+    """Capitalized phrase that might be a proper noun or technical term"""
+    if len(phrase) > 3 and phrase.lower() not in SENTENCE_WORDS:
+        return [('proper_nouns', phrase.lower())]
+    return []
+
+STRUCTURAL_PATTERNS = [
+    (r'\b[A-Z]{2,6}\b', _classify_caps),
+    (r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', _classify_capitalized),
+]
+
+term_matcher = TermMatcher(DOMAIN_VOCABULARY, STRUCTURAL_PATTERNS)
+
 # Common academic writing improvements
 WRITING_PATTERNS = {
     'weak_words': ['very', 'really', 'quite', 'pretty', 'somewhat'],
@@ -77,71 +105,211 @@ class KnowledgeSnapshot:
     updated_terms: int
     top_terms: List[Tuple[str, int]]
 
+# Context snippets kept per term (oldest are dropped) and their length
+CONTEXTS_PER_TERM = 10
+CONTEXT_SNIPPET_CHARS = 100
+
+# Stay well under SQLite's bound-parameter limit in IN (...) queries
+SQLITE_IN_CHUNK = 500
+
+# Incremental snapshots: the first run looks back this far, later runs start at
+# the watermark minus an overlap (updated_at is set at statement time, so rows
+# committed late can carry a timestamp just behind the watermark)
+SNAPSHOT_BOOTSTRAP_DAYS = 30
+SNAPSHOT_WATERMARK_OVERLAP = timedelta(minutes=5)
+SNAPSHOT_CHUNK = 500
+
+# Enhanced prompt context is rebuilt when the knowledge base version changes;
+# the TTL bounds staleness after writes from other processes (CLI rebuild,
+# other app workers), which don't bump this process's version
+PROMPT_CONTEXT_TTL = 300
+
+class TermBatch:
+    """
+    Term occurrences aggregated in memory, so a whole snapshot is written with
+    one upsert per distinct term instead of one round trip per occurrence
+    """
+    
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.removed: Counter = Counter()
+        self.categories: Dict[str, str] = {}
+        self.contexts: Dict[str, List[str]] = defaultdict(list)
+    
+    def add(self, terms: Dict[str, List[str]], context: str):
+        """Count one submission's terms; each distinct term gets its context once"""
+        snippet = context[:CONTEXT_SNIPPET_CHARS]
+        seen = set()
+        for category, term_list in terms.items():
+            for term in term_list:
+                self.counts[term] += 1
+                # The first category a term is seen under is the one stored
+                self.categories.setdefault(term, category)
+                if term not in seen:
+                    seen.add(term)
+                    contexts = self.contexts[term]
+                    contexts.append(snippet)
+                    if len(contexts) > CONTEXTS_PER_TERM:
+                        del contexts[0]
+    
+    def add_changed(self, terms: Dict[str, List[str]], context: str, previous: Dict[str, int]):
+        """
+        Count an edited submission against the term counts of the version
+        already counted: only extra occurrences are added, missing ones removed
+        """
+        current = Counter(term for term_list in terms.values() for term in term_list)
+        remaining = {term: count - previous.get(term, 0) for term, count in current.items()}
+        added = {}
+        for category, term_list in terms.items():
+            kept = []
+            for term in term_list:
+                if remaining[term] > 0:
+                    remaining[term] -= 1
+                    kept.append(term)
+            if kept:
+                added[category] = kept
+        self.add(added, context)
+        
+        for term, count in previous.items():
+            if count > current.get(term, 0):
+                self.removed[term] += count - current.get(term, 0)
+    
+    def merge(self, other: 'TermBatch'):
+        """Fold in a batch counted from later submissions"""
+        self.counts.update(other.counts)
+        self.removed.update(other.removed)
+        for term, category in other.categories.items():
+            self.categories.setdefault(term, category)
+        for term, snippets in other.contexts.items():
+            contexts = self.contexts[term]
+            contexts.extend(snippets)
+            del contexts[:-CONTEXTS_PER_TERM]
+    
+    def __len__(self) -> int:
+        return len(self.counts.keys() | self.removed.keys())
+
+def submission_text(item_type: str, content: Optional[dict]) -> Tuple[str, str]:
+    """(combined text, context snippet) for a student or faculty update"""
+    content = content or {}
+    if item_type == 'student_update':
+        # Combine student update text fields
+        progress_text = content.get("progress_text", "")
+        challenges_text = content.get("challenges_text", "")
+        next_steps_text = content.get("next_steps_text", "")
+        return f"{progress_text} {challenges_text} {next_steps_text}", f"Student update: {progress_text[:50]}..."
+    if item_type == 'faculty_update':
+        # Combine faculty update text fields
+        announcements_text = content.get("announcements_text", "")
+        projects_text = content.get("projects_text", "")
+        return f"{announcements_text} {projects_text}", f"Faculty update: {announcements_text[:50]}..."
+    return "", ""
+
 class KnowledgeBaseService:
-    def __init__(self, db_path: str = "/app/data/knowledge_base.db"):
+    def __init__(self, db_path: str = "/app/data/knowledge_base.db", readers: int = 4):
         self.db_path = db_path
+        self.db = SQLiteConnectionManager(db_path, readers=readers)
+        self.version = 0
+        self._version_lock = threading.Lock()
+        # Held from reading snapshot_items/the watermark until the counts are written, so
+        # overlapping snapshots (or a rebuild swap) can't apply the same deltas twice
+        self.snapshot_lock = threading.Lock()
+        self.prompt_context_cache = MemoryTTLCache(max_entries=64, ttl=PROMPT_CONTEXT_TTL)
         self.ensure_db_exists()
     
+    def bump_version(self):
+        """Mark cached vocabulary as stale after the terminology changed"""
+        with self._version_lock:
+            self.version += 1
+    
     def ensure_db_exists(self):
         """Create database tables if they don't exist"""
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS terminology (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    term TEXT UNIQUE NOT NULL,
-                    category TEXT NOT NULL,
-                    frequency INTEGER DEFAULT 1,
-                    contexts TEXT,  -- JSON array of context strings
-                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    confidence_score REAL DEFAULT 0.5,
-                    user_approved BOOLEAN DEFAULT FALSE
-                )
-            ''')
-            
-            conn.execute('''
-                CREATE TABLE IF NOT EXISTS snapshots (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    total_submissions INTEGER,
-                    new_terms_found INTEGER,
-                    updated_terms INTEGER,
-                    top_terms TEXT,  -- JSON array
-                    summary TEXT
-                )
-            ''')
-            
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_term ON terminology(term)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_category ON terminology(category)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_frequency ON terminology(frequency DESC)')
+        self.db.write(self._create_schema)
     
-    def extract_terminology(self, text: str) -> Dict[str, List[str]]:
-        """Extract domain-specific terminology from text"""
-        found_terms = defaultdict(list)
-        text_lower = text.lower()
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS terminology (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                term TEXT UNIQUE NOT NULL,
+                category TEXT NOT NULL,
+                frequency INTEGER DEFAULT 1,
+                contexts TEXT,  -- Legacy JSON array, migrated into term_contexts
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                confidence_score REAL DEFAULT 0.5,
+                user_approved BOOLEAN DEFAULT FALSE
+            )
+        ''')
         
-        # Extract terms by category
-        for category, patterns in DOMAIN_PATTERNS.items():
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    found_terms[category].append(match.lower())
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                total_submissions INTEGER,
+                new_terms_found INTEGER,
+                updated_terms INTEGER,
+                top_terms TEXT,  -- JSON array
+                summary TEXT
+            )
+        ''')
         
-        # Extract capitalized terms that might be proper nouns or technical terms
-        capitalized_terms = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-        for term in capitalized_terms:
-            if len(term) > 3 and term.lower() not in ['The', 'This', 'That', 'They', 'Then']:
-                found_terms['proper_nouns'].append(term.lower())
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_items (
+                item_id INTEGER PRIMARY KEY,  -- AgendaItem.id
+                updated_at TEXT NOT NULL,     -- AgendaItem.updated_at when counted
+                term_counts TEXT NOT NULL     -- JSON object term -> occurrences counted
+            )
+        ''')
         
-        # Extract potential new abbreviations
-        new_abbrevs = re.findall(r'\b[A-Z]{2,5}\b', text)
-        for abbrev in new_abbrevs:
-            if abbrev not in ['DNA', 'RNA', 'ATP', 'NIH', 'PCR']:  # Skip common ones
-                found_terms['new_abbreviations'].append(abbrev)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
         
-        return dict(found_terms)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS term_contexts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                term TEXT NOT NULL,
+                context TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_term ON terminology(term)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_category ON terminology(category)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_frequency ON terminology(frequency DESC)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_term_contexts_term ON term_contexts(term, id)')
+        
+        self._migrate_json_contexts(conn)
+    
+    def _migrate_json_contexts(self, conn: sqlite3.Connection):
+        """Move contexts from the old per-term JSON column into term_contexts"""
+        rows = conn.execute(
+            'SELECT term, contexts FROM terminology WHERE contexts IS NOT NULL'
+        ).fetchall()
+        if not rows:
+            return
+        
+        contexts = []
+        for term, contexts_json in rows:
+            try:
+                snippets = json.loads(contexts_json)
+            except ValueError:
+                continue
+            contexts.extend((term, snippet) for snippet in snippets[-CONTEXTS_PER_TERM:])
+        
+        conn.executemany('INSERT INTO term_contexts (term, context) VALUES (?, ?)', contexts)
+        conn.execute('UPDATE terminology SET contexts = NULL WHERE contexts IS NOT NULL')
+        logger.info(f"Migrated {len(contexts)} term contexts for {len(rows)} terms")
+    
+    def extract_terminology(self, text: str) -> Dict[str, List[str]]:
+        """Extract domain-specific terminology from text"""
+        return term_matcher.extract(text)
+    
+    def find_terms(self, text: str) -> List[TermMatch]:
+        """Category-tagged terminology matches with their offsets in text"""
+        return term_matcher.find(text)
     
     def analyze_writing_quality(self, text: str) -> Dict[str, List[str]]:
         """Analyze text for writing quality issues"""
@@ -167,118 +335,229 @@ class KnowledgeBaseService:
     
     def update_terminology_db(self, terms: Dict[str, List[str]], context: str):
         """Update the terminology database with new findings"""
-        with sqlite3.connect(self.db_path) as conn:
-            for category, term_list in terms.items():
-                for term in term_list:
-                    # Check if term exists
-                    existing = conn.execute(
-                        'SELECT id, frequency, contexts FROM terminology WHERE term = ?',
-                        (term,)
-                    ).fetchone()
-                    
-                    if existing:
-                        # Update existing term
-                        term_id, frequency, contexts_json = existing
-                        contexts = json.loads(contexts_json) if contexts_json else []
-                        contexts.append(context[:100])  # Keep context snippets short
-                        if len(contexts) > 10:  # Limit context history
-                            contexts = contexts[-10:]
-                        
-                        conn.execute('''
-                            UPDATE terminology 
-                            SET frequency = frequency + 1, 
-                                last_seen = CURRENT_TIMESTAMP,
-                                contexts = ?,
-                                confidence_score = MIN(1.0, confidence_score + 0.1)
-                            WHERE id = ?
-                        ''', (json.dumps(contexts), term_id))
-                    else:
-                        # Insert new term
-                        conn.execute('''
-                            INSERT INTO terminology 
-                            (term, category, contexts, confidence_score)
-                            VALUES (?, ?, ?, ?)
-                        ''', (term, category, json.dumps([context[:100]]), 0.3))
-    
-    async def snapshot_submissions(self) -> KnowledgeSnapshot:
-        """Analyze all recent submissions and update knowledge base"""
-        from app.db.session import SessionLocal
+        batch = TermBatch()
+        batch.add(terms, context)
+        self.db.write(lambda conn: self.apply_term_batch(conn, batch))
+        self.bump_version()
+    
+    def apply_term_batch(self, conn: sqlite3.Connection, batch: TermBatch) -> Tuple[int, int]:
+        """
+        Write aggregated term counts and contexts in the caller's transaction.
+        Returns (new terms, updated terms).
+        
+        A term seen n times scores as if it had been inserted once and updated
+        n - 1 times: new terms start at 0.3 and every occurrence adds 0.1.
+        """
+        if not batch:
+            return 0, 0
+        
+        terms = list(batch.counts.keys() | batch.removed.keys())
+        existing = set()
+        for i in range(0, len(terms), SQLITE_IN_CHUNK):
+            chunk = terms[i:i + SQLITE_IN_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(row[0] for row in conn.execute(
+                f'SELECT term FROM terminology WHERE term IN ({placeholders})', chunk
+            ))
+        
+        conn.executemany('''
+            INSERT INTO terminology (term, category, frequency, confidence_score)
+            VALUES (?, ?, ?, MIN(1.0, 0.3 + 0.1 * (? - 1)))
+            ON CONFLICT(term) DO UPDATE SET
+                frequency = frequency + excluded.frequency,
+                last_seen = CURRENT_TIMESTAMP,
+                confidence_score = MIN(1.0, confidence_score + 0.1 * excluded.frequency)
+        ''', [
+            (term, batch.categories[term], count, count)
+            for term, count in batch.counts.items()
+        ])
+        
+        if batch.removed:
+            conn.executemany(
+                'UPDATE terminology SET frequency = MAX(0, frequency - ?) WHERE term = ?',
+                [(count, term) for term, count in batch.removed.items()]
+            )
+        
+        self.store_term_contexts(conn, batch.contexts)
+        
+        return len(batch.counts.keys() - existing), len(batch.counts.keys() & existing)
+    
+    def store_term_contexts(self, conn: sqlite3.Connection, contexts: Dict[str, List[str]],
+                            table: str = 'term_contexts'):
+        """Append context snippets, keeping only the newest per term"""
+        conn.executemany(
+            f'INSERT INTO {table} (term, context) VALUES (?, ?)',
+            [(term, snippet) for term, snippets in contexts.items() for snippet in snippets]
+        )
+        conn.executemany(f'''
+            DELETE FROM {table}
+            WHERE term = ? AND id NOT IN (
+                SELECT id FROM {table} WHERE term = ? ORDER BY id DESC LIMIT ?
+            )
+        ''', [(term, term, CONTEXTS_PER_TERM) for term in contexts])
+    
+    def store_item_counts(self, conn: sqlite3.Connection, items: List[Tuple[int, str, str]],
+                          table: str = 'snapshot_items'):
+        """Record (item id, updated_at, term counts JSON) for counted agenda items"""
+        conn.executemany(f'''
+            INSERT INTO {table} (item_id, updated_at, term_counts) VALUES (?, ?, ?)
+            ON CONFLICT(item_id) DO UPDATE SET
+                updated_at = excluded.updated_at,
+                term_counts = excluded.term_counts
+        ''', items)
+    
+    def get_term_contexts(self, conn: sqlite3.Connection, terms: List[str]) -> Dict[str, List[str]]:
+        """Context snippets per term, oldest first"""
+        contexts: Dict[str, List[str]] = defaultdict(list)
+        for i in range(0, len(terms), SQLITE_IN_CHUNK):
+            chunk = terms[i:i + SQLITE_IN_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for term, context in conn.execute(
+                f'SELECT term, context FROM term_contexts WHERE term IN ({placeholders}) ORDER BY id',
+                chunk
+            ):
+                contexts[term].append(context)
+        return contexts
+    
+    def get_snapshot_state(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """Watermark of the last snapshot (last_updated_at, last_item_id)"""
+        return dict(conn.execute('SELECT key, value FROM snapshot_state').fetchall())
+    
+    def set_snapshot_state(self, conn: sqlite3.Connection, state: Dict[str, str]):
+        conn.executemany('''
+            INSERT INTO snapshot_state (key, value) VALUES (?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        ''', list(state.items()))
+    
+    def _count_snapshot_chunk(self, conn: sqlite3.Connection, rows: list, batch: TermBatch) -> List[Tuple[int, str, str]]:
+        """Add new and changed agenda items to batch; returns their (id, updated_at, term counts)"""
+        placeholders = ','.join('?' * len(rows))
+        previous = {
+            item_id: (updated_at, term_counts)
+            for item_id, updated_at, term_counts in conn.execute(
+                f'SELECT item_id, updated_at, term_counts FROM snapshot_items WHERE item_id IN ({placeholders})',
+                [row.id for row in rows]
+            )
+        }
+        
+        counted = []
+        for row in rows:
+            updated_at = row.updated_at.isoformat()
+            seen = previous.get(row.id)
+            if seen and seen[0] == updated_at:
+                continue  # Unchanged since it was counted (watermark overlap)
+            
+            combined_text, context_snippet = submission_text(row.item_type, row.content)
+            terms = self.extract_terminology(combined_text) if combined_text.strip() else {}
+            batch.add_changed(terms, context_snippet, json.loads(seen[1]) if seen else {})
+            term_counts = Counter(term for term_list in terms.values() for term in term_list)
+            counted.append((row.id, updated_at, json.dumps(term_counts)))
+        
+        return counted
+    
+    def _count_new_submissions(self, session_factory, snapshot_time: datetime):
+        """Stream and count items changed since the watermark (runs in a worker thread)"""
         from app.db.models.agenda_item import AgendaItem, AgendaItemType
         
-        snapshot_time = datetime.now()
-        new_terms = 0
-        updated_terms = 0
+        batch = TermBatch()
+        counted: List[Tuple[int, str, str]] = []
+        last_row = None
         
-        with SessionLocal() as db:
-            # Get recent submissions (last 30 days)
-            recent_date = snapshot_time - timedelta(days=30)
+        with self.db.reader() as conn, session_factory() as db:
+            state = self.get_snapshot_state(conn)
             
-            # Analyze agenda items (both student and faculty updates)
-            agenda_items = db.query(AgendaItem).filter(
-                AgendaItem.created_at >= recent_date,
+            query = db.query(
+                AgendaItem.id, AgendaItem.item_type, AgendaItem.content, AgendaItem.updated_at
+            ).filter(
                 AgendaItem.item_type.in_([AgendaItemType.STUDENT_UPDATE, AgendaItemType.FACULTY_UPDATE])
-            ).all()
+            )
+            if 'last_updated_at' in state:
+                since = datetime.fromisoformat(state['last_updated_at']) - SNAPSHOT_WATERMARK_OVERLAP
+                query = query.filter(AgendaItem.updated_at >= since)
+            else:
+                # First snapshot: recent submissions only
+                query = query.filter(AgendaItem.created_at >= snapshot_time - timedelta(days=SNAPSHOT_BOOTSTRAP_DAYS))
+            query = query.order_by(AgendaItem.updated_at, AgendaItem.id).yield_per(SNAPSHOT_CHUNK)
             
-            for item in agenda_items:
-                combined_text = ""
-                context_snippet = ""
-                
-                if item.item_type == AgendaItemType.STUDENT_UPDATE:
-                    # Combine student update text fields
-                    progress_text = item.content.get("progress_text", "") if item.content else ""
-                    challenges_text = item.content.get("challenges_text", "") if item.content else ""
-                    next_steps_text = item.content.get("next_steps_text", "") if item.content else ""
-                    combined_text = f"{progress_text} {challenges_text} {next_steps_text}"
-                    context_snippet = f"Student update: {progress_text[:50]}..."
-                elif item.item_type == AgendaItemType.FACULTY_UPDATE:
-                    # Combine faculty update text fields
-                    announcements_text = item.content.get("announcements_text", "") if item.content else ""
-                    projects_text = item.content.get("projects_text", "") if item.content else ""
-                    combined_text = f"{announcements_text} {projects_text}"
-                    context_snippet = f"Faculty update: {announcements_text[:50]}..."
-                
-                if combined_text.strip():
-                    terms = self.extract_terminology(combined_text)
-                    if terms:
-                        self.update_terminology_db(terms, context_snippet)
-                        new_terms += len([t for tlist in terms.values() for t in tlist])
-        
-        # Get top terms for summary
-        with sqlite3.connect(self.db_path) as conn:
-            top_terms = conn.execute('''
-                SELECT term, frequency FROM terminology 
-                WHERE confidence_score > 0.4
-                ORDER BY frequency DESC LIMIT 20
-            ''').fetchall()
-        
-        # Save snapshot
-        snapshot = KnowledgeSnapshot(
-            timestamp=snapshot_time,
-            total_submissions=len(agenda_items),
-            new_terms_found=new_terms,
-            updated_terms=updated_terms,
-            top_terms=top_terms
-        )
+            chunk = []
+            for row in query:
+                chunk.append(row)
+                last_row = row
+                if len(chunk) >= SNAPSHOT_CHUNK:
+                    counted.extend(self._count_snapshot_chunk(conn, chunk, batch))
+                    chunk = []
+            if chunk:
+                counted.extend(self._count_snapshot_chunk(conn, chunk, batch))
         
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT INTO snapshots 
-                (total_submissions, new_terms_found, updated_terms, top_terms)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                snapshot.total_submissions,
-                snapshot.new_terms_found, 
-                snapshot.updated_terms,
-                json.dumps(top_terms)
-            ))
+        watermark = None
+        if last_row is not None:
+            watermark = {
+                'last_updated_at': last_row.updated_at.isoformat(),
+                'last_item_id': str(last_row.id)
+            }
+        return batch, counted, watermark
+    
+    async def snapshot_submissions(self, session_factory=None) -> KnowledgeSnapshot:
+        """
+        Count terms in student and faculty updates added or edited since the
+        last snapshot. Edited items replace the counts of their previous version.
+        """
+        if session_factory is None:
+            from app.db.session import SessionLocal as session_factory
         
+        # Counting and writing run off the event loop; readers are not blocked meanwhile
+        snapshot = await asyncio.to_thread(self._snapshot, session_factory)
+        self.bump_version()
         return snapshot
     
+    def _snapshot(self, session_factory) -> KnowledgeSnapshot:
+        with self.snapshot_lock:
+            snapshot_time = datetime.now()
+            batch, counted, watermark = self._count_new_submissions(session_factory, snapshot_time)
+            
+            # One transaction for the term upserts, the watermark, the summary and the snapshot row
+            def write_snapshot(conn: sqlite3.Connection) -> KnowledgeSnapshot:
+                self.store_item_counts(conn, counted)
+                if watermark:
+                    self.set_snapshot_state(conn, watermark)
+                
+                new_terms, updated_terms = self.apply_term_batch(conn, batch)
+                
+                # Get top terms for summary
+                top_terms = conn.execute('''
+                    SELECT term, frequency FROM terminology 
+                    WHERE confidence_score > 0.4
+                    ORDER BY frequency DESC LIMIT 20
+                ''').fetchall()
+                
+                # Save snapshot
+                snapshot = KnowledgeSnapshot(
+                    timestamp=snapshot_time,
+                    total_submissions=len(counted),
+                    new_terms_found=new_terms,
+                    updated_terms=updated_terms,
+                    top_terms=top_terms
+                )
+                
+                conn.execute('''
+                    INSERT INTO snapshots 
+                    (total_submissions, new_terms_found, updated_terms, top_terms)
+                    VALUES (?, ?, ?, ?)
+                ''', (
+                    snapshot.total_submissions,
+                    snapshot.new_terms_found, 
+                    snapshot.updated_terms,
+                    json.dumps(top_terms)
+                ))
+                return snapshot
+            
+            return self.db.write(write_snapshot)
+    
     def get_domain_vocabulary(self, category: Optional[str] = None, min_confidence: float = 0.5) -> Dict[str, TerminologyEntry]:
         """Get domain vocabulary for AI prompt enhancement"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.db.reader() as conn:
             query = '''
-                SELECT term, category, frequency, contexts, first_seen, last_seen, confidence_score, user_approved
+                SELECT term, category, frequency, first_seen, last_seen, confidence_score, user_approved
                 FROM terminology 
                 WHERE confidence_score >= ?
             '''
@@ -291,17 +570,17 @@ class KnowledgeBaseService:
             query += ' ORDER BY frequency DESC LIMIT 100'
             
             rows = conn.execute(query, params).fetchall()
+            contexts = self.get_term_contexts(conn, [row[0] for row in rows])
             
             vocabulary = {}
             for row in rows:
-                term, cat, freq, contexts_json, first_seen, last_seen, conf, approved = row
-                contexts = json.loads(contexts_json) if contexts_json else []
+                term, cat, freq, first_seen, last_seen, conf, approved = row
                 
                 vocabulary[term] = TerminologyEntry(
                     term=term,
                     category=cat,
                     frequency=freq,
-                    contexts=contexts,
+                    contexts=contexts.get(term, []),
                     first_seen=datetime.fromisoformat(first_seen),
                     last_seen=datetime.fromisoformat(last_seen),
                     confidence_score=conf,
@@ -310,8 +589,26 @@ class KnowledgeBaseService:
             
             return vocabulary
     
-    def get_enhanced_prompt_context(self, text_context: str) -> str:
-        """Generate enhanced context for AI prompts based on learned vocabulary"""
+    def get_enhanced_prompt_sections(self) -> List[str]:
+        """Prompt context lines built from learned vocabulary, most important first"""
+        # Read the version before building, so a write that lands meanwhile invalidates the entry
+        key = f"v{self.version}"
+        sections = self.prompt_context_cache.get(key)
+        if sections is None:
+            sections = self._build_prompt_sections()
+            self.prompt_context_cache.set(key, sections)
+        return list(sections)
+    
+    async def aget_enhanced_prompt_sections(self) -> List[str]:
+        """get_enhanced_prompt_sections for async callers - a miss is rebuilt off the event loop"""
+        key = f"v{self.version}"
+        sections = self.prompt_context_cache.get(key)
+        if sections is None:
+            sections = await asyncio.to_thread(self._build_prompt_sections)
+            self.prompt_context_cache.set(key, sections)
+        return list(sections)
+    
+    def _build_prompt_sections(self) -> List[str]:
         vocabulary = self.get_domain_vocabulary(min_confidence=0.6)
         
         # Categorize vocabulary for prompt injection
@@ -319,23 +616,28 @@ class KnowledgeBaseService:
         research_methods = [term for term, entry in vocabulary.items() if entry.category == 'research_methods']
         abbreviations = [term for term, entry in vocabulary.items() if entry.category == 'abbreviations']
         
-        context_addition = ""
+        sections = []
         
         if medical_terms:
-            context_addition += f"\n\nDomain Vocabulary - Medical Terms: {', '.join(medical_terms[:10])}"
-        
-        if research_methods:
-            context_addition += f"\nResearch Methods: {', '.join(research_methods[:10])}"
+            sections.append(f"Domain Vocabulary - Medical Terms: {', '.join(medical_terms[:10])}")
         
         if abbreviations:
-            context_addition += f"\nCommon Abbreviations: {', '.join(abbreviations[:15])}"
+            sections.append(f"Common Abbreviations: {', '.join(abbreviations[:15])}")
+        
+        if research_methods:
+            sections.append(f"Research Methods: {', '.join(research_methods[:10])}")
         
         # Add writing quality guidelines based on common issues
         common_issues = self.get_common_writing_issues()
         if common_issues:
-            context_addition += f"\n\nWatch for: {', '.join(common_issues[:5])}"
+            sections.append(f"Watch for: {', '.join(common_issues[:5])}")
         
-        return context_addition
+        return sections
+    
+    def get_enhanced_prompt_context(self, text_context: str) -> str:
+        """Generate enhanced context for AI prompts based on learned vocabulary"""
+        sections = self.get_enhanced_prompt_sections()
+        return "\n\n" + "\n".join(sections) if sections else ""
     
     def get_common_writing_issues(self) -> List[str]:
         """Get list of common writing issues to watch for"""
@@ -350,24 +652,31 @@ class KnowledgeBaseService:
     
     async def approve_term(self, term: str, user_id: int) -> bool:
         """Allow admin users to approve/curate terminology"""
-        with sqlite3.connect(self.db_path) as conn:
+        def approve(conn: sqlite3.Connection) -> bool:
             result = conn.execute('''
                 UPDATE terminology 
                 SET user_approved = TRUE, confidence_score = 1.0
                 WHERE term = ?
             ''', (term,))
             return result.rowcount > 0
+        approved = await self.db.awrite(approve)
+        self.bump_version()
+        return approved
     
     async def reject_term(self, term: str, user_id: int) -> bool:
         """Allow admin users to reject terminology"""
-        with sqlite3.connect(self.db_path) as conn:
+        def reject(conn: sqlite3.Connection) -> bool:
             result = conn.execute('DELETE FROM terminology WHERE term = ?', (term,))
+            conn.execute('DELETE FROM term_contexts WHERE term = ?', (term,))
             return result.rowcount > 0
+        rejected = await self.db.awrite(reject)
+        self.bump_version()
+        return rejected
     
     async def store_feedback(self, feedback_entry: dict) -> bool:
         """Store user feedback about text refinement for future improvements"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            def store(conn: sqlite3.Connection) -> bool:
                 # Create feedback table if it doesn't exist
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS feedback (
@@ -422,7 +731,9 @@ class KnowledgeBaseService:
                 ))
                 
                 return True
-                
+            
+            return await self.db.awrite(store)
+            
         except Exception as e:
             logger.warning(f"Could not store feedback in knowledge base: {e}")
             return False
@@ -430,7 +741,7 @@ class KnowledgeBaseService:
     def export_lora_training_data(self, output_file: str = None) -> dict:
         """Export feedback data for LoRA fine-tuning of Gemma3"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.db.reader() as conn:
                 # Get all feedback with submission data for training
                 cursor = conn.execute('''
                     SELECT 
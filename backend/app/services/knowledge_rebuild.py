@@ -0,0 +1,311 @@
+"""
+Knowledge Base Rebuild Service for DoR-Dash
+Recounts the terminology table from the full submission history. Agenda items
+are streamed from the database in id order and counted in chunks by a process
+pool; partial counts are reduced in the parent and flushed in bulk to staging
+tables together with the resume point, so an interrupted rebuild continues
+where it stopped. The finished counts replace the live tables in one transaction.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.knowledge_base import (
+    KnowledgeBaseService,
+    TermBatch,
+    knowledge_service,
+    submission_text,
+    term_matcher,
+)
+
+# snapshot_state keys for an unfinished rebuild
+REBUILD_STATE_KEYS = ('rebuild_started_at', 'rebuild_last_id', 'rebuild_items_done')
+
+# (id, item_type, content, updated_at ISO) as sent to the workers
+SubmissionRow = Tuple[int, str, Optional[dict], str]
+
+
+def count_submissions(rows: List[SubmissionRow]) -> Tuple[TermBatch, List[Tuple[int, str, str]]]:
+    """
+    Worker: count terms in a chunk of agenda items.
+    Returns the chunk's batch and the per-item term counts for snapshot_items.
+    """
+    batch = TermBatch()
+    items = []
+    for item_id, item_type, content, updated_at in rows:
+        combined_text, context_snippet = submission_text(item_type, content)
+        terms = term_matcher.extract(combined_text) if combined_text.strip() else {}
+        if terms:
+            batch.add(terms, context_snippet)
+        term_counts = Counter(term for term_list in terms.values() for term in term_list)
+        items.append((item_id, updated_at, json.dumps(term_counts)))
+    return batch, items
+
+
+@dataclass
+class RebuildProgress:
+    status: str = "idle"                  # idle, running, completed or failed
+    total_items: int = 0
+    processed_items: int = 0
+    resumed_from: Optional[int] = None    # Last item id already counted when resuming
+    last_item_id: Optional[int] = None
+    terms: int = 0
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    items_per_sec: float = 0.0
+    error: Optional[str] = None
+
+
+class KnowledgeRebuilder:
+    """Parallel, resumable recount of the knowledge base from all agenda items"""
+
+    def __init__(
+        self,
+        service: KnowledgeBaseService,
+        workers: int = 4,
+        chunk_size: int = 1000,
+        session_factory: Optional[Callable] = None
+    ):
+        self.service = service
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.session_factory = session_factory
+        self.progress = RebuildProgress()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.progress.status == "running"
+
+    def _ensure_staging(self, conn: sqlite3.Connection):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rebuild_terms (
+                term TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                frequency INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rebuild_contexts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                term TEXT NOT NULL,
+                context TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rebuild_items (
+                item_id INTEGER PRIMARY KEY,
+                updated_at TEXT NOT NULL,
+                term_counts TEXT NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rebuild_contexts_term ON rebuild_contexts(term, id)')
+
+    def _prepare_staging(self, conn: sqlite3.Connection, restart: bool):
+        self._ensure_staging(conn)
+        if restart:
+            self._reset_staging(conn)
+
+    def _reset_staging(self, conn: sqlite3.Connection):
+        for table in ('rebuild_terms', 'rebuild_contexts', 'rebuild_items'):
+            conn.execute(f'DELETE FROM {table}')
+        conn.execute(
+            f"DELETE FROM snapshot_state WHERE key IN ({','.join('?' * len(REBUILD_STATE_KEYS))})",
+            REBUILD_STATE_KEYS
+        )
+
+    def _flush(self, conn: sqlite3.Connection, batch: TermBatch, items: List[Tuple[int, str, str]],
+               state: Dict[str, str]):
+        """Write reduced counts to staging and advance the resume point (one transaction)"""
+        conn.executemany('''
+            INSERT INTO rebuild_terms (term, category, frequency) VALUES (?, ?, ?)
+            ON CONFLICT(term) DO UPDATE SET frequency = frequency + excluded.frequency
+        ''', [(term, batch.categories[term], count) for term, count in batch.counts.items()])
+        self.service.store_term_contexts(conn, batch.contexts, table='rebuild_contexts')
+        self.service.store_item_counts(conn, items, table='rebuild_items')
+        self.service.set_snapshot_state(conn, state)
+
+    def _swap(self, conn: sqlite3.Connection, started_at: str):
+        """
+        Replace live counts with the rebuilt ones; curated (approved) terms are kept.
+        started_at is the database time the rebuild began reading agenda items.
+        """
+        conn.execute('''
+            DELETE FROM terminology
+            WHERE user_approved = FALSE AND term NOT IN (SELECT term FROM rebuild_terms)
+        ''')
+        conn.execute('''
+            INSERT INTO terminology (term, category, frequency, confidence_score)
+            SELECT term, category, frequency, MIN(1.0, 0.3 + 0.1 * (frequency - 1))
+            FROM rebuild_terms WHERE true
+            ON CONFLICT(term) DO UPDATE SET
+                frequency = excluded.frequency,
+                last_seen = CURRENT_TIMESTAMP,
+                confidence_score = CASE
+                    WHEN user_approved THEN confidence_score ELSE excluded.confidence_score
+                END
+        ''')
+        conn.execute('DELETE FROM term_contexts')
+        conn.execute('''
+            INSERT INTO term_contexts (term, context)
+            SELECT term, context FROM rebuild_contexts ORDER BY id
+        ''')
+        conn.execute('DELETE FROM snapshot_items')
+        conn.execute('INSERT INTO snapshot_items SELECT item_id, updated_at, term_counts FROM rebuild_items')
+        # Items edited while the rebuild ran are picked up by the next incremental snapshot
+        self.service.set_snapshot_state(conn, {'last_updated_at': started_at})
+        self._reset_staging(conn)
+
+    def run(self, restart: bool = False,
+            on_progress: Optional[Callable[[RebuildProgress], None]] = None) -> RebuildProgress:
+        """Rebuild synchronously (CLI, or a worker thread from start())"""
+        from app.db.models.agenda_item import AgendaItem, AgendaItemType
+        session_factory = self.session_factory
+        if session_factory is None:
+            from app.db.session import SessionLocal as session_factory
+
+        progress = self.progress = RebuildProgress(status="running", started_at=datetime.now().isoformat())
+        start = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        db = self.service.db
+        try:
+            db.write(lambda conn: self._prepare_staging(conn, restart))
+            state = db.read(self.service.get_snapshot_state)
+            last_id = int(state.get('rebuild_last_id', 0))
+            done = resumed_done = int(state.get('rebuild_items_done', 0))
+            if last_id:
+                progress.resumed_from = last_id
+                logger.info(f"Resuming knowledge base rebuild after agenda item {last_id}")
+
+            with session_factory() as session:
+                # The swap's watermark is compared with updated_at, so it comes from the
+                # database clock that stamps that column, never this process's clock
+                started_at = state.get('rebuild_started_at')
+                if started_at is None:
+                    started_at = session.query(func.localtimestamp()).scalar().isoformat()
+                item_filter = (
+                    AgendaItem.item_type.in_([AgendaItemType.STUDENT_UPDATE, AgendaItemType.FACULTY_UPDATE]),
+                    AgendaItem.id > last_id
+                )
+                progress.total_items = done + session.query(AgendaItem.id).filter(*item_filter).count()
+                progress.processed_items = done
+                rows = session.query(
+                    AgendaItem.id, AgendaItem.item_type, AgendaItem.content, AgendaItem.updated_at
+                ).filter(*item_filter).order_by(AgendaItem.id).yield_per(self.chunk_size)
+
+                def chunks():
+                    chunk = []
+                    for row in rows:
+                        chunk.append((row.id, row.item_type, row.content, row.updated_at.isoformat()))
+                        if len(chunk) >= self.chunk_size:
+                            yield chunk
+                            chunk = []
+                    if chunk:
+                        yield chunk
+
+                # Chunks are reduced in submission order, so the resume point is always
+                # the last id of a contiguous prefix of the history
+                pending: deque = deque()
+                reduced, reduced_items, reduced_chunks = TermBatch(), [], 0
+                max_in_flight = max(1, self.workers) * 2
+
+                def reduce_oldest():
+                    nonlocal reduced_chunks
+                    chunk_last_id, future = pending.popleft()
+                    batch, items = future.result() if executor else future
+                    reduced.merge(batch)
+                    reduced_items.extend(items)
+                    reduced_chunks += 1
+                    return chunk_last_id
+
+                def flush(chunk_last_id: int):
+                    nonlocal reduced, reduced_items, reduced_chunks, done
+                    done += len(reduced_items)
+                    batch, items, state = reduced, reduced_items, {
+                        'rebuild_started_at': started_at,
+                        'rebuild_last_id': str(chunk_last_id),
+                        'rebuild_items_done': str(done)
+                    }
+                    db.write(lambda conn: self._flush(conn, batch, items, state))
+                    reduced, reduced_items, reduced_chunks = TermBatch(), [], 0
+                    progress.processed_items = done
+                    progress.last_item_id = chunk_last_id
+                    progress.elapsed_seconds = time.perf_counter() - start
+                    progress.items_per_sec = (done - resumed_done) / progress.elapsed_seconds
+                    if on_progress:
+                        on_progress(progress)
+
+                for chunk in chunks():
+                    work = executor.submit(count_submissions, chunk) if executor else count_submissions(chunk)
+                    pending.append((chunk[-1][0], work))
+                    while len(pending) >= max_in_flight:
+                        chunk_last_id = reduce_oldest()
+                        if reduced_chunks >= max(1, self.workers):
+                            flush(chunk_last_id)
+                while pending:
+                    chunk_last_id = reduce_oldest()
+                    if reduced_chunks >= max(1, self.workers) or not pending:
+                        flush(chunk_last_id)
+
+            # Not while a snapshot is between counting and writing its deltas
+            with self.service.snapshot_lock:
+                db.write(lambda conn: self._swap(conn, started_at))
+            self.service.bump_version()
+            progress.terms = db.read(lambda conn: conn.execute('SELECT COUNT(*) FROM terminology').fetchone()[0])
+            progress.status = "completed"
+            logger.info(
+                f"Knowledge base rebuilt from {progress.processed_items} submissions: "
+                f"{progress.terms} terms in {time.perf_counter() - start:.1f}s"
+            )
+        except Exception as e:
+            progress.status = "failed"
+            progress.error = str(e)
+            logger.error(f"Knowledge base rebuild failed (resumable): {e}")
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            progress.elapsed_seconds = time.perf_counter() - start
+            progress.finished_at = datetime.now().isoformat()
+        return progress
+
+    async def _run_in_background(self, restart: bool):
+        try:
+            await asyncio.to_thread(self.run, restart)
+        except Exception:
+            pass  # Recorded in progress and logged by run()
+
+    def start(self, restart: bool = False) -> bool:
+        """Start a rebuild in a background thread; returns False if one is running"""
+        if self.running or (self._task is not None and not self._task.done()):
+            return False
+        self.progress = RebuildProgress(status="running")
+        self._task = asyncio.create_task(self._run_in_background(restart))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {**asdict(self.progress), "workers": self.workers, "chunk_size": self.chunk_size}
+
+
+# Global instance
+knowledge_rebuilder = KnowledgeRebuilder(
+    knowledge_service,
+    workers=settings.KNOWLEDGE_REBUILD_WORKERS,
+    chunk_size=settings.KNOWLEDGE_REBUILD_CHUNK
+)
+
+def get_knowledge_rebuilder() -> KnowledgeRebuilder:
+    """Get the global knowledge base rebuilder instance"""
+    return knowledge_rebuilder
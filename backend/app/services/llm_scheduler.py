@@ -0,0 +1,253 @@
+"""
+LLM Scheduler Service for DoR-Dash
+Bounds concurrent model generations, orders waiting work by priority class and
+sheds load with a Retry-After hint instead of letting every request time out.
+The concurrency limit adapts (AIMD) to the latency the backend is delivering,
+measured per generated token so long requests don't read as overload.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import LatencyRecorder
+
+
+# Priority classes - lower value is served first
+PRIORITY_FACULTY = 0
+PRIORITY_INTERACTIVE = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_FACULTY: "faculty",
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BATCH: "batch",
+}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when work cannot be admitted or waited too long for a slot"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class GenerationSlot:
+    """Held generation slot; set tokens to the generated token count (eval_count) when known"""
+
+    def __init__(self):
+        self.tokens: Optional[int] = None
+
+
+class LLMScheduler:
+    """
+    Priority admission queue in front of the Ollama backend.
+
+    At most concurrency_limit generations run at once. Waiters are granted slots
+    in (priority, arrival) order. Batch work may only fill part of the queue, so
+    QA runs cannot lock interactive users out.
+
+    The limit moves between min_concurrency and max_concurrency: it grows by one
+    slot per window of healthy generations and is cut by a quarter on a failure
+    or when seconds per generated token climb past latency_tolerance x the
+    recent baseline. Generations without a token count only report success.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 2,
+        max_queue: int = 16,
+        queue_timeout: float = 30.0,
+        batch_queue_share: float = 0.5,
+        min_concurrency: int = 1,
+        latency_tolerance: float = 2.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = max(1, min(min_concurrency, max_concurrency))
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max_concurrency)
+        self._baseline: Optional[float] = None
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.batch_queue_limit = max(1, int(max_queue * batch_queue_share))
+
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        # Metrics
+        self.wait_times = {priority: LatencyRecorder() for priority in PRIORITY_NAMES}
+        self.service_time = LatencyRecorder(window=200)
+        self.admitted = 0
+        self.rejected = 0
+        self.abandoned = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(self.min_concurrency, int(self.limit))
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def priority_for_role(self, role: Optional[str]) -> int:
+        """Interactive priority for everyone, optionally raised for faculty/admin"""
+        if settings.LLM_FACULTY_PRIORITY and role in ("faculty", "admin"):
+            return PRIORITY_FACULTY
+        return PRIORITY_INTERACTIVE
+
+    def retry_after(self) -> int:
+        """Rough seconds until a slot frees up, based on recent generation times"""
+        typical = self.service_time.summary()["p50"] or 5.0
+        rounds = (self.queued + self._active) / self.concurrency_limit
+        return max(1, math.ceil(typical * max(1.0, rounds)))
+
+    def check_admission(self, priority: int) -> None:
+        """Raise LLMOverloadedError if work of this priority would be rejected right now"""
+        if self._active < self.concurrency_limit and not self.queued:
+            return
+        limit = self.batch_queue_limit if priority >= PRIORITY_BATCH else self.max_queue
+        if self.queued >= limit:
+            self.rejected += 1
+            raise LLMOverloadedError(
+                "Text refinement is busy, please try again shortly",
+                status_code=429,
+                retry_after=self.retry_after()
+            )
+
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> None:
+        """Wait for a generation slot, honouring admission limits and the queue timeout"""
+        self.check_admission(priority)
+        start = time.perf_counter()
+
+        if self._active < self.concurrency_limit and not self.queued:
+            self._active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout or self.queue_timeout)
+            except asyncio.TimeoutError:
+                if not self._abandon(future):
+                    raise LLMOverloadedError(
+                        "Timed out waiting for a text refinement slot",
+                        status_code=503,
+                        retry_after=self.retry_after()
+                    )
+            except asyncio.CancelledError:
+                if self._abandon(future):
+                    self.release()  # Granted just as we were cancelled - pass it on
+                raise
+
+        self.admitted += 1
+        self.wait_times[priority].record(time.perf_counter() - start)
+
+    def _abandon(self, future: asyncio.Future) -> bool:
+        """
+        Give up a queued wait. Returns True if the slot had already been granted
+        (the caller then owns it); otherwise withdraws the waiter.
+        """
+        if future.done() and not future.cancelled():
+            return True
+        future.cancel()
+        self.abandoned += 1
+        return False
+
+    def release(self) -> None:
+        """Free a slot and hand capacity to waiters in priority order"""
+        self._active = max(0, self._active - 1)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._active < self.concurrency_limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._active += 1
+                future.set_result(True)
+
+    def record_outcome(self, seconds: float, ok: bool, tokens: Optional[int] = None) -> None:
+        """AIMD update of the concurrency limit from one finished generation"""
+        # num_predict ranges from 128 to 768 tokens, so raw wall time says more about
+        # the request than the backend - compare the cost per generated token
+        per_token = seconds / tokens if ok and tokens else None
+        if per_token is not None:
+            if self._baseline is None or per_token < self._baseline:
+                self._baseline = per_token
+            else:
+                # Drift slowly towards current conditions
+                self._baseline = self._baseline * 0.95 + per_token * 0.05
+
+        slow = per_token is not None and per_token > self._baseline * self.latency_tolerance
+        if not ok or slow:
+            self.limit = max(float(self.min_concurrency), self.limit * 0.75)
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[GenerationSlot]:
+        """Hold a generation slot for the duration of the block"""
+        await self.acquire(priority)
+        start = time.perf_counter()
+        held = GenerationSlot()
+        outcome = None
+        try:
+            yield held
+            outcome = True
+        except asyncio.CancelledError:
+            raise  # Caller went away - says nothing about backend health
+        except Exception:
+            outcome = False
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.service_time.record(elapsed)
+            self.release()
+            if outcome is not None:
+                self.record_outcome(elapsed, outcome, held.tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "min_concurrency": self.min_concurrency,
+            "concurrency_limit": self.concurrency_limit,
+            "latency_baseline_seconds_per_token": round(self._baseline, 5) if self._baseline else None,
+            "max_queue": self.max_queue,
+            "batch_queue_limit": self.batch_queue_limit,
+            "active": self._active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "abandoned": self.abandoned,
+            "wait_seconds": {
+                PRIORITY_NAMES[priority]: recorder.summary()
+                for priority, recorder in self.wait_times.items()
+            },
+            "service_seconds": self.service_time.summary()
+        }
+
+
+# Global instance - concurrency settings are per Ollama backend
+_backend_count = len(settings.OLLAMA_BACKEND_URLS)
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY * _backend_count,
+    max_queue=settings.LLM_MAX_QUEUE * _backend_count,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+    min_concurrency=settings.LLM_MIN_CONCURRENCY,
+    latency_tolerance=settings.LLM_LATENCY_TOLERANCE
+)
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the global LLM scheduler instance"""
+    return llm_scheduler
@@ -0,0 +1,160 @@
+"""
+Model Warm-up Service for DoR-Dash
+Preloads the refinement model on every Ollama backend at startup and keeps it
+resident during working hours, so users do not pay the model load time on the
+first refinement after the host has unloaded it. Outside working hours the
+keep_alive override is dropped and Ollama unloads idle models as usual.
+
+Ollama keys loaded runners by their options (num_ctx, num_thread, ...), so the
+warm-up sends the same runner options as refinement calls.
+"""
+
+import asyncio
+import time
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import LatencyRecorder
+from app.core.prompt_budget import RUNNER_OPTIONS
+from app.services.ollama_client import OllamaBackend, OllamaClient, OllamaError, ollama_client
+
+# Loading a 4B model on CPU can take a while - don't hold the warm-up to the request timeout
+WARMUP_TIMEOUT = 300.0
+
+
+def parse_working_hours(value: str) -> Tuple[dt_time, dt_time]:
+    """Parse "HH:MM-HH:MM" into (start, end)"""
+    start, _, end = value.partition("-")
+    return dt_time.fromisoformat(start.strip()), dt_time.fromisoformat(end.strip())
+
+
+def parse_working_days(value: str) -> Set[int]:
+    """Parse a comma-separated list of weekday numbers (Monday = 0)"""
+    return {int(day) for day in value.split(",") if day.strip()}
+
+
+class ModelWarmupManager:
+    """Keeps the configured model loaded on every backend during working hours"""
+
+    def __init__(
+        self,
+        client: OllamaClient,
+        keep_alive: str = "30m",
+        working_hours: str = "07:00-19:00",
+        working_days: str = "0,1,2,3,4",
+        interval: float = 600.0,
+        enabled: bool = True,
+        options: Optional[Dict[str, Any]] = None
+    ):
+        self.client = client
+        self.keep_alive = keep_alive
+        self.start_time, self.end_time = parse_working_hours(working_hours)
+        self.working_days = parse_working_days(working_days)
+        self.interval = interval
+        self.enabled = enabled
+        self.options = options
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.warmup_time = LatencyRecorder(window=100)
+        self.warmups = 0
+        self.failures = 0
+        self.last_warmup: Optional[str] = None
+
+    def in_working_hours(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now()
+        if now.weekday() not in self.working_days:
+            return False
+        if self.start_time <= self.end_time:
+            return self.start_time <= now.time() < self.end_time
+        # Window crosses midnight, e.g. 20:00-02:00
+        return now.time() >= self.start_time or now.time() < self.end_time
+
+    def apply_keep_alive(self, now: Optional[datetime] = None) -> bool:
+        """Set the client's keep_alive for the current time; returns whether we are in working hours"""
+        working = self.in_working_hours(now)
+        self.client.keep_alive = self.keep_alive if working else None
+        return working
+
+    async def warm_backend(self, backend: OllamaBackend) -> bool:
+        """Load the model on one backend with an empty-prompt generate call"""
+        start = time.perf_counter()
+        try:
+            # The client adds the working-hours keep_alive to the payload
+            await self.client.generate("", options=self.options, backend=backend, timeout=WARMUP_TIMEOUT)
+        except OllamaError as e:
+            self.failures += 1
+            logger.warning(f"Could not warm up {self.client.model} on {backend.base_url}: {e}")
+            return False
+        self.warmup_time.record(time.perf_counter() - start)
+        self.warmups += 1
+        return True
+
+    async def warm_up(self) -> int:
+        """Preload the model on every backend that is not failing fast; returns how many succeeded"""
+        backends = [
+            backend for backend in self.client.backends
+            if backend.serves(self.client.model) and not backend.breaker.is_open()
+        ]
+        results = await asyncio.gather(*(self.warm_backend(backend) for backend in backends))
+        self.last_warmup = datetime.now().isoformat()
+        warmed = sum(1 for ok in results if ok)
+        logger.info(f"Warmed up {self.client.model} on {warmed}/{len(self.client.backends)} Ollama backends")
+        return warmed
+
+    async def _loop(self) -> None:
+        # Always preload once at startup so the first request after a deploy is warm
+        try:
+            self.apply_keep_alive()
+            await self.warm_up()
+        except Exception as e:
+            logger.error(f"Error during startup model warm-up: {e}")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self.apply_keep_alive():
+                    await self.warm_up()
+            except Exception as e:
+                logger.error(f"Error during scheduled model warm-up: {e}")
+
+    def start(self) -> None:
+        """Start the background warm-up task (called from app startup)"""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "working_hours": f"{self.start_time:%H:%M}-{self.end_time:%H:%M}",
+            "in_working_hours": self.in_working_hours(),
+            "keep_alive": self.client.keep_alive,
+            "warmups": self.warmups,
+            "failures": self.failures,
+            "last_warmup": self.last_warmup,
+            "warmup_seconds": self.warmup_time.summary()
+        }
+
+
+# Global instance
+model_warmup = ModelWarmupManager(
+    ollama_client,
+    keep_alive=settings.OLLAMA_KEEP_ALIVE,
+    working_hours=settings.OLLAMA_WORKING_HOURS,
+    working_days=settings.OLLAMA_WORKING_DAYS,
+    interval=settings.OLLAMA_WARMUP_INTERVAL,
+    enabled=settings.OLLAMA_WARMUP_ENABLED,
+    options=RUNNER_OPTIONS
+)
+
+def get_model_warmup() -> ModelWarmupManager:
+    """Get the global model warm-up manager instance"""
+    return model_warmup
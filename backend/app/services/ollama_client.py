@@ -0,0 +1,459 @@
+"""
+Ollama Client Service for DoR-Dash
+Application-lifetime HTTP client for one or more Ollama hosts with keep-alive
+connection pooling, least-outstanding-requests routing, per-backend circuit
+breakers, model availability tracking and call metrics
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import httpx
+
+from app.core.circuit_breaker import CLOSED, CircuitBreaker
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import LatencyRecorder
+from app.core.prompt_budget import RUNNER_OPTIONS
+
+
+# How often the background task refreshes each backend's model list
+MODEL_REFRESH_INTERVAL = 300.0
+
+# A generation whose load_duration exceeds this had to load the model first
+COLD_LOAD_SECONDS = 0.5
+
+
+class OllamaError(Exception):
+    """Raised when the Ollama API returns an error or cannot be reached"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class OllamaUnavailableError(OllamaError):
+    """Raised without calling Ollama while no backend can take the request"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message, status_code=503)
+        self.retry_after = retry_after
+
+
+class OllamaBackend:
+    """One Ollama host: its endpoint, health, installed models and metrics"""
+
+    def __init__(self, generate_url: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.generate_url = generate_url
+        self.base_url = generate_url.split("/api/")[0].rstrip("/")
+        self.breaker = CircuitBreaker(self.base_url, failure_threshold, reset_timeout)
+
+        # None until the first successful /api/tags lookup - treated as "any model"
+        self.models: Optional[Set[str]] = None
+        self.models_checked_at: Optional[float] = None
+
+        self.latency = LatencyRecorder()
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def serves(self, model: str) -> bool:
+        if self.models is None:
+            return True
+        return model in self.models or f"{model}:latest" in self.models
+
+    def record_failure(self, error: str, timeout: bool = False) -> None:
+        self.errors += 1
+        if timeout:
+            self.timeouts += 1
+        self.breaker.record_failure(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "endpoint": self.generate_url,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "models": sorted(self.models) if self.models is not None else None,
+            "latency_seconds": self.latency.summary(),
+            "circuit": self.breaker.stats()
+        }
+
+
+class OllamaClient:
+    """Shared, pooled client spreading generations across Ollama hosts"""
+
+    def __init__(
+        self,
+        generate_urls: List[str],
+        model: str = "gemma3:4b",
+        max_connections: int = 8,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        if not generate_urls:
+            raise ValueError("At least one Ollama backend URL is required")
+        self.backends = [
+            OllamaBackend(url, failure_threshold, reset_timeout) for url in generate_urls
+        ]
+        self.model = model
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._next_index = 0
+
+        # keep_alive sent with every generation unless the caller sets one (see model_warmup)
+        self.keep_alive: Optional[str] = None
+
+        # Metrics
+        self.latency = LatencyRecorder()
+        self.first_token_latency = LatencyRecorder()
+        self.cold_latency = LatencyRecorder()
+        self.warm_latency = LatencyRecorder()
+        self.load_time = LatencyRecorder()
+        self.calls = 0
+        self.errors = 0
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    @property
+    def in_flight(self) -> int:
+        return sum(backend.in_flight for backend in self.backends)
+
+    async def start(self) -> None:
+        """Open the pooled HTTP client (called from app startup)"""
+        if self._client is not None:
+            return
+        # Connection limits apply per host, so each backend gets its own pool budget
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections * len(self.backends),
+                max_keepalive_connections=self.max_connections * len(self.backends),
+                keepalive_expiry=60.0
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        )
+        urls = ", ".join(backend.base_url for backend in self.backends)
+        logger.info(f"Ollama client started for {urls} (max {self.max_connections} connections each)")
+
+    def start_probing(self) -> None:
+        """Start the background task that refreshes models and re-tests failed backends"""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self) -> None:
+        """Close pooled connections (called from app shutdown)"""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Ollama client stopped")
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        # Lazily start for callers outside the app lifecycle (scripts, tests)
+        if self._client is None:
+            await self.start()
+        return self._client
+
+    # ---- Backend health and routing ----
+
+    def is_unavailable(self, model: Optional[str] = None) -> bool:
+        """True when every backend that could serve the model is failing fast"""
+        model = model or self.model
+        return not any(
+            backend.serves(model) and not backend.breaker.is_open() for backend in self.backends
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the soonest backend may be retried"""
+        return min(backend.breaker.retry_after() for backend in self.backends)
+
+    def _pick_backend(self, model: str, exclude: Set[int]) -> OllamaBackend:
+        """Least-outstanding-requests choice among healthy backends serving the model"""
+        if not any(backend.serves(model) for backend in self.backends):
+            raise OllamaError(f"Model {model} is not available on any Ollama backend", status_code=404)
+
+        candidates = [
+            (index, backend) for index, backend in enumerate(self.backends)
+            if index not in exclude and backend.serves(model) and not backend.breaker.is_open()
+        ]
+
+        # Rotate the starting point so ties spread across backends
+        start = self._next_index
+        self._next_index = (self._next_index + 1) % len(self.backends)
+        candidates.sort(key=lambda item: (item[1].in_flight, (item[0] - start) % len(self.backends)))
+
+        for index, backend in candidates:
+            exclude.add(index)
+            if backend.breaker.allow_request():
+                return backend
+
+        raise OllamaUnavailableError(
+            "Ollama backend is unavailable, please try again shortly",
+            retry_after=self.retry_after()
+        )
+
+    async def refresh_models(self) -> None:
+        """Look up installed models on every backend via /api/tags"""
+        client = await self._get_client()
+        for backend in self.backends:
+            try:
+                response = await client.get(f"{backend.base_url}/api/tags", timeout=5.0)
+                if response.status_code == 200:
+                    backend.models = {m.get("name") for m in response.json().get("models", [])}
+                    backend.models_checked_at = time.monotonic()
+            except (httpx.RequestError, ValueError) as e:
+                logger.debug(f"Could not list models on {backend.base_url}: {e}")
+
+    async def _probe_loop(self) -> None:
+        interval = max(1.0, min(b.breaker.reset_timeout for b in self.backends) / 2)
+        last_refresh = 0.0
+        while True:
+            if time.monotonic() - last_refresh >= MODEL_REFRESH_INTERVAL:
+                await self.refresh_models()
+                last_refresh = time.monotonic()
+            for backend in self.backends:
+                if backend.breaker.state == CLOSED or backend.breaker.is_open():
+                    continue
+                try:
+                    await self.probe(backend)
+                    logger.info(f"Ollama backend {backend.base_url} recovered - circuit closed")
+                except OllamaError as e:
+                    logger.warning(f"Ollama probe of {backend.base_url} failed, circuit stays open: {e}")
+            await asyncio.sleep(interval)
+
+    async def probe(self, backend: Optional[OllamaBackend] = None) -> None:
+        """Smallest possible generation, used to test backend health (on the refinement runner)"""
+        await self.generate(
+            "ping", options={**RUNNER_OPTIONS, "num_predict": 1}, timeout=10.0, backend=backend
+        )
+
+    # ---- Generation ----
+
+    def _payload(self, prompt: str, model: str, stream: bool, options, extra) -> Dict[str, Any]:
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            **extra
+        }
+        if options:
+            payload["options"] = options
+        if self.keep_alive is not None and "keep_alive" not in payload:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    def _record_load(self, body: Dict[str, Any], elapsed: float) -> None:
+        """Classify a finished generation as cold (model had to load) or warm"""
+        if body.get("done_reason") == "load":
+            return  # Preload request - nothing was generated
+        load_seconds = (body.get("load_duration") or 0) / 1e9
+        if load_seconds > COLD_LOAD_SECONDS:
+            self.cold_latency.record(elapsed)
+            self.load_time.record(load_seconds)
+        else:
+            self.warm_latency.record(elapsed)
+
+    async def generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        backend: Optional[OllamaBackend] = None,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """
+        Run a non-streaming /api/generate call and return the decoded JSON body.
+        Connection failures fail over to the next backend. Raises OllamaError on
+        transport failures and non-200 responses.
+        """
+        model = model or self.model
+        payload = self._payload(prompt, model, False, options, extra)
+        client = await self._get_client()
+        request_timeout = httpx.Timeout(timeout, connect=self.connect_timeout) if timeout else None
+
+        self.calls += 1
+        tried: Set[int] = set()
+        while True:
+            if backend is not None:
+                target = backend
+                if not target.breaker.allow_request():
+                    raise OllamaUnavailableError(
+                        f"Ollama backend {target.base_url} is unavailable",
+                        retry_after=target.breaker.retry_after()
+                    )
+            else:
+                try:
+                    target = self._pick_backend(model, tried)
+                except OllamaError:
+                    self.errors += 1
+                    raise
+
+            target.calls += 1
+            target.in_flight += 1
+            start = time.perf_counter()
+            try:
+                if request_timeout:
+                    response = await client.post(target.generate_url, json=payload, timeout=request_timeout)
+                else:
+                    response = await client.post(target.generate_url, json=payload)
+            except httpx.ConnectError as e:
+                target.record_failure(str(e))
+                if backend is None and len(tried) < len(self.backends):
+                    continue  # Nothing was sent - safe to try another host
+                self.errors += 1
+                raise OllamaError(f"Error communicating with Ollama API: {e}") from e
+            except httpx.TimeoutException as e:
+                target.record_failure(f"timeout: {e}", timeout=True)
+                self.errors += 1
+                raise OllamaError(f"Timed out waiting for Ollama: {e}") from e
+            except httpx.RequestError as e:
+                target.record_failure(str(e))
+                self.errors += 1
+                raise OllamaError(f"Error communicating with Ollama API: {e}") from e
+            finally:
+                elapsed = time.perf_counter() - start
+                target.in_flight -= 1
+                target.latency.record(elapsed)
+                self.latency.record(elapsed)
+            break
+
+        if response.status_code >= 500:
+            target.record_failure(f"HTTP {response.status_code}")
+            self.errors += 1
+            raise OllamaError(f"Error calling Ollama API: {response.text}", status_code=response.status_code)
+
+        # Any non-5xx answer means the backend is up
+        target.breaker.record_success()
+        if response.status_code != 200:
+            target.errors += 1
+            self.errors += 1
+            raise OllamaError(f"Error calling Ollama API: {response.text}", status_code=response.status_code)
+
+        try:
+            body = response.json()
+        except ValueError as e:
+            target.record_failure(f"invalid response body: {e}")
+            self.errors += 1
+            raise OllamaError(f"Invalid response from Ollama API: {e}") from e
+        self._record_load(body, elapsed)
+        return body
+
+    async def stream_generate(
+        self,
+        prompt: str,
+        options: Optional[Dict[str, Any]] = None,
+        model: Optional[str] = None,
+        **extra: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run a streaming /api/generate call, yielding each NDJSON chunk as it arrives.
+        The final chunk has "done": true. Raises OllamaError like generate().
+        """
+        model = model or self.model
+        payload = self._payload(prompt, model, True, options, extra)
+        client = await self._get_client()
+
+        self.calls += 1
+        try:
+            target = self._pick_backend(model, set())
+        except OllamaError:
+            self.errors += 1
+            raise
+
+        target.calls += 1
+        target.in_flight += 1
+        start = time.perf_counter()
+        first_token = True
+        try:
+            async with client.stream("POST", target.generate_url, json=payload) as response:
+                if response.status_code != 200:
+                    body = (await response.aread()).decode("utf-8", errors="replace")
+                    if response.status_code >= 500:
+                        target.record_failure(f"HTTP {response.status_code}")
+                    else:
+                        target.errors += 1
+                        target.breaker.record_success()
+                    self.errors += 1
+                    raise OllamaError(f"Error calling Ollama API: {body}", status_code=response.status_code)
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError as e:
+                        # Truncated or garbled NDJSON - the backend (or a proxy) broke the stream
+                        target.record_failure(f"invalid stream chunk: {e}")
+                        self.errors += 1
+                        raise OllamaError(f"Invalid response from Ollama API: {e}") from e
+                    if chunk.get("error"):
+                        target.errors += 1
+                        self.errors += 1
+                        raise OllamaError(f"Error calling Ollama API: {chunk['error']}")
+                    if first_token:
+                        first_token = False
+                        self.first_token_latency.record(time.perf_counter() - start)
+                        target.breaker.record_success()
+                    if chunk.get("done"):
+                        self._record_load(chunk, time.perf_counter() - start)
+                    yield chunk
+        except httpx.TimeoutException as e:
+            target.record_failure(f"timeout: {e}", timeout=True)
+            self.errors += 1
+            raise OllamaError(f"Timed out waiting for Ollama: {e}") from e
+        except httpx.RequestError as e:
+            target.record_failure(str(e))
+            self.errors += 1
+            raise OllamaError(f"Error communicating with Ollama API: {e}") from e
+        finally:
+            elapsed = time.perf_counter() - start
+            target.in_flight -= 1
+            target.latency.record(elapsed)
+            self.latency.record(elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "started": self.started,
+            "max_connections_per_backend": self.max_connections,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_seconds": self.latency.summary(),
+            "first_token_seconds": self.first_token_latency.summary(),
+            "keep_alive": self.keep_alive,
+            "cold_seconds": self.cold_latency.summary(),
+            "warm_seconds": self.warm_latency.summary(),
+            "model_load_seconds": self.load_time.summary(),
+            "backends": [backend.stats() for backend in self.backends]
+        }
+
+
+# Global instance
+ollama_client = OllamaClient(
+    generate_urls=settings.OLLAMA_BACKEND_URLS,
+    model=settings.OLLAMA_MODEL,
+    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+    timeout=settings.OLLAMA_TIMEOUT,
+    connect_timeout=settings.OLLAMA_CONNECT_TIMEOUT,
+    failure_threshold=settings.OLLAMA_FAILURE_THRESHOLD,
+    reset_timeout=settings.OLLAMA_RESET_TIMEOUT
+)
+
+def get_ollama_client() -> OllamaClient:
+    """Get the global Ollama client instance"""
+    return ollama_client
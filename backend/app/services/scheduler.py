@@ -8,6 +8,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional
 from app.services.knowledge_base import knowledge_service
+from app.services.knowledge_rebuild import knowledge_rebuilder
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,10 @@ class PeriodicScheduler:
                 if not self.running:
                     break
                 
+                if knowledge_rebuilder.running:
+                    logger.info("Skipping scheduled knowledge base snapshot - rebuild in progress")
+                    continue
+                
                 logger.info("Starting scheduled knowledge base snapshot")
                 
                 # Create knowledge base snapshot
@@ -93,9 +98,7 @@ class PeriodicScheduler:
     async def cleanup_low_confidence_terms(self):
         """Remove very low confidence terms that haven't improved"""
         try:
-            import sqlite3
-            
-            with sqlite3.connect(knowledge_service.db_path) as conn:
+            def cleanup(conn) -> int:
                 # Remove terms with very low confidence that are old
                 old_date = datetime.now() - timedelta(days=30)
                 
@@ -107,17 +110,24 @@ class PeriodicScheduler:
                 ''', (old_date.isoformat(),))
                 
                 if result.rowcount > 0:
-                    logger.info(f"Cleaned up {result.rowcount} low-confidence terms")
-                
+                    conn.execute('''
+                        DELETE FROM term_contexts
+                        WHERE term NOT IN (SELECT term FROM terminology)
+                    ''')
+                return result.rowcount
+
+            removed = await knowledge_service.db.awrite(cleanup)
+            if removed > 0:
+                knowledge_service.bump_version()
+                logger.info(f"Cleaned up {removed} low-confidence terms")
+
         except Exception as e:
             logger.error(f"Error during term cleanup: {e}")
     
     async def generate_weekly_report(self):
         """Generate a weekly summary report of knowledge base activity"""
         try:
-            import sqlite3
-            
-            with sqlite3.connect(knowledge_service.db_path) as conn:
+            def weekly_stats(conn):
                 # Get statistics for the past week
                 week_ago = datetime.now() - timedelta(days=7)
                 
@@ -142,14 +152,17 @@ class PeriodicScheduler:
                     ORDER BY count DESC 
                     LIMIT 5
                 ''', (week_ago.isoformat(),)).fetchall()
-                
-                logger.info(
-                    f"Weekly Knowledge Base Report: "
-                    f"{new_terms} new terms, "
-                    f"{approved_terms} approved terms, "
-                    f"Active categories: {dict(active_categories)}"
-                )
-                
+
+                return new_terms, approved_terms, active_categories
+
+            new_terms, approved_terms, active_categories = await knowledge_service.db.aread(weekly_stats)
+            logger.info(
+                f"Weekly Knowledge Base Report: "
+                f"{new_terms} new terms, "
+                f"{approved_terms} approved terms, "
+                f"Active categories: {dict(active_categories)}"
+            )
+
         except Exception as e:
             logger.error(f"Error generating weekly report: {e}")
 
@@ -0,0 +1,294 @@
+"""
+Text Pre-check Service for DoR-Dash
+Local fast path in front of the LLM: mechanical whitespace/punctuation and
+capitalization fixes. Text that is clean, or only needs mechanical fixes, never
+reaches the Ollama host; any word missing from the lexicon (a SymSpell-style
+deletion index, also used to tell likely misspellings from new vocabulary)
+sends the text to the model, since a small lexicon can't tell a typo from a
+real word it doesn't contain.
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.logging import logger
+
+SEED_LEXICON_PATH = Path(__file__).parent / "data" / "common_words.txt"
+
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z']*[A-Za-z]|[A-Za-z]")
+
+# Apostrophe-less contractions that are never real words on their own
+CONTRACTIONS = {
+    "dont": "don't", "doesnt": "doesn't", "didnt": "didn't", "isnt": "isn't",
+    "arent": "aren't", "wasnt": "wasn't", "werent": "weren't", "havent": "haven't",
+    "hasnt": "hasn't", "hadnt": "hadn't", "couldnt": "couldn't", "wouldnt": "wouldn't",
+    "shouldnt": "shouldn't", "ive": "I've", "im": "I'm", "thats": "that's",
+    "theyre": "they're", "youre": "you're", "weve": "we've", "theyve": "they've",
+}
+
+# Suffixes tried when a word is not in the lexicon as-is: (suffix, replacement)
+SUFFIXES = [
+    ("ies", "y"), ("ied", "y"), ("es", ""), ("s", ""), ("ed", ""), ("ed", "e"),
+    ("ing", ""), ("ing", "e"), ("ly", ""), ("er", ""), ("est", ""), ("ment", ""),
+    ("ness", ""), ("ation", "e"), ("ation", ""), ("ations", "e"), ("al", ""),
+]
+
+
+def damerau_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance, returning max_distance + 1 once exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+class SymSpellIndex:
+    """
+    Symmetric-delete spelling index.
+    Every dictionary word is stored under all its deletions up to max_distance,
+    so candidate corrections are found by hashing instead of scanning the lexicon.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words: Dict[str, int] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _edits(self, word: str) -> Set[str]:
+        key = word[:self.prefix_length]
+        results = {key}
+        frontier = {key}
+        for _ in range(self.max_distance):
+            next_frontier = set()
+            for item in frontier:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    deleted = item[:i] + item[i + 1:]
+                    if deleted not in results:
+                        next_frontier.add(deleted)
+            results |= next_frontier
+            frontier = next_frontier
+        return results
+
+    def add(self, word: str, count: int = 1) -> None:
+        if word in self.words:
+            self.words[word] += count
+            return
+        self.words[word] = count
+        for edit in self._edits(word):
+            self._deletes.setdefault(edit, set()).add(word)
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Candidate corrections as (word, distance, count), closest then most frequent first"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        if word in self.words:
+            return [(word, 0, self.words[word])]
+        candidates: Set[str] = set()
+        for edit in self._edits(word):
+            candidates |= self._deletes.get(edit, set())
+        results = []
+        for candidate in candidates:
+            distance = damerau_levenshtein(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((candidate, distance, self.words[candidate]))
+        results.sort(key=lambda item: (item[1], -item[2]))
+        return results
+
+
+@dataclass
+class PrecheckResult:
+    text: str
+    needs_llm: bool
+    reason: str = ""
+    fixes: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.fixes)
+
+
+class TextPrechecker:
+    """Decides whether a refinement can be answered locally without the LLM"""
+
+    def __init__(self, max_chars: int = 400, max_learned_words: int = 20000):
+        self.max_chars = max_chars
+        self.max_learned_words = max_learned_words
+        self.index = SymSpellIndex()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._learned = 0
+
+        # Metrics
+        self.checks = 0
+        self.fast_path = 0
+        self.llm_reasons: Counter = Counter()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            # Seed lexicon - earlier words are more common, so rank sets the count
+            rank = 0
+            for line in SEED_LEXICON_PATH.read_text(encoding="utf-8").splitlines():
+                if line.startswith("#"):
+                    continue
+                for word in line.split():
+                    rank += 1
+                    self.index.add(word.lower(), max(1, 10000 - rank))
+
+            # Domain vocabulary learned by the knowledge base
+            try:
+                from app.services.knowledge_base import knowledge_service
+                for term in knowledge_service.get_domain_vocabulary(min_confidence=0.6):
+                    for word in WORD_RE.findall(term):
+                        self.index.add(word.lower(), 50)
+            except Exception as e:
+                logger.debug(f"Pre-checker could not load knowledge base vocabulary: {e}")
+
+            self._loaded = True
+            logger.info(f"Text pre-checker loaded {len(self.index)} words")
+
+    def learn(self, original: str, refined: str) -> None:
+        """Add words the user wrote and the model kept to the lexicon.
+
+        Words the model introduced on its own are never learned - only vocabulary
+        present in both the input and the refined text counts as confirmed.
+        """
+        if not self._loaded:
+            self._load()
+        kept = {word.lower() for word in WORD_RE.findall(original)}
+        for word in WORD_RE.findall(refined):
+            lower = word.lower()
+            if lower not in kept:
+                continue
+            if lower not in self.index:
+                if len(lower) <= 2 or self._learned >= self.max_learned_words:
+                    continue
+                self._learned += 1
+            self.index.add(lower, 1)
+
+    def is_known(self, word: str) -> bool:
+        lower = word.lower()
+        if lower in self.index:
+            return True
+        for suffix, replacement in SUFFIXES:
+            if lower.endswith(suffix) and len(lower) - len(suffix) >= 2:
+                stem = lower[:-len(suffix)] + replacement
+                if stem in self.index:
+                    return True
+                # Doubled consonant before -ed/-ing (planned, running)
+                if replacement == "" and len(stem) > 2 and stem[-1] == stem[-2] and stem[:-1] in self.index:
+                    return True
+        if lower.endswith("'s") and lower[:-2] in self.index:
+            return True
+        return False
+
+    def _normalize(self, text: str, fixes: List[str]) -> str:
+        """Whitespace, punctuation spacing and capitalization fixes"""
+        def apply(pattern: str, replacement, value: str, description: str) -> str:
+            updated = re.sub(pattern, replacement, value)
+            if updated != value and description not in fixes:
+                fixes.append(description)
+            return updated
+
+        result = text.replace("\r\n", "\n")
+        result = apply(r"[ \t]+$", "", result.strip(), "Removed trailing whitespace")
+        result = re.sub(r"[ \t]+$", "", result, flags=re.MULTILINE)
+        result = apply(r"(?<=\S)[ \t]{2,}", " ", result, "Collapsed repeated spaces")
+        result = apply(r"(?<=\w)[ \t]+([,;:!?]|\.(?=\s|$))", r"\1", result, "Removed space before punctuation")
+        result = apply(r"([,;])(?=[A-Za-z])", r"\1 ", result, "Added space after punctuation")
+        result = apply(r"(?<![\w'])i(?![\w'])", "I", result, "Capitalized 'I'")
+        result = apply(r"(^|[.!?]\s+)([a-z])", lambda m: m.group(1) + m.group(2).upper(), result, "Capitalized sentence starts")
+        return result
+
+    def check(self, text: str) -> PrecheckResult:
+        """Run the local pass; needs_llm tells the caller whether the model is still required"""
+        if not self._loaded:
+            self._load()
+        self.checks += 1
+
+        if len(text) > self.max_chars:
+            return self._needs_llm(text, "too_long")
+
+        fixes: List[str] = []
+        result = self._normalize(text, fixes)
+
+        output = []
+        pos = 0
+        for match in WORD_RE.finditer(result):
+            word = match.group(0)
+            output.append(result[pos:match.start()])
+            pos = match.end()
+            preceding = result[:match.start()].rstrip(" \t")
+            at_start = not preceding or preceding[-1] in ".!?:\n-*"
+
+            lower = word.lower()
+            replacement = word
+            if lower in CONTRACTIONS:
+                replacement = CONTRACTIONS[lower]
+                if word[0].isupper():
+                    replacement = replacement[0].upper() + replacement[1:]
+                fixes.append(f"'{word}' -> '{replacement}'")
+            elif len(word) == 1 or self.is_known(word):
+                pass
+            elif any(c.isupper() for c in word[1:]) or (word[0].isupper() and not at_start):
+                pass  # Acronyms and proper nouns are left to the author
+            elif self.index.lookup(lower, max_distance=1):
+                # Never rewrite words locally: "sound" is one edit from "found", so
+                # spelling changes are left to the model
+                return self._needs_llm(text, "spelling")
+            elif not word[0].isupper():
+                return self._needs_llm(text, "unknown_word")
+            # Otherwise capitalized with nothing close - treat as a name
+            output.append(replacement)
+        output.append(result[pos:])
+
+        self.fast_path += 1
+        return PrecheckResult(text="".join(output), needs_llm=False, fixes=fixes)
+
+    def _needs_llm(self, text: str, reason: str) -> PrecheckResult:
+        self.llm_reasons[reason] += 1
+        return PrecheckResult(text=text, needs_llm=True, reason=reason)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "lexicon_words": len(self.index),
+            "learned_words": self._learned,
+            "checks": self.checks,
+            "fast_path": self.fast_path,
+            "fast_path_rate": round(self.fast_path / self.checks, 4) if self.checks else 0.0,
+            "llm_reasons": dict(self.llm_reasons)
+        }
+
+
+# Global instance
+text_prechecker = TextPrechecker()
+
+def get_text_prechecker() -> TextPrechecker:
+    """Get the global text pre-checker instance"""
+    return text_prechecker
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark avatar processing throughput (images/sec and images/sec per core)
+
+Runs process_avatar serially in-process, then through ImageProcessingPool
+with increasing worker counts, on synthetic JPEG/PNG/TIFF uploads.
+
+Usage:
+    cd backend
+    python scripts/benchmark_avatar_processing.py --images 60 --workers 1 2 4
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from PIL import Image
+
+from app.services.image_processing import ImageProcessingPool, process_avatar
+
+# (format, width, height) - mix of cropper output, phone photos and a large scan
+SAMPLE_SPECS = [
+    ("JPEG", 200, 200),
+    ("JPEG", 3024, 4032),
+    ("PNG", 1200, 1200),
+    ("TIFF", 4000, 3000),
+]
+
+
+def make_sample(fmt: str, width: int, height: int) -> bytes:
+    """Create a noisy image so encoders can't shortcut flat colour"""
+    image = Image.effect_noise((width, height), 64).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def bench_serial(samples, count: int) -> float:
+    start = time.perf_counter()
+    for i in range(count):
+        process_avatar(samples[i % len(samples)])
+    return count / (time.perf_counter() - start)
+
+
+async def bench_pool(samples, count: int, workers: int) -> float:
+    pool = ImageProcessingPool(max_workers=workers, max_pending=count)
+    try:
+        # Warm up worker processes so fork/import cost isn't measured
+        await asyncio.gather(*(pool.submit(process_avatar, samples[0]) for _ in range(workers)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.submit(process_avatar, samples[i % len(samples)]) for i in range(count)))
+        return count / (time.perf_counter() - start)
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark avatar processing throughput")
+    parser.add_argument("--images", type=int, default=40, help="Images per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1],
+                        help="Pool sizes to benchmark")
+    args = parser.parse_args()
+
+    print("Generating sample uploads...")
+    samples = [make_sample(*spec) for spec in SAMPLE_SPECS]
+    for (fmt, w, h), data in zip(SAMPLE_SPECS, samples):
+        print(f"  {fmt:5} {w}x{h}: {len(data) / 1024:.0f} KB")
+
+    print(f"\nCPU cores: {os.cpu_count()}")
+    print(f"{'mode':<12}{'workers':>8}{'img/s':>10}{'img/s/core':>12}")
+
+    rate = bench_serial(samples, args.images)
+    print(f"{'serial':<12}{1:>8}{rate:>10.1f}{rate:>12.1f}")
+
+    for workers in sorted(set(args.workers)):
+        rate = asyncio.run(bench_pool(samples, args.images, workers))
+        print(f"{'pool':<12}{workers:>8}{rate:>10.1f}{rate / workers:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
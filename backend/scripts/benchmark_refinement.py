@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Benchmark the text refinement path (throughput and p50/p95/p99 latency)
+
+Starts the offline Ollama stub (scripts/ollama_stub.py) on a local port, points
+the app's Ollama client at it and drives perform_text_refinement - prompt
+budgeting, scheduler, pooled client and response parsing - at increasing client
+concurrency. Also reports streaming time-to-first-token and the raw throughput
+of parse_refinement over clean, wrapped and truncated model outputs.
+
+Pass --url to benchmark a running stub or a real Ollama host instead.
+
+Usage:
+    cd backend
+    python scripts/benchmark_refinement.py --requests 60 --concurrency 1 4 8 \
+        --latency lognormal --latency-ms 400 --jitter-ms 200 --tokens-per-sec 40
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ollama_stub import add_stub_arguments, config_from_args, create_stub_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub(args) -> str:
+    """Run the stub with uvicorn in a daemon thread; returns its generate URL"""
+    import uvicorn
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_stub_app(config_from_args(args)), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/api/generate"
+
+
+def sample_texts(count: int):
+    """Distinct refinement inputs built from the QA test cases"""
+    from app.api.endpoints.text_testing import TEST_CASES
+    cases = [TEST_CASES[i % len(TEST_CASES)] for i in range(count)]
+    return [(f"{case.input_text} (sample {i})", case.context) for i, case in enumerate(cases)]
+
+
+async def bench_refine(count: int, concurrency: int):
+    from fastapi import HTTPException
+    from app.api.endpoints.text import TextRefinementRequest, perform_text_refinement
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], {}
+
+    async def one(text, context):
+        async with semaphore:
+            request = TextRefinementRequest(text=text, context=context, use_cache=False, allow_fast_path=False)
+            start = time.perf_counter()
+            try:
+                await perform_text_refinement(request)
+                latencies.append(time.perf_counter() - start)
+            except HTTPException as e:
+                errors[e.status_code] = errors.get(e.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(text, context) for text, context in sample_texts(count)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def bench_stream(count: int, concurrency: int):
+    from app.api.endpoints.text import TextRefinementRequest, prepare_refinement
+    from app.services.ollama_client import OllamaError, get_ollama_client
+
+    client = get_ollama_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    first_tokens, latencies, errors = [], [], {}
+
+    async def one(text, context):
+        async with semaphore:
+            _, plan = await prepare_refinement(TextRefinementRequest(text=text, context=context), client.model)
+            start = time.perf_counter()
+            first = None
+            try:
+                async for chunk in client.stream_generate(plan.prompt, options=plan.options):
+                    if first is None and chunk.get("response"):
+                        first = time.perf_counter() - start
+            except OllamaError as e:
+                errors[e.status_code] = errors.get(e.status_code, 0) + 1
+                return
+            first_tokens.append(first or 0.0)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(text, context) for text, context in sample_texts(count)))
+    return first_tokens, latencies, errors, time.perf_counter() - start
+
+
+def bench_parse(iterations: int):
+    """parse_refinement throughput and success rate per output shape"""
+    import json
+    from app.api.endpoints.text import parse_refinement
+
+    original = "having issues with my code its not working properly"
+    body = json.dumps({"refined_text": "Having issues with my code; it's not working properly.",
+                       "suggestions": ["Fixed punctuation", "Added apostrophe"]})
+    shapes = {
+        "clean": body,
+        "fenced": f"Here is the result:\n```json\n{body}\n```\nLet me know!",
+        "nested": json.dumps({"result": json.loads(body), "meta": {"notes": "{braces} \"quoted\""}}),
+        "truncated": body[:-25],
+    }
+    results = {}
+    for name, completion in shapes.items():
+        parsed = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parsed += parse_refinement(original, completion)[1]
+        results[name] = (iterations / (time.perf_counter() - start), parsed / iterations)
+    return results
+
+
+def row(mode, concurrency, latencies, errors, elapsed, extra=""):
+    from app.core.metrics import summarize
+    stats = summarize(latencies)
+    error_count = sum(errors.values())
+    print(f"{mode:<8}{concurrency:>6}{len(latencies) + error_count:>6}{error_count:>7}"
+          f"{len(latencies) / elapsed:>8.2f}{stats['p50']:>8.3f}{stats['p95']:>8.3f}{stats['p99']:>8.3f}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text refinement against an Ollama stub")
+    parser.add_argument("--url", help="Existing /api/generate URL (default: start a local stub)")
+    parser.add_argument("--requests", type=int, default=40, help="Refinements per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Client concurrency levels")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM_MAX_CONCURRENCY for the scheduler")
+    parser.add_argument("--parse-iterations", type=int, default=2000)
+    parser.add_argument("--no-stream", action="store_true", help="Skip the streaming benchmark")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    url = args.url or start_stub(args)
+
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["OLLAMA_API_URL"] = url
+    os.environ["OLLAMA_API_URLS"] = ""
+    os.environ["OLLAMA_WARMUP_ENABLED"] = "false"
+    os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["LLM_MAX_QUEUE"] = str(max(args.concurrency) * 2)
+
+    print(f"Target: {url}")
+    if not args.url:
+        print(f"Stub: {args.latency} latency {args.latency_ms:.0f}ms (+/-{args.jitter_ms:.0f}), "
+              f"{args.tokens_per_sec:g} tok/s, failure rate {args.failure_rate:g}")
+    print(f"Scheduler concurrency: {args.llm_concurrency}\n")
+    print(f"{'mode':<8}{'conc':>6}{'reqs':>6}{'errors':>7}{'req/s':>8}{'p50':>8}{'p95':>8}{'p99':>8}")
+
+    async def run_all():
+        for concurrency in args.concurrency:
+            latencies, errors, elapsed = await bench_refine(args.requests, concurrency)
+            row("refine", concurrency, latencies, errors, elapsed, f"  {errors or ''}")
+        if not args.no_stream:
+            from app.core.metrics import summarize
+            for concurrency in args.concurrency:
+                first, latencies, errors, elapsed = await bench_stream(args.requests, concurrency)
+                row("stream", concurrency, latencies, errors, elapsed,
+                    f"  ttft p50 {summarize(first)['p50']:.3f}s p95 {summarize(first)['p95']:.3f}s")
+        from app.services.ollama_client import get_ollama_client
+        await get_ollama_client().stop()
+
+    asyncio.run(run_all())
+
+    print(f"\n{'output':<12}{'parses/s':>12}{'parsed':>9}")
+    for name, (rate, success) in bench_parse(args.parse_iterations).items():
+        print(f"{name:<12}{rate:>12.0f}{success:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Offline Ollama stub server for benchmarking and tests
+
+Implements /api/generate (streaming NDJSON and non-streaming), /api/tags and
+/api/version with configurable latency, token rate, failure rate and
+response content, so the refinement path can be exercised without a model host.
+
+Response modes:
+    refine  - answer like the refinement prompts expect: JSON whose refined_text
+              is the prompt's TEXT with basic capitalization fixed (default)
+    echo    - return the prompt unchanged
+    canned  - cycle through the strings given with --canned
+
+Output is cut to the request's options.num_predict tokens like a real model,
+so truncated JSON is produced whenever the budget is too small.
+
+Usage:
+    cd backend
+    python scripts/ollama_stub.py --port 11435 --latency-ms 800 --tokens-per-sec 12
+    OLLAMA_API_URL=http://localhost:11435/api/generate uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOKEN_RE = re.compile(r"\s*\S+")
+PROMPT_TEXT_RE = re.compile(r"TEXT: (.*?)\n\nRespond with JSON", re.DOTALL)
+NS = 1_000_000_000
+
+
+@dataclass
+class StubConfig:
+    model: str = "gemma3:4b"
+    mode: str = "refine"                  # refine, echo or canned
+    canned: List[str] = field(default_factory=list)
+    latency: str = "fixed"                # fixed, uniform, lognormal or exponential
+    latency_ms: float = 0.0               # Mean time before the first token
+    jitter_ms: float = 0.0                # Spread for uniform/lognormal
+    tokens_per_sec: float = 0.0           # 0 = emit all tokens at once
+    failure_rate: float = 0.0             # Fraction of calls answered with failure_status
+    failure_status: int = 500
+    load_ms: float = 0.0                  # Simulated model load on the first call
+    seed: Optional[int] = None
+
+
+def split_tokens(text: str) -> List[str]:
+    """Whitespace-attached word tokens; joining them gives text back"""
+    tokens = TOKEN_RE.findall(text)
+    return tokens or [text]
+
+
+def refine_prompt_text(prompt: str) -> str:
+    """The refinement answer a well-behaved model would give for a prompt"""
+    match = PROMPT_TEXT_RE.search(prompt)
+    text = (match.group(1) if match else prompt).strip()
+    refined = re.sub(r"(?<![\w'])i(?![\w'])", "I", text)
+    refined = re.sub(r"(^|[.!?]\s+)([a-z])", lambda m: m.group(1) + m.group(2).upper(), refined)
+    if refined and refined[-1] not in ".!?":
+        refined += "."
+    return json.dumps({"refined_text": refined, "suggestions": ["Fixed capitalization"]})
+
+
+class OllamaStub:
+    """Generates stub responses according to a StubConfig"""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self._canned = itertools.cycle(config.canned or ["{}"])
+        self._loaded = config.load_ms <= 0
+
+        # Metrics
+        self.requests = 0
+        self.failures = 0
+        self.active = 0
+        self.max_active = 0
+
+    def sample_latency(self) -> float:
+        """Seconds before the first token, drawn from the configured distribution"""
+        config = self.config
+        mean = config.latency_ms / 1000.0
+        if mean <= 0:
+            return 0.0
+        if config.latency == "uniform":
+            spread = config.jitter_ms / 1000.0
+            return max(0.0, self.random.uniform(mean - spread, mean + spread))
+        if config.latency == "exponential":
+            return self.random.expovariate(1.0 / mean)
+        if config.latency == "lognormal":
+            sigma = max(0.01, config.jitter_ms / max(config.latency_ms, 1.0))
+            # Median = mean for lognormal here, giving a long right tail
+            return self.random.lognormvariate(0.0, sigma) * mean
+        return mean
+
+    def completion_for(self, prompt: str) -> str:
+        if self.config.mode == "echo":
+            return prompt
+        if self.config.mode == "canned":
+            return next(self._canned)
+        return refine_prompt_text(prompt)
+
+    def take_load(self) -> float:
+        """Load time to charge this call (only the first call after start)"""
+        if self._loaded:
+            return 0.0
+        self._loaded = True
+        return self.config.load_ms / 1000.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "active": self.active,
+            "max_active": self.max_active
+        }
+
+
+def create_stub_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """ASGI app serving the Ollama API subset used by DoR-Dash"""
+    stub = OllamaStub(config or StubConfig())
+    app = FastAPI(title="Ollama stub")
+    app.state.stub = stub
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-stub"}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": stub.config.model}]}
+
+    @app.get("/stub/stats")
+    async def stats():
+        return stub.stats()
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        options = body.get("options") or {}
+        stream = body.get("stream", True)
+        model = body.get("model", stub.config.model)
+        stub.requests += 1
+
+        if stub.random.random() < stub.config.failure_rate:
+            stub.failures += 1
+            return JSONResponse({"error": "stub failure"}, status_code=stub.config.failure_status)
+
+        load_seconds = stub.take_load()
+        if not prompt:
+            # Empty prompt = load request
+            await asyncio.sleep(load_seconds)
+            return JSONResponse({
+                "model": model, "response": "", "done": True, "done_reason": "load",
+                "load_duration": int(load_seconds * NS)
+            })
+
+        tokens = split_tokens(stub.completion_for(prompt))
+        num_predict = options.get("num_predict")
+        done_reason = "stop"
+        if num_predict is not None and 0 <= num_predict < len(tokens):
+            tokens = tokens[:num_predict]
+            done_reason = "length"
+
+        first_token = load_seconds + stub.sample_latency()
+        per_token = 1.0 / stub.config.tokens_per_sec if stub.config.tokens_per_sec > 0 else 0.0
+        prompt_tokens = len(split_tokens(prompt))
+
+        def final(elapsed: float) -> Dict[str, Any]:
+            return {
+                "model": model, "done": True, "done_reason": done_reason,
+                "total_duration": int(elapsed * NS),
+                "load_duration": int(load_seconds * NS),
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": len(tokens),
+                "eval_duration": int(per_token * len(tokens) * NS)
+            }
+
+        async def run_stream():
+            start = time.perf_counter()
+            stub.active += 1
+            stub.max_active = max(stub.max_active, stub.active)
+            try:
+                await asyncio.sleep(first_token)
+                for token in tokens:
+                    yield json.dumps({"model": model, "response": token, "done": False}) + "\n"
+                    if per_token:
+                        await asyncio.sleep(per_token)
+                yield json.dumps({**final(time.perf_counter() - start), "response": ""}) + "\n"
+            finally:
+                stub.active -= 1
+
+        if stream:
+            return StreamingResponse(run_stream(), media_type="application/x-ndjson")
+
+        start = time.perf_counter()
+        stub.active += 1
+        stub.max_active = max(stub.max_active, stub.active)
+        try:
+            await asyncio.sleep(first_token + per_token * len(tokens))
+        finally:
+            stub.active -= 1
+        return {**final(time.perf_counter() - start), "response": "".join(tokens)}
+
+    return app
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Stub options, shared with the refinement benchmark"""
+    parser.add_argument("--mode", choices=["refine", "echo", "canned"], default="refine")
+    parser.add_argument("--canned", nargs="*", default=[], help="Responses for --mode canned")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal", "exponential"], default="fixed",
+                        help="Time-to-first-token distribution")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Mean time to first token")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Spread for uniform/lognormal")
+    parser.add_argument("--tokens-per-sec", type=float, default=15.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of calls that fail")
+    parser.add_argument("--failure-status", type=int, default=500)
+    parser.add_argument("--load-ms", type=float, default=0.0, help="Simulated model load on the first call")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    return StubConfig(
+        mode=args.mode,
+        canned=args.canned,
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        load_ms=args.load_ms,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Ollama stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+    print(f"Ollama stub on http://{args.host}:{args.port}/api/generate")
+    uvicorn.run(create_stub_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Rebuild the knowledge base terminology from the full submission history
+
+Streams every student and faculty update from the database in chunks to a
+process pool, reduces the partial term counts and writes them in bulk. An
+interrupted rebuild resumes from the last flushed chunk when run again; pass
+--restart to discard it and start over. The live tables are replaced only when
+the rebuild completes (approved terms are kept).
+
+Usage:
+    cd backend
+    python scripts/rebuild_knowledge_base.py --workers 8 --chunk-size 2000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.knowledge_base import KnowledgeBaseService, knowledge_service
+from app.services.knowledge_rebuild import KnowledgeRebuilder, RebuildProgress
+
+
+def print_progress(progress: RebuildProgress):
+    percent = progress.processed_items / progress.total_items if progress.total_items else 1.0
+    remaining = progress.total_items - progress.processed_items
+    eta = remaining / progress.items_per_sec if progress.items_per_sec else 0.0
+    print(
+        f"\r{progress.processed_items}/{progress.total_items} items ({percent:.0%}) "
+        f"{progress.items_per_sec:.0f} items/s, eta {eta:.0f}s, last id {progress.last_item_id}   ",
+        end="", flush=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the knowledge base from all submissions")
+    parser.add_argument("--workers", type=int, default=settings.KNOWLEDGE_REBUILD_WORKERS,
+                        help="Extraction processes (1 = count in this process)")
+    parser.add_argument("--chunk-size", type=int, default=settings.KNOWLEDGE_REBUILD_CHUNK,
+                        help="Agenda items per worker task")
+    parser.add_argument("--restart", action="store_true", help="Discard a partial rebuild and start over")
+    parser.add_argument("--db-path", default=knowledge_service.db_path, help="Knowledge base sqlite file")
+    args = parser.parse_args()
+
+    service = knowledge_service if args.db_path == knowledge_service.db_path else KnowledgeBaseService(args.db_path)
+    rebuilder = KnowledgeRebuilder(service, workers=args.workers, chunk_size=args.chunk_size)
+
+    print(f"Rebuilding {args.db_path} with {args.workers} workers, {args.chunk_size} items per chunk")
+    try:
+        progress = rebuilder.run(restart=args.restart, on_progress=print_progress)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after item {rebuilder.progress.last_item_id} - run again to resume")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\nRebuild failed: {e} - run again to resume")
+        sys.exit(1)
+
+    print(f"\nDone: {progress.processed_items} submissions, {progress.terms} terms "
+          f"in {progress.elapsed_seconds:.1f}s"
+          + (f" (resumed after item {progress.resumed_from})" if progress.resumed_from else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Test suite for the circuit breaker.
+"""
+import asyncio
+import time
+import pytest
+from app.core.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from app.main import health_check
+from app.services.ollama_client import ollama_client
+
+class TestCircuitBreaker:
+    """Test cases for CircuitBreaker."""
+
+    def test_opens_after_threshold(self):
+        """Test consecutive failures open the breaker and calls fail fast."""
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+        for _ in range(2):
+            breaker.record_failure("boom")
+        assert breaker.state == CLOSED
+        breaker.record_failure("boom")
+        assert breaker.state == OPEN
+        assert breaker.is_open()
+        assert not breaker.allow_request()
+        assert breaker.retry_after() > 1
+
+    def test_success_resets_failure_count(self):
+        """Test a success in between failures keeps the breaker closed."""
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_half_open_allows_single_probe(self):
+        """Test only one probe passes after the reset timeout, and success closes."""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens(self):
+        """Test a failing probe sends the breaker back to open."""
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        assert breaker.allow_request()
+        breaker.record_failure("still down")
+        assert breaker._state == OPEN
+        assert breaker.stats()["last_error"] == "still down"
+
+class TestPublicHealth:
+    """Test cases for the LLM summary on the unauthenticated health check."""
+
+    def test_summary_hides_backend_detail(self, monkeypatch):
+        """Test the public health check reports a status without backend URLs or breaker state."""
+        backend = ollama_client.backends[0]
+        monkeypatch.setattr(backend, "breaker", CircuitBreaker("test", failure_threshold=1, reset_timeout=60))
+        assert asyncio.run(health_check())["llm"] == "available"
+
+        backend.breaker.record_failure("boom")
+        health = asyncio.run(health_check())
+        assert health["llm"] in ("degraded", "unavailable")
+        assert backend.base_url not in str(health)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
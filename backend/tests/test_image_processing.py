@@ -0,0 +1,128 @@
+"""
+Test suite for image processing service.
+"""
+import asyncio
+import io
+import os
+import pytest
+from PIL import Image
+from app.services.image_processing import (
+    ImageProcessingPool,
+    ImagePoolSaturatedError,
+    generate_thumbnail,
+    process_avatar,
+    is_thumbnailable,
+    thumbnail_path,
+    remove_thumbnails
+)
+
+class TestImageProcessing:
+    """Test cases for thumbnail generation and the image pool."""
+
+    def test_generate_thumbnail_preserves_aspect_ratio(self, tmp_path):
+        """Test thumbnails fit the requested edge and keep aspect ratio."""
+        source = tmp_path / "photo.jpg"
+        Image.new("RGB", (1200, 600), (200, 50, 50)).save(source, "JPEG")
+        dest = thumbnail_path(str(source), "thumb")
+
+        result = generate_thumbnail(str(source), dest, 256)
+
+        assert os.path.exists(dest)
+        assert (result["width"], result["height"]) == (256, 128)
+        with Image.open(dest) as thumb:
+            assert thumb.format == "WEBP"
+
+    def test_generate_thumbnail_palette_with_transparency(self, tmp_path):
+        """Test palette PNGs are converted without errors."""
+        source = tmp_path / "logo.png"
+        Image.new("RGBA", (300, 300), (0, 0, 0, 0)).convert("P").save(source, "PNG")
+        dest = thumbnail_path(str(source), "thumb")
+
+        generate_thumbnail(str(source), dest, 128)
+
+        assert os.path.exists(dest)
+
+    def test_pool_generates_and_caches(self, tmp_path):
+        """Test ensure_thumbnail renders in the pool and reuses the cached file."""
+        source = tmp_path / "chart.png"
+        Image.new("RGB", (800, 800), (0, 128, 0)).save(source, "PNG")
+        pool = ImageProcessingPool(max_workers=1, max_pending=2)
+
+        async def run():
+            first = await pool.ensure_thumbnail(str(source), "thumb")
+            second = await pool.ensure_thumbnail(str(source), "thumb")
+            return first, second
+
+        try:
+            first, second = asyncio.run(run())
+        finally:
+            pool.shutdown()
+
+        assert first == second
+        assert pool.completed == 1
+
+        remove_thumbnails(str(source))
+        assert not os.path.exists(first)
+
+    def test_pool_rejects_when_saturated(self):
+        """Test submissions past max_pending raise instead of queueing."""
+        pool = ImageProcessingPool(max_workers=1, max_pending=0)
+
+        with pytest.raises(ImagePoolSaturatedError):
+            asyncio.run(pool.submit(abs, -1))
+        assert pool.rejected == 1
+
+    def test_process_avatar_crops_to_square(self):
+        """Test non-square uploads are center-cropped to the avatar size."""
+        buffer = io.BytesIO()
+        Image.new("RGBA", (640, 480), (10, 20, 30, 128)).save(buffer, "PNG")
+
+        result = process_avatar(buffer.getvalue())
+
+        assert (result["width"], result["height"]) == (200, 200)
+        assert result["processing"] == "cropped"
+        assert result["source_size"] == "640x480"
+        with Image.open(io.BytesIO(result["data"])) as avatar:
+            assert avatar.format == "JPEG"
+
+    def test_process_avatar_renders_hashed_variants(self):
+        """Test every variant is rendered and the hash tracks image content."""
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 300), (0, 0, 255)).save(buffer, "PNG")
+
+        result = process_avatar(buffer.getvalue())
+
+        assert set(result["variants"]) == {"200.jpg", "200.webp", "96.webp", "48.webp"}
+        with Image.open(io.BytesIO(result["variants"]["48.webp"]["data"])) as small:
+            assert small.format == "WEBP"
+            assert small.size == (48, 48)
+        assert result["variants"]["200.jpg"]["data"] == result["data"]
+        assert process_avatar(buffer.getvalue())["content_hash"] == result["content_hash"]
+
+        other = io.BytesIO()
+        Image.new("RGB", (300, 300), (255, 255, 0)).save(other, "PNG")
+        assert process_avatar(other.getvalue())["content_hash"] != result["content_hash"]
+
+    def test_process_avatar_preserves_cropper_output(self):
+        """Test 200x200 uploads from the frontend cropper are not re-cropped."""
+        buffer = io.BytesIO()
+        Image.new("RGB", (200, 200), (255, 0, 0)).save(buffer, "JPEG")
+
+        result = process_avatar(buffer.getvalue())
+
+        assert result["processing"] == "preserved"
+
+    def test_process_avatar_rejects_non_images(self):
+        """Test invalid image data raises."""
+        with pytest.raises(Exception):
+            process_avatar(b"not an image")
+
+    def test_is_thumbnailable(self):
+        """Test only raster image types are thumbnailable."""
+        assert is_thumbnailable("image/png")
+        assert not is_thumbnailable("image/svg+xml")
+        assert not is_thumbnailable("application/pdf")
+        assert not is_thumbnailable(None)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
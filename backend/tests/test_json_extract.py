@@ -0,0 +1,94 @@
+"""
+Test suite for tolerant JSON extraction from model output.
+"""
+import json
+import pytest
+from app.core.json_extract import JSONObjectExtractor, extract_json_object
+from app.api.endpoints.text import parse_refinement
+
+class TestExtractJSONObject:
+    """Test cases for extract_json_object."""
+
+    def test_nested_braces_and_escaped_quotes(self):
+        """Test objects with nested values and quoted braces are parsed whole."""
+        text = 'Here you go: {"refined_text": "Use {x} and \\"y\\"", "meta": {"a": [1, {"b": 2}]}} thanks'
+        data = extract_json_object(text)
+        assert data["refined_text"] == 'Use {x} and "y"'
+        assert data["meta"] == {"a": [1, {"b": 2}]}
+
+    def test_skips_objects_without_required_key(self):
+        """Test earlier objects without refined_text are skipped."""
+        text = 'Example: {"foo": 1}\n```json\n{"refined_text": "ok", "suggestions": []}\n```'
+        assert extract_json_object(text) == {"refined_text": "ok", "suggestions": []}
+
+    def test_trailing_comma(self):
+        """Test a trailing comma does not break parsing."""
+        assert extract_json_object('{"refined_text": "ok", "suggestions": ["a",],}')["suggestions"] == ["a"]
+
+    def test_no_json(self):
+        """Test prose without an object returns None."""
+        assert extract_json_object("I could not refine this text.") is None
+
+class TestTruncationRepair:
+    """Test cases for repairing cut-off output."""
+
+    @pytest.mark.parametrize("tail", [
+        ', "suggestions": ["Fixed tense", "Split sent',
+        ', "suggestions": [',
+        ', "suggestions":',
+        ', "sugg',
+        ',',
+    ])
+    def test_cut_after_refined_text(self, tail):
+        """Test output cut off after refined_text is repaired."""
+        extractor = JSONObjectExtractor()
+        extractor.feed('{"refined_text": "The results were clear."' + tail)
+        data = extractor.finish()
+        assert data["refined_text"] == "The results were clear."
+        assert extractor.repaired
+        assert extractor.stream_complete
+
+    def test_cut_inside_refined_text(self):
+        """Test output cut off inside refined_text is flagged as incomplete."""
+        extractor = JSONObjectExtractor()
+        extractor.feed('{"refined_text": "The results were')
+        assert extractor.finish()["refined_text"] == "The results were"
+        assert extractor.repaired
+        assert not extractor.stream_complete
+
+class TestParseRefinement:
+    """Test cases for parse_refinement on top of the extractor."""
+
+    ORIGINAL = "the results was clear"
+
+    def test_parsed(self):
+        """Test a well-formed completion is parsed."""
+        completion = json.dumps({"refined_text": "The results were clear.", "suggestions": ["Fixed agreement"]})
+        response, parsed = parse_refinement(self.ORIGINAL, completion)
+        assert parsed
+        assert response.refined_text == "The results were clear."
+        assert response.suggestions == ["Fixed agreement"]
+
+    def test_truncated_suggestions_still_parsed(self):
+        """Test a completion cut off in suggestions keeps the refined text."""
+        response, parsed = parse_refinement(self.ORIGINAL, '{"refined_text": "The results were clear.", "suggestions": ["Fix')
+        assert parsed
+        assert response.refined_text == "The results were clear."
+
+    def test_truncated_refined_text_keeps_original(self):
+        """Test a completion cut off inside refined_text falls back to the original."""
+        response, parsed = parse_refinement(self.ORIGINAL, '{"refined_text": "The results')
+        assert not parsed
+        assert response.refined_text == self.ORIGINAL
+
+    def test_reuses_streamed_extractor(self):
+        """Test an extractor fed during streaming is reused for the final parse."""
+        extractor = JSONObjectExtractor()
+        for piece in ['{"refined_text": "The res', 'ults were clear."}']:
+            extractor.feed(piece)
+        response, parsed = parse_refinement(self.ORIGINAL, "", extractor)
+        assert parsed
+        assert response.refined_text == extractor.streamed_text
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,177 @@
+"""
+Test suite for incremental knowledge base snapshots.
+"""
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.models.agenda_item import AgendaItem
+from app.services.knowledge_base import KnowledgeBaseService, TermBatch, submission_text
+
+class AgendaItems:
+    """Minimal agenda item table on an in-memory SQLite engine."""
+
+    def __init__(self):
+        self.engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE {AgendaItem.__tablename__} ("
+                "id INTEGER PRIMARY KEY, meeting_id INTEGER, user_id INTEGER, item_type TEXT, "
+                "order_index INTEGER, title TEXT, content TEXT, is_presenting BOOLEAN, "
+                "created_at DATETIME, updated_at DATETIME)"
+            ))
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.clock = datetime.now() - timedelta(days=1)
+
+    def tick(self) -> datetime:
+        self.clock += timedelta(minutes=10)
+        return self.clock
+
+    def add(self, item_id, content, item_type="student_update"):
+        now = self.tick()
+        with self.engine.begin() as conn:
+            conn.execute(AgendaItem.__table__.insert().values(
+                id=item_id, meeting_id=1, user_id=1, item_type=item_type, order_index=0,
+                content=content, is_presenting=False, created_at=now, updated_at=now
+            ))
+
+    def edit(self, item_id, content):
+        with self.engine.begin() as conn:
+            conn.execute(AgendaItem.__table__.update().where(AgendaItem.__table__.c.id == item_id).values(
+                content=content, updated_at=self.tick()
+            ))
+
+@pytest.fixture
+def items():
+    return AgendaItems()
+
+@pytest.fixture
+def service(tmp_path):
+    return KnowledgeBaseService(db_path=str(tmp_path / "knowledge_base.db"))
+
+def snapshot(service, items):
+    return asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+
+def frequency(service, term):
+    with sqlite3.connect(service.db_path) as conn:
+        row = conn.execute('SELECT frequency FROM terminology WHERE term = ?', (term,)).fetchone()
+    return row[0] if row else None
+
+class TestSubmissionText:
+    """Test cases for agenda item text extraction."""
+
+    def test_student_and_faculty_fields(self):
+        """Test the text fields of each update type are combined."""
+        text_, context = submission_text("student_update", {"progress_text": "ran PCR", "next_steps_text": "ELISA"})
+        assert text_ == "ran PCR  ELISA"
+        assert context == "Student update: ran PCR..."
+        assert submission_text("faculty_update", {"projects_text": "R01"})[0] == " R01"
+        assert submission_text("announcement", {"progress_text": "x"}) == ("", "")
+        assert submission_text("student_update", None)[0].strip() == ""
+
+class TestAddChanged:
+    """Test cases for counting edited submissions."""
+
+    def test_only_the_difference_is_counted(self):
+        """Test extra occurrences are added and missing ones removed."""
+        batch = TermBatch()
+        batch.add_changed(
+            {"research_methods": ["pcr", "pcr", "elisa"]}, "ctx", previous={"pcr": 1, "tumor": 2}
+        )
+        assert batch.counts == {"pcr": 1, "elisa": 1}
+        assert batch.removed == {"tumor": 2}
+        assert len(batch) == 3
+
+class TestIncrementalSnapshots:
+    """Test cases for watermark-based snapshots."""
+
+    def test_repeated_snapshots_do_not_inflate_counts(self, service, items):
+        """Test a second run with no new activity counts nothing."""
+        items.add(1, {"progress_text": "The tumor grew and a second tumor was found at biopsy"})
+        first = snapshot(service, items)
+        assert first.total_submissions == 1
+        assert frequency(service, "tumor") == 2
+
+        second = snapshot(service, items)
+        assert (second.total_submissions, second.new_terms_found, second.updated_terms) == (0, 0, 0)
+        assert frequency(service, "tumor") == 2
+
+    def test_only_new_items_are_processed(self, service, items):
+        """Test items after the watermark are counted on the next run."""
+        items.add(1, {"progress_text": "tumor measurements"})
+        snapshot(service, items)
+        items.add(2, {"announcements_text": "a new grant for tumor imaging"}, item_type="faculty_update")
+        result = snapshot(service, items)
+        assert result.total_submissions == 1
+        assert (result.new_terms_found, result.updated_terms) == (1, 1)
+        assert frequency(service, "tumor") == 2
+        assert frequency(service, "grant") == 1
+
+    def test_edits_replace_previous_counts(self, service, items):
+        """Test an edited item subtracts the counts of its old version."""
+        items.add(1, {"progress_text": "tumor, tumor and biopsy"})
+        snapshot(service, items)
+        items.edit(1, {"progress_text": "tumor and metastasis"})
+        result = snapshot(service, items)
+        assert result.total_submissions == 1
+        assert frequency(service, "tumor") == 1
+        assert frequency(service, "biopsy") == 0
+        assert frequency(service, "metastasis") == 1
+
+    def test_watermark_is_stored(self, service, items):
+        """Test the last processed item is recorded as the watermark."""
+        items.add(1, {"progress_text": "tumor"})
+        items.add(2, {"progress_text": "biopsy"})
+        snapshot(service, items)
+        with sqlite3.connect(service.db_path) as conn:
+            state = service.get_snapshot_state(conn)
+        assert state["last_item_id"] == "2"
+        assert datetime.fromisoformat(state["last_updated_at"]) == items.clock
+
+    def test_first_snapshot_skips_old_items(self, service, items):
+        """Test the first run only looks back over the bootstrap window."""
+        items.clock = datetime.now() - timedelta(days=60)
+        items.add(1, {"progress_text": "tumor"})
+        assert snapshot(service, items).total_submissions == 0
+
+class TestConcurrentSnapshots:
+    """Test cases for overlapping snapshots (manual trigger during the scheduled run)."""
+
+    def test_overlapping_snapshots_count_once(self, service, items, monkeypatch):
+        """Test two concurrent snapshots don't both apply the same items."""
+        for item_id in range(1, 50):
+            items.add(item_id, {"progress_text": "tumor biopsy"})
+
+        # Without serialization both snapshots finish counting before either writes
+        both_counted = threading.Barrier(2, timeout=0.5)
+        count = service._count_new_submissions
+
+        def count_then_wait(*args):
+            result = count(*args)
+            try:
+                both_counted.wait()
+            except threading.BrokenBarrierError:
+                pass
+            return result
+
+        monkeypatch.setattr(service, "_count_new_submissions", count_then_wait)
+
+        async def run():
+            return await asyncio.gather(
+                service.snapshot_submissions(session_factory=items.session_factory),
+                service.snapshot_submissions(session_factory=items.session_factory)
+            )
+
+        first, second = asyncio.run(run())
+        assert sorted([first.total_submissions, second.total_submissions]) == [0, 49]
+        assert frequency(service, "tumor") == 49
+        assert frequency(service, "biopsy") == 49
+
+if __name__ == "__main__":
+    pytest.main([__file__])
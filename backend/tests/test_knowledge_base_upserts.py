@@ -0,0 +1,122 @@
+"""
+Test suite for batched knowledge base terminology upserts.
+"""
+import asyncio
+import json
+import sqlite3
+import pytest
+from app.services.knowledge_base import CONTEXTS_PER_TERM, KnowledgeBaseService, TermBatch
+
+@pytest.fixture
+def service(tmp_path):
+    return KnowledgeBaseService(db_path=str(tmp_path / "knowledge_base.db"))
+
+def term_row(service, term):
+    with sqlite3.connect(service.db_path) as conn:
+        return conn.execute(
+            'SELECT category, frequency, confidence_score FROM terminology WHERE term = ?', (term,)
+        ).fetchone()
+
+class TestTermBatch:
+    """Test cases for in-memory term aggregation."""
+
+    def test_counts_and_first_category(self):
+        """Test occurrences are summed per term and the first category is kept."""
+        batch = TermBatch()
+        batch.add({"research_methods": ["pcr", "pcr"], "abbreviations": ["PCR", "pcr"]}, "ctx")
+        assert batch.counts == {"pcr": 3, "PCR": 1}
+        assert batch.categories["pcr"] == "research_methods"
+        assert len(batch) == 2
+
+    def test_one_context_per_submission(self):
+        """Test a term gets its submission's context once, capped per term."""
+        batch = TermBatch()
+        batch.add({"medical_terms": ["tumor", "tumor"]}, "x" * 300)
+        assert batch.contexts["tumor"] == ["x" * 100]
+        for i in range(CONTEXTS_PER_TERM + 5):
+            batch.add({"medical_terms": ["tumor"]}, f"update {i}")
+        assert len(batch.contexts["tumor"]) == CONTEXTS_PER_TERM
+        assert batch.contexts["tumor"][-1] == f"update {CONTEXTS_PER_TERM + 4}"
+
+class TestApplyTermBatch:
+    """Test cases for writing term batches to SQLite."""
+
+    def test_new_term_scores_like_repeated_updates(self, service):
+        """Test a term seen n times starts at 0.3 plus 0.1 per extra occurrence."""
+        service.update_terminology_db({"medical_terms": ["tumor", "tumor", "tumor"]}, "ctx")
+        category, frequency, confidence = term_row(service, "tumor")
+        assert (category, frequency) == ("medical_terms", 3)
+        assert confidence == pytest.approx(0.5)
+
+    def test_existing_term_is_incremented(self, service):
+        """Test upserts add to frequency and confidence, capped at 1.0."""
+        service.update_terminology_db({"medical_terms": ["tumor"]}, "first")
+        service.update_terminology_db({"abbreviations": ["tumor"] * 20}, "second")
+        category, frequency, confidence = term_row(service, "tumor")
+        assert (category, frequency, confidence) == ("medical_terms", 21, 1.0)
+
+    def test_new_and_updated_counts(self, service):
+        """Test the batch reports distinct new and updated terms."""
+        service.update_terminology_db({"medical_terms": ["tumor"]}, "first")
+        batch = TermBatch()
+        batch.add({"medical_terms": ["tumor", "biopsy", "biopsy"], "research_methods": ["elisa"]}, "ctx")
+        with sqlite3.connect(service.db_path) as conn:
+            assert service.apply_term_batch(conn, batch) == (2, 1)
+            assert service.apply_term_batch(conn, TermBatch()) == (0, 0)
+
+    def test_removals_are_not_updates(self, service):
+        """Test terms only removed by an edit are not reported as updated."""
+        service.update_terminology_db({"medical_terms": ["tumor", "biopsy"]}, "first")
+        batch = TermBatch()
+        batch.add_changed({"medical_terms": ["tumor", "tumor"]}, "edited", {"tumor": 1, "biopsy": 1})
+        with sqlite3.connect(service.db_path) as conn:
+            assert service.apply_term_batch(conn, batch) == (0, 1)
+        assert term_row(service, "biopsy")[1] == 0
+
+    def test_contexts_are_capped_per_term(self, service):
+        """Test only the newest contexts are kept for each term."""
+        for i in range(CONTEXTS_PER_TERM + 3):
+            service.update_terminology_db({"medical_terms": ["tumor"], "funding_terms": ["grant"]}, f"update {i}")
+        service.update_terminology_db({"research_methods": ["elisa"]}, "only")
+        with sqlite3.connect(service.db_path) as conn:
+            contexts = service.get_term_contexts(conn, ["tumor", "grant", "elisa", "missing"])
+        assert contexts["tumor"] == [f"update {i}" for i in range(3, CONTEXTS_PER_TERM + 3)]
+        assert len(contexts["grant"]) == CONTEXTS_PER_TERM
+        assert contexts["elisa"] == ["only"]
+        assert "missing" not in contexts
+
+    def test_vocabulary_includes_contexts(self, service):
+        """Test get_domain_vocabulary reads contexts from the contexts table."""
+        for i in range(3):
+            service.update_terminology_db({"medical_terms": ["tumor"]}, f"update {i}")
+        entry = service.get_domain_vocabulary()["tumor"]
+        assert entry.frequency == 3
+        assert entry.contexts == ["update 0", "update 1", "update 2"]
+
+    def test_reject_removes_contexts(self, service):
+        """Test rejecting a term also drops its contexts."""
+        service.update_terminology_db({"medical_terms": ["tumor"]}, "ctx")
+        assert asyncio.run(service.reject_term("tumor", user_id=1))
+        with sqlite3.connect(service.db_path) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM term_contexts').fetchone()[0] == 0
+
+class TestContextMigration:
+    """Test cases for migrating the legacy JSON contexts column."""
+
+    def test_json_contexts_are_migrated_once(self, service):
+        """Test JSON contexts move to term_contexts and are not migrated twice."""
+        legacy = [f"old {i}" for i in range(CONTEXTS_PER_TERM + 2)]
+        with sqlite3.connect(service.db_path) as conn:
+            conn.execute(
+                'INSERT INTO terminology (term, category, contexts) VALUES (?, ?, ?)',
+                ("tumor", "medical_terms", json.dumps(legacy))
+            )
+        migrated = KnowledgeBaseService(db_path=service.db_path)
+        KnowledgeBaseService(db_path=service.db_path)
+        with sqlite3.connect(migrated.db_path) as conn:
+            contexts = migrated.get_term_contexts(conn, ["tumor"])["tumor"]
+            assert conn.execute('SELECT contexts FROM terminology').fetchone()[0] is None
+        assert contexts == legacy[-CONTEXTS_PER_TERM:]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,167 @@
+"""
+Test suite for the parallel, resumable knowledge base rebuild.
+"""
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.services import knowledge_rebuild
+from app.services.knowledge_base import KnowledgeBaseService
+from app.services.knowledge_rebuild import KnowledgeRebuilder, count_submissions
+from tests.test_knowledge_base_snapshots import AgendaItems
+
+TEXTS = [
+    "tumor biopsy results",
+    "tumor and metastasis under chemotherapy",
+    "grant funding for the tumor study",
+    "nothing relevant here",
+    "biopsy scheduled",
+]
+
+@pytest.fixture
+def items():
+    agenda = AgendaItems()
+    for item_id, text_ in enumerate(TEXTS, start=1):
+        agenda.add(item_id, {"progress_text": text_})
+    return agenda
+
+@pytest.fixture
+def service(tmp_path):
+    return KnowledgeBaseService(db_path=str(tmp_path / "knowledge_base.db"))
+
+def rebuilder(service, items, workers=1, chunk_size=2):
+    return KnowledgeRebuilder(service, workers=workers, chunk_size=chunk_size, session_factory=items.session_factory)
+
+def frequencies(service):
+    with sqlite3.connect(service.db_path) as conn:
+        return dict(conn.execute('SELECT term, frequency FROM terminology'))
+
+def interrupt(progress):
+    raise RuntimeError("interrupted")
+
+EXPECTED = {"tumor": 3, "biopsy": 2, "metastasis": 1, "chemotherapy": 1, "grant": 1, "funding": 1}
+
+class TestCountSubmissions:
+    """Test cases for the worker function."""
+
+    def test_counts_chunk(self):
+        """Test a chunk yields its batch and per-item term counts."""
+        batch, item_counts = count_submissions([
+            (1, "student_update", {"progress_text": "tumor tumor"}, "2024-01-01T00:00:00"),
+            (2, "faculty_update", {"projects_text": "grant"}, "2024-01-02T00:00:00"),
+        ])
+        assert batch.counts == {"tumor": 2, "grant": 1}
+        assert item_counts[0] == (1, "2024-01-01T00:00:00", '{"tumor": 2}')
+        assert item_counts[1][2] == '{"grant": 1}'
+
+class TestKnowledgeRebuilder:
+    """Test cases for KnowledgeRebuilder."""
+
+    def test_rebuild_counts_full_history(self, service, items):
+        """Test every submission is counted once and progress is reported."""
+        progress = rebuilder(service, items).run()
+        assert frequencies(service) == EXPECTED
+        assert (progress.status, progress.total_items, progress.processed_items) == ("completed", 5, 5)
+        assert progress.last_item_id == 5
+        assert progress.terms == len(EXPECTED)
+
+    def test_process_pool_matches_inline(self, service, items):
+        """Test counting in worker processes gives the same result."""
+        rebuilder(service, items, workers=2, chunk_size=1).run()
+        assert frequencies(service) == EXPECTED
+
+    def test_rebuild_replaces_live_counts(self, service, items):
+        """Test inflated counts are reset, stale terms dropped and approved terms kept."""
+        service.update_terminology_db({"medical_terms": ["tumor"] * 50, "research_methods": ["stale", "curated"]}, "old")
+        asyncio.run(service.approve_term("curated", user_id=1))
+        rebuilder(service, items).run()
+        counts = frequencies(service)
+        assert counts["tumor"] == 3
+        assert "stale" not in counts
+        assert "curated" in counts
+        with sqlite3.connect(service.db_path) as conn:
+            assert conn.execute(
+                "SELECT confidence_score FROM terminology WHERE term = 'curated'"
+            ).fetchone()[0] == 1.0
+            assert conn.execute('SELECT COUNT(*) FROM snapshot_items').fetchone()[0] == 5
+
+    def test_interrupted_rebuild_resumes(self, service, items):
+        """Test a failed rebuild continues after the last flushed chunk."""
+        with pytest.raises(RuntimeError):
+            rebuilder(service, items).run(on_progress=interrupt)
+        assert "tumor" not in frequencies(service)  # Live tables untouched
+
+        progress = rebuilder(service, items).run()
+        assert progress.resumed_from == 2
+        assert progress.processed_items == 5
+        assert frequencies(service) == EXPECTED
+
+    def test_restart_discards_partial_rebuild(self, service, items):
+        """Test restart recounts from the beginning."""
+        with pytest.raises(RuntimeError):
+            rebuilder(service, items).run(on_progress=interrupt)
+        progress = rebuilder(service, items).run(restart=True)
+        assert progress.resumed_from is None
+        assert frequencies(service) == EXPECTED
+
+    def test_incremental_snapshots_continue_after_rebuild(self, service, items):
+        """Test the next snapshot skips rebuilt items and handles later edits."""
+        rebuilder(service, items).run()
+        snapshot = asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+        assert snapshot.total_submissions == 0
+
+        items.clock = datetime.now()
+        items.edit(1, {"progress_text": "metastasis results"})
+        snapshot = asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+        assert snapshot.total_submissions == 1
+        counts = frequencies(service)
+        assert (counts["tumor"], counts["biopsy"], counts["metastasis"]) == (2, 1, 2)
+
+    def test_watermark_uses_database_clock(self, service, items, monkeypatch):
+        """Test edits made during or after a rebuild are found even if the app clock runs ahead."""
+        class SkewedClock(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(hours=1)
+
+        monkeypatch.setattr(knowledge_rebuild, "datetime", SkewedClock)
+        rebuilder(service, items).run()
+
+        items.clock = datetime.now()
+        items.edit(1, {"progress_text": "metastasis results"})
+        snapshot = asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+        assert snapshot.total_submissions == 1
+        assert frequencies(service)["metastasis"] == 2
+
+    def test_swap_waits_for_running_snapshot(self, service, items, monkeypatch):
+        """Test a swap can't land between a snapshot's counting and its write."""
+        counted = threading.Event()
+        release = threading.Event()
+        count = service._count_new_submissions
+
+        def slow_count(*args):
+            result = count(*args)
+            counted.set()
+            release.wait(5)
+            return result
+
+        monkeypatch.setattr(service, "_count_new_submissions", slow_count)
+        snapshot = threading.Thread(
+            target=lambda: asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+        )
+        snapshot.start()
+        assert counted.wait(5)
+
+        rebuild = threading.Thread(target=rebuilder(service, items).run)
+        rebuild.start()
+        rebuild.join(0.5)
+        assert rebuild.is_alive()  # Swap blocked behind the snapshot
+
+        release.set()
+        snapshot.join(5)
+        rebuild.join(5)
+        assert frequencies(service) == EXPECTED
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,160 @@
+"""
+Test suite for the LLM scheduler (concurrency limit, priorities, admission control).
+"""
+import asyncio
+import pytest
+from app.services.llm_scheduler import (
+    LLMScheduler, LLMOverloadedError,
+    PRIORITY_FACULTY, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+)
+
+class TestLLMScheduler:
+    """Test cases for LLMScheduler."""
+
+    def test_concurrency_is_bounded(self):
+        """Test no more than max_concurrency jobs run at once."""
+        scheduler = LLMScheduler(max_concurrency=2, max_queue=10)
+        running = []
+        peak = []
+
+        async def job():
+            async with scheduler.slot():
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        async def run():
+            await asyncio.gather(*(job() for _ in range(6)))
+
+        asyncio.run(run())
+        assert max(peak) == 2
+        assert scheduler.active == 0
+        assert scheduler.stats()["admitted"] == 6
+
+    def test_priority_order(self):
+        """Test queued faculty work is served before interactive and batch work."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=10)
+        order = []
+
+        async def job(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                await asyncio.sleep(0.005)
+
+        async def run():
+            blocker = asyncio.ensure_future(job("first", PRIORITY_INTERACTIVE))
+            await asyncio.sleep(0)
+            await asyncio.gather(
+                job("batch", PRIORITY_BATCH),
+                job("student", PRIORITY_INTERACTIVE),
+                job("faculty", PRIORITY_FACULTY),
+                blocker,
+            )
+
+        asyncio.run(run())
+        assert order == ["first", "faculty", "student", "batch"]
+
+    def test_queue_full_rejects_with_retry_after(self):
+        """Test admission control rejects work once the queue is full."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=2)
+
+        async def hold():
+            async with scheduler.slot():
+                await asyncio.sleep(0.05)
+
+        async def run():
+            tasks = [asyncio.ensure_future(hold()) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            with pytest.raises(LLMOverloadedError) as exc_info:
+                await scheduler.acquire(PRIORITY_INTERACTIVE)
+            await asyncio.gather(*tasks)
+            return exc_info.value
+
+        error = asyncio.run(run())
+        assert error.status_code == 429
+        assert error.retry_after >= 1
+
+    def test_batch_gets_smaller_queue_share(self):
+        """Test batch work is rejected before the queue is full for interactive users."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=4)
+
+        async def hold():
+            async with scheduler.slot():
+                await asyncio.sleep(0.05)
+
+        async def run():
+            tasks = [asyncio.ensure_future(hold()) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            with pytest.raises(LLMOverloadedError):
+                scheduler.check_admission(PRIORITY_BATCH)
+            scheduler.check_admission(PRIORITY_INTERACTIVE)
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+
+    def test_queue_timeout(self):
+        """Test waiting past the queue timeout raises 503 and leaves no slot leaked."""
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=4, queue_timeout=0.01)
+
+        async def run():
+            await scheduler.acquire()
+            with pytest.raises(LLMOverloadedError) as exc_info:
+                await scheduler.acquire()
+            scheduler.release()
+            return exc_info.value
+
+        error = asyncio.run(run())
+        assert error.status_code == 503
+        assert scheduler.active == 0
+        assert scheduler.queued == 0
+
+class TestAdaptiveConcurrency:
+    """Test cases for the AIMD concurrency limit."""
+
+    def test_failures_shrink_limit(self):
+        """Test failures cut the limit multiplicatively down to the floor."""
+        scheduler = LLMScheduler(max_concurrency=8, min_concurrency=1)
+        scheduler.record_outcome(1.0, ok=True)
+        for _ in range(10):
+            scheduler.record_outcome(1.0, ok=False)
+        assert scheduler.concurrency_limit == 1
+
+    def test_slow_responses_shrink_limit(self):
+        """Test latency per token far above the baseline is treated as overload."""
+        scheduler = LLMScheduler(max_concurrency=8, latency_tolerance=2.0)
+        scheduler.record_outcome(1.0, ok=True, tokens=100)
+        scheduler.record_outcome(5.0, ok=True, tokens=100)
+        assert scheduler.concurrency_limit < 8
+
+    def test_long_generations_are_not_overload(self):
+        """Test a healthy mix of short and long generations keeps the limit."""
+        scheduler = LLMScheduler(max_concurrency=4, latency_tolerance=2.0)
+        for _ in range(20):
+            scheduler.record_outcome(1.5, ok=True, tokens=30)    # num_predict near 128
+            scheduler.record_outcome(20.0, ok=True, tokens=700)  # long /refine-document chunk
+        assert scheduler.concurrency_limit == 4
+
+    def test_slot_reports_tokens(self):
+        """Test the token count set on a held slot is used for the latency check."""
+        scheduler = LLMScheduler(max_concurrency=4)
+
+        async def run():
+            async with scheduler.slot() as slot:
+                await asyncio.sleep(0.01)
+                slot.tokens = 50
+
+        asyncio.run(run())
+        assert scheduler.stats()["latency_baseline_seconds_per_token"] is not None
+
+    def test_healthy_responses_recover_limit(self):
+        """Test healthy generations grow the limit back additively."""
+        scheduler = LLMScheduler(max_concurrency=4, min_concurrency=1)
+        for _ in range(10):
+            scheduler.record_outcome(1.0, ok=False)
+        for _ in range(20):
+            scheduler.record_outcome(1.0, ok=True)
+        assert scheduler.concurrency_limit == 4
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,57 @@
+"""
+Test suite for the in-process TTL cache and refinement cache keys.
+"""
+import time
+import pytest
+from app.core.cache import MemoryTTLCache
+from app.api.endpoints.text import refinement_cache_key, REFINEMENT_OPTIONS
+
+class TestMemoryTTLCache:
+    """Test cases for MemoryTTLCache."""
+
+    def test_hit_and_miss(self):
+        """Test stored values are returned and counted."""
+        cache = MemoryTTLCache(max_entries=4, ttl=60)
+        cache.set("a", {"value": 1})
+        assert cache.get("a") == {"value": 1}
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expiry(self):
+        """Test entries disappear after their TTL."""
+        cache = MemoryTTLCache(max_entries=4, ttl=60)
+        cache.set("a", 1, expire=0.01)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full."""
+        cache = MemoryTTLCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+class TestRefinementCacheKey:
+    """Test cases for refinement_cache_key."""
+
+    def key(self, text="Some text here.", context="general", knowledge="", model="gemma3:4b"):
+        return refinement_cache_key(text, context, "TEXT: {text}", knowledge, model, REFINEMENT_OPTIONS)
+
+    def test_whitespace_normalized(self):
+        """Test trailing whitespace and line endings do not change the key."""
+        assert self.key("line one  \r\nline two\n") == self.key("line one\nline two")
+
+    def test_inputs_change_key(self):
+        """Test context, knowledge base context and model all address different entries."""
+        base = self.key()
+        assert self.key(context="goals") != base
+        assert self.key(knowledge="Domain Vocabulary: IMRT") != base
+        assert self.key(model="mistral:7b") != base
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,44 @@
+"""
+Test suite for in-process latency metrics.
+"""
+import pytest
+from app.core.metrics import percentile, summarize, LatencyRecorder
+
+class TestPercentile:
+    """Test cases for percentile helpers."""
+
+    def test_nearest_rank(self):
+        """Test nearest-rank percentiles on a known distribution."""
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile(values, 100) == 100.0
+
+    def test_empty_input(self):
+        """Test empty samples summarize to zeros."""
+        stats = summarize([])
+        assert stats["count"] == 0
+        assert stats["p99"] == 0.0
+
+class TestLatencyRecorder:
+    """Test cases for LatencyRecorder."""
+
+    def test_window_keeps_lifetime_totals(self):
+        """Test the rolling window is bounded while totals keep counting."""
+        recorder = LatencyRecorder(window=10)
+        for i in range(25):
+            recorder.record(i / 100)
+        stats = recorder.summary()
+        assert stats["count"] == 10
+        assert stats["total_count"] == 25
+        assert stats["max"] == 0.24
+
+    def test_timer_records_sample(self):
+        """Test the timer context manager records one sample."""
+        recorder = LatencyRecorder()
+        with recorder.time():
+            pass
+        assert recorder.summary()["total_count"] == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,158 @@
+"""
+Test suite for model warm-up, keep-alive and cold/warm latency tracking.
+"""
+import asyncio
+import json
+from datetime import datetime
+import httpx
+import pytest
+from app.core.config import settings
+from app.services.ollama_client import OllamaClient
+from app.services.model_warmup import ModelWarmupManager
+
+def make_client(handler, hosts=("ollama-a", "ollama-b")):
+    """Client whose backends are served by an in-process stub transport."""
+    client = OllamaClient([f"http://{host}:11434/api/generate" for host in hosts])
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+class TestWorkingHours:
+    """Test cases for the working-hours keep_alive policy."""
+
+    def test_weekday_window(self):
+        """Test keep_alive is only set inside the configured window."""
+        manager = ModelWarmupManager(make_client(lambda r: None), keep_alive="45m", working_hours="07:00-19:00")
+        assert manager.apply_keep_alive(datetime(2025, 3, 3, 9, 0))  # Monday
+        assert manager.client.keep_alive == "45m"
+        assert not manager.apply_keep_alive(datetime(2025, 3, 3, 19, 0))
+        assert manager.client.keep_alive is None
+        assert not manager.apply_keep_alive(datetime(2025, 3, 8, 9, 0))  # Saturday
+
+    def test_window_across_midnight(self):
+        """Test a window that wraps past midnight."""
+        manager = ModelWarmupManager(make_client(lambda r: None), working_hours="20:00-02:00", working_days="0,1,2,3,4,5,6")
+        assert manager.in_working_hours(datetime(2025, 3, 3, 23, 0))
+        assert manager.in_working_hours(datetime(2025, 3, 3, 1, 0))
+        assert not manager.in_working_hours(datetime(2025, 3, 3, 12, 0))
+
+class TestWarmUp:
+    """Test cases for preloading and cold/warm classification."""
+
+    def test_preloads_every_backend(self):
+        """Test warm_up sends an empty prompt with keep_alive to each backend."""
+        seen = []
+
+        def handler(request):
+            seen.append((request.url.host, json.loads(request.content)))
+            return httpx.Response(200, json={"response": "", "done": True, "done_reason": "load"})
+
+        async def run():
+            manager = ModelWarmupManager(make_client(handler), keep_alive="30m")
+            manager.client.keep_alive = "30m"
+            return manager, await manager.warm_up()
+
+        manager, warmed = asyncio.run(run())
+        assert warmed == 2
+        assert sorted(host for host, _ in seen) == ["ollama-a", "ollama-b"]
+        assert all(body["prompt"] == "" and body["keep_alive"] == "30m" for _, body in seen)
+        assert manager.stats()["warmups"] == 2
+        # Preloads are not counted as cold or warm generations
+        assert manager.client.cold_latency.total_count == 0
+        assert manager.client.warm_latency.total_count == 0
+
+    def test_failed_backend_counted(self):
+        """Test a backend that cannot load the model is reported, not raised."""
+        def handler(request):
+            if request.url.host == "ollama-a":
+                return httpx.Response(500, text="out of memory")
+            return httpx.Response(200, json={"done": True, "done_reason": "load"})
+
+        async def run():
+            manager = ModelWarmupManager(make_client(handler))
+            return manager, await manager.warm_up()
+
+        manager, warmed = asyncio.run(run())
+        assert warmed == 1
+        assert manager.failures == 1
+
+    def test_cold_and_warm_latency(self):
+        """Test generations are split by the load_duration Ollama reports."""
+        loads = iter([3_000_000_000, 1_000_000, 0])
+
+        def handler(request):
+            return httpx.Response(200, json={"response": "ok", "done": True, "load_duration": next(loads)})
+
+        async def run():
+            client = make_client(handler, hosts=("ollama-a",))
+            for _ in range(3):
+                await client.generate("p")
+            return client
+
+        client = asyncio.run(run())
+        stats = client.stats()
+        assert stats["cold_seconds"]["total_count"] == 1
+        assert stats["warm_seconds"]["total_count"] == 2
+        assert stats["model_load_seconds"]["max"] == 3.0
+
+    def test_no_keep_alive_outside_hours(self):
+        """Test payloads carry no keep_alive override when none is set."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"response": "ok", "done": True})
+
+        async def run():
+            client = make_client(handler, hosts=("ollama-a",))
+            await client.generate("p")
+            client.keep_alive = "30m"
+            await client.generate("p")
+            await client.generate("p", keep_alive=0)
+
+        asyncio.run(run())
+        assert "keep_alive" not in bodies[0]
+        assert bodies[1]["keep_alive"] == "30m"
+        assert bodies[2]["keep_alive"] == 0
+
+    def test_warm_up_uses_refinement_runner_options(self):
+        """Test the preload loads the runner refinement calls use, not Ollama's defaults."""
+        from app.core.prompt_budget import RUNNER_OPTIONS
+        from app.services.model_warmup import model_warmup
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={"done": True, "done_reason": "load"})
+
+        async def run():
+            manager = ModelWarmupManager(make_client(handler, hosts=("ollama-a",)), options=RUNNER_OPTIONS)
+            await manager.warm_up()
+
+        asyncio.run(run())
+        assert model_warmup.options == RUNNER_OPTIONS
+        assert bodies[0]["options"]["num_ctx"] == settings.LLM_MAX_CONTEXT_TOKENS
+        assert bodies[0]["options"]["num_thread"] == RUNNER_OPTIONS["num_thread"]
+
+    def test_startup_failure_keeps_loop_running(self):
+        """Test an exception in the first warm-up doesn't end the keep-warm task."""
+        manager = ModelWarmupManager(make_client(lambda r: None), interval=0.01)
+        manager.apply_keep_alive = lambda: True
+        calls = []
+
+        async def failing_warm_up():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        async def run():
+            manager.warm_up = failing_warm_up
+            manager.start()
+            await asyncio.sleep(0.1)
+            alive = not manager._task.done()
+            manager.stop()
+            return alive
+
+        assert asyncio.run(run())
+        assert len(calls) > 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,154 @@
+"""
+Test suite for multi-backend Ollama routing against stub backends.
+"""
+import asyncio
+import json
+import httpx
+import pytest
+from app.core.prompt_budget import RUNNER_OPTIONS
+from app.services.ollama_client import OllamaClient, OllamaError, OllamaUnavailableError
+
+def make_client(handler, hosts=("ollama-a", "ollama-b"), failure_threshold=2):
+    """Client whose backends are served by an in-process stub transport."""
+    client = OllamaClient(
+        [f"http://{host}:11434/api/generate" for host in hosts],
+        failure_threshold=failure_threshold,
+        reset_timeout=60
+    )
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+def ok(request, text="ok"):
+    return httpx.Response(200, json={"response": text, "done": True})
+
+class TestOllamaRouting:
+    """Test cases for backend selection and failover."""
+
+    def test_least_outstanding_routing(self):
+        """Test concurrent calls spread across backends instead of piling on one."""
+        seen = []
+
+        async def handler(request):
+            seen.append(request.url.host)
+            await asyncio.sleep(0.01)
+            return ok(request)
+
+        async def run():
+            client = make_client(handler)
+            await asyncio.gather(*(client.generate("p") for _ in range(4)))
+            return client
+
+        client = asyncio.run(run())
+        assert seen.count("ollama-a") == 2
+        assert seen.count("ollama-b") == 2
+        assert client.in_flight == 0
+
+    def test_connect_error_fails_over(self):
+        """Test a refused connection is retried on the next backend."""
+        def handler(request):
+            if request.url.host == "ollama-a":
+                raise httpx.ConnectError("refused")
+            return ok(request, "from b")
+
+        async def run():
+            client = make_client(handler)
+            results = [await client.generate("p") for _ in range(3)]
+            return client, results
+
+        client, results = asyncio.run(run())
+        assert all(r["response"] == "from b" for r in results)
+        assert client.backends[0].breaker.state == "open"
+        assert client.backends[1].breaker.state == "closed"
+
+    def test_all_backends_down(self):
+        """Test calls fail fast once every backend's breaker is open."""
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        async def run():
+            client = make_client(handler, failure_threshold=1)
+            with pytest.raises(OllamaError):
+                await client.generate("p")
+            assert client.is_unavailable()
+            with pytest.raises(OllamaUnavailableError):
+                await client.generate("p")
+
+        asyncio.run(run())
+
+    def test_model_awareness(self):
+        """Test requests only go to backends that have the model installed."""
+        seen = []
+
+        def handler(request):
+            if request.url.path == "/api/tags":
+                models = ["gemma3:4b"] if request.url.host == "ollama-b" else ["llama3:8b"]
+                return httpx.Response(200, json={"models": [{"name": m} for m in models]})
+            seen.append((request.url.host, json.loads(request.content)["model"]))
+            return ok(request)
+
+        async def run():
+            client = make_client(handler)
+            await client.refresh_models()
+            for _ in range(3):
+                await client.generate("p", model="gemma3:4b")
+            with pytest.raises(OllamaError) as exc_info:
+                await client.generate("p", model="mistral:7b")
+            return exc_info.value
+
+        error = asyncio.run(run())
+        assert seen == [("ollama-b", "gemma3:4b")] * 3
+        assert error.status_code == 404
+
+class TestProbe:
+    """Test cases for backend health probes."""
+
+    def test_probe_uses_runner_options(self):
+        """Test a probe loads the same runner as refinement calls, not Ollama's defaults."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return ok(request)
+
+        async def run():
+            client = make_client(handler, hosts=("ollama-a",))
+            await client.probe(client.backends[0])
+
+        asyncio.run(run())
+        assert bodies[0]["options"] == {**RUNNER_OPTIONS, "num_predict": 1}
+
+class TestMalformedResponses:
+    """Test cases for garbled Ollama output."""
+
+    def test_malformed_stream_line(self):
+        """Test a broken NDJSON line raises OllamaError and counts against the backend."""
+        def handler(request):
+            body = json.dumps({"response": "Hel", "done": False}) + "\n" + '{"response": "lo", "do'
+            return httpx.Response(200, content=body.encode())
+
+        async def run():
+            client = make_client(handler, hosts=("ollama-a",), failure_threshold=1)
+            chunks = []
+            with pytest.raises(OllamaError):
+                async for chunk in client.stream_generate("p"):
+                    chunks.append(chunk)
+            return client, chunks
+
+        client, chunks = asyncio.run(run())
+        assert [c["response"] for c in chunks] == ["Hel"]
+        assert client.backends[0].breaker.state == "open"
+
+    def test_malformed_body(self):
+        """Test a non-JSON generate body raises OllamaError and counts against the backend."""
+        async def run():
+            client = make_client(lambda request: httpx.Response(200, text="<html>bad gateway"), hosts=("ollama-a",),
+                                 failure_threshold=1)
+            with pytest.raises(OllamaError):
+                await client.generate("p")
+            return client
+
+        client = asyncio.run(run())
+        assert client.backends[0].breaker.state == "open"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+"""
+Test suite for the offline Ollama stub used by the refinement benchmark.
+"""
+import asyncio
+import httpx
+import pytest
+from scripts.ollama_stub import StubConfig, create_stub_app
+from app.api.endpoints.text import ACADEMIC_PROMPTS, parse_refinement
+from app.services.ollama_client import OllamaClient, OllamaError
+
+def make_client(config):
+    """Ollama client talking to an in-process stub app."""
+    stub_app = create_stub_app(config)
+    client = OllamaClient(["http://stub:11434/api/generate"])
+    client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app))
+    return client, stub_app.state.stub
+
+PROMPT = ACADEMIC_PROMPTS["general"].format(text="i finished the analysis")
+
+class TestOllamaStub:
+    """Test cases for the stub's generate API."""
+
+    def test_refine_mode_round_trip(self):
+        """Test refine mode answers with JSON the refinement parser accepts."""
+        async def run():
+            client, stub = make_client(StubConfig())
+            return await client.generate(PROMPT), stub
+
+        body, stub = asyncio.run(run())
+        response, parsed = parse_refinement("i finished the analysis", body["response"])
+        assert parsed
+        assert response.refined_text == "I finished the analysis."
+        assert body["done_reason"] == "stop"
+        assert body["eval_count"] > 0
+        assert stub.requests == 1
+
+    def test_streaming_chunks(self):
+        """Test streaming mode yields tokens followed by a final done chunk."""
+        async def run():
+            client, _ = make_client(StubConfig(mode="echo"))
+            return [chunk async for chunk in client.stream_generate("one two three")]
+
+        chunks = asyncio.run(run())
+        assert "".join(c["response"] for c in chunks) == "one two three"
+        assert chunks[-1]["done"] and chunks[-1]["eval_count"] == 3
+        assert not any(c["done"] for c in chunks[:-1])
+
+    def test_num_predict_truncates(self):
+        """Test output is cut at num_predict tokens like a real model."""
+        async def run():
+            client, _ = make_client(StubConfig(mode="canned", canned=["a b c d e"]))
+            return await client.generate("p", options={"num_predict": 2})
+
+        body = asyncio.run(run())
+        assert body["response"] == "a b"
+        assert body["done_reason"] == "length"
+
+    def test_failure_rate(self):
+        """Test configured failures surface as Ollama errors."""
+        async def run():
+            client, stub = make_client(StubConfig(failure_rate=1.0, failure_status=503))
+            with pytest.raises(OllamaError) as error:
+                await client.generate("p")
+            return error.value, stub
+
+        error, stub = asyncio.run(run())
+        assert error.status_code == 503
+        assert stub.failures == 1
+
+    def test_load_reported_once(self):
+        """Test simulated model load is charged to the first call only."""
+        async def run():
+            client, _ = make_client(StubConfig(load_ms=20))
+            await client.generate("", timeout=5)
+            await client.generate(PROMPT)
+            return client
+
+        client = asyncio.run(run())
+        assert client.warm_latency.total_count == 1
+        assert client.cold_latency.total_count == 0
+
+    def test_latency_distributions(self):
+        """Test sampled latencies follow the configured distribution."""
+        from scripts.ollama_stub import OllamaStub
+        fixed = OllamaStub(StubConfig(latency_ms=200))
+        assert fixed.sample_latency() == 0.2
+        uniform = OllamaStub(StubConfig(latency="uniform", latency_ms=200, jitter_ms=50, seed=1))
+        assert all(0.15 <= uniform.sample_latency() <= 0.25 for _ in range(100))
+        lognormal = OllamaStub(StubConfig(latency="lognormal", latency_ms=200, jitter_ms=100, seed=1))
+        samples = sorted(lognormal.sample_latency() for _ in range(1001))
+        assert 0.15 < samples[500] < 0.25
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""
+Test suite for prompt token budgeting.
+"""
+import pytest
+from app.core.prompt_budget import PromptBudget, estimate_tokens
+
+class TestEstimateTokens:
+    """Test cases for estimate_tokens."""
+
+    def test_counts(self):
+        """Test words, digits and punctuation are counted."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("the cat") == 2
+        assert estimate_tokens("refinement") == 3
+        assert estimate_tokens("n=128, p<0.05.") == 13
+
+    def test_grows_with_length(self):
+        """Test longer text gets a larger estimate."""
+        assert estimate_tokens("word " * 200) > estimate_tokens("word " * 100)
+
+class TestPromptBudget:
+    """Test cases for PromptBudget."""
+
+    LINES = [
+        "Domain Vocabulary - Medical Terms: " + ", ".join(f"term{i}" for i in range(10)),
+        "Common Abbreviations: IMRT, VMAT, SBRT",
+        "Watch for: passive voice overuse, run-on sentences",
+    ]
+
+    def test_small_input_small_answer(self):
+        """Test short text gets the minimum answer room and all context in the fixed window."""
+        budget = PromptBudget()
+        plan = budget.build("Fix: short text", "short text", self.LINES, base_options={"temperature": 0.2})
+        assert plan.options == {"temperature": 0.2, "num_ctx": 2048, "num_predict": 128}
+        assert plan.accounting["context_lines"] == 3
+        assert plan.accounting["context_lines_trimmed"] == 0
+        assert plan.prompt.endswith(self.LINES[-1])
+
+    def test_predict_scales_with_input(self):
+        """Test num_predict grows with the input while num_ctx never changes."""
+        budget = PromptBudget()
+        text = "The patient cohort was analysed. " * 40
+        short = budget.build("Fix: short text", "short text")
+        plan = budget.build("Fix: " + text, text)
+        assert plan.options["num_predict"] > short.options["num_predict"]
+        assert plan.options["num_ctx"] == short.options["num_ctx"] == budget.max_ctx
+        assert plan.options["num_ctx"] >= plan.accounting["prompt_tokens"] + plan.options["num_predict"]
+        assert budget.stats()["num_ctx"] == 2048
+
+    def test_runner_options_match_plans(self):
+        """Test warm-up options load the same runner as planned requests."""
+        budget = PromptBudget(max_ctx=1024)
+        plan = budget.build("Fix: text", "text", base_options={"num_thread": 4})
+        runner = budget.runner_options({"num_thread": 4})
+        assert runner == {k: v for k, v in plan.options.items() if k != "num_predict"}
+
+    def test_context_trimmed_by_priority(self):
+        """Test low priority lines are dropped and the top line is cut back to fit."""
+        text = "word " * 190
+        budget = PromptBudget(max_ctx=512, max_predict=300)
+        base_tokens = estimate_tokens(text)
+        plan = budget.build(text, text, self.LINES)
+        assert plan.accounting["context_lines_trimmed"] > 0
+        assert plan.accounting["prompt_tokens"] + plan.options["num_predict"] <= 512
+        assert plan.accounting["prompt_tokens"] > base_tokens
+        assert "Medical Terms: term0" in plan.prompt
+        assert "Watch for" not in plan.prompt
+        assert budget.stats()["context_trimmed"] == 1
+
+    def test_overflow_shrinks_predict(self):
+        """Test a prompt larger than the window is flagged and keeps answer room bounded."""
+        text = "word " * 600
+        budget = PromptBudget(max_ctx=512)
+        plan = budget.build(text, text, self.LINES)
+        assert plan.accounting["overflow"]
+        assert plan.accounting["context_lines"] == 0
+        assert plan.options["num_ctx"] == 512
+        assert plan.options["num_predict"] == budget.min_predict
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,94 @@
+"""
+Test suite for the cached, versioned enhanced prompt context.
+"""
+import asyncio
+import threading
+import pytest
+from app.services.knowledge_base import KnowledgeBaseService
+from tests.test_knowledge_base_snapshots import AgendaItems
+
+@pytest.fixture
+def service(tmp_path):
+    service = KnowledgeBaseService(db_path=str(tmp_path / "knowledge_base.db"))
+    # Frequent enough to pass the 0.6 confidence threshold
+    service.update_terminology_db({"medical_terms": ["tumor"] * 4, "research_methods": ["cohort"] * 4}, "seed")
+    return service
+
+@pytest.fixture
+def vocabulary_reads(service, monkeypatch):
+    reads = []
+    original = service.get_domain_vocabulary
+
+    def counting(*args, **kwargs):
+        reads.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(service, "get_domain_vocabulary", counting)
+    return reads
+
+class TestPromptContextCache:
+    """Test cases for KnowledgeBaseService.get_enhanced_prompt_sections caching."""
+
+    def test_repeated_calls_skip_sqlite(self, service, vocabulary_reads):
+        """Test the vocabulary is queried once while the version is unchanged."""
+        first = service.get_enhanced_prompt_sections()
+        second = service.get_enhanced_prompt_sections()
+        assert first == second
+        assert any("tumor" in section for section in first)
+        assert service.get_enhanced_prompt_context("challenges") == service.get_enhanced_prompt_context("general")
+        assert len(vocabulary_reads) == 1
+
+    def test_async_miss_builds_off_event_loop(self, service, vocabulary_reads, monkeypatch):
+        """Test an async cache miss runs the sqlite query in a worker thread and fills the cache."""
+        threads = []
+        original = service._build_prompt_sections
+
+        def recording():
+            threads.append(threading.current_thread())
+            return original()
+
+        monkeypatch.setattr(service, "_build_prompt_sections", recording)
+        first = asyncio.run(service.aget_enhanced_prompt_sections())
+        second = asyncio.run(service.aget_enhanced_prompt_sections())
+        assert first == second == service.get_enhanced_prompt_sections()
+        assert threads and threads[0] is not threading.main_thread()
+        assert len(vocabulary_reads) == 1
+
+    def test_returned_sections_are_copies(self, service):
+        """Test callers can't modify the cached sections."""
+        service.get_enhanced_prompt_sections().append("mutated")
+        assert "mutated" not in service.get_enhanced_prompt_sections()
+
+    def test_approve_and_reject_invalidate(self, service, vocabulary_reads):
+        """Test approving or rejecting a term rebuilds the context."""
+        service.get_enhanced_prompt_sections()
+        asyncio.run(service.reject_term("tumor", user_id=1))
+        sections = service.get_enhanced_prompt_sections()
+        assert not any("tumor" in section for section in sections)
+        assert len(vocabulary_reads) == 2
+
+        version = service.version
+        asyncio.run(service.approve_term("cohort", user_id=1))
+        assert service.version == version + 1
+        service.get_enhanced_prompt_sections()
+        assert len(vocabulary_reads) == 3
+
+    def test_snapshot_invalidates(self, service, vocabulary_reads):
+        """Test a snapshot bumps the version so new vocabulary is picked up."""
+        items = AgendaItems()
+        items.add(1, {"progress_text": "metastasis " * 5})
+        assert not any("metastasis" in s for s in service.get_enhanced_prompt_sections())
+
+        asyncio.run(service.snapshot_submissions(session_factory=items.session_factory))
+        assert any("metastasis" in s for s in service.get_enhanced_prompt_sections())
+        assert len(vocabulary_reads) == 2
+
+    def test_entries_expire(self, service, vocabulary_reads):
+        """Test the TTL bounds staleness from writes made by other processes."""
+        service.prompt_context_cache.ttl = 0
+        service.get_enhanced_prompt_sections()
+        service.get_enhanced_prompt_sections()
+        assert len(vocabulary_reads) == 2
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,105 @@
+"""
+Test suite for the concurrent LLM QA runner in text_testing.
+"""
+import asyncio
+import httpx
+import pytest
+from scripts.ollama_stub import StubConfig, create_stub_app
+from app.api.endpoints import text_testing
+from app.api.endpoints.text_testing import (
+    QARunRequest, compare_to_baseline, performance_by_context, run_all_tests, run_test_suite
+)
+from app.services.ollama_client import ollama_client
+
+class FakeUser:
+    id = 1
+    role = "admin"
+
+@pytest.fixture
+def stub(request):
+    """Point the global Ollama client at an in-process stub."""
+    config = getattr(request, "param", StubConfig(latency_ms=20, tokens_per_sec=0))
+    stub_app = create_stub_app(config)
+    previous = ollama_client._client
+    ollama_client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app))
+    yield stub_app.state.stub
+    ollama_client._client = previous
+
+def make_result(context, latency, passed=True, parse_failed=False, error=False, tokens_per_sec=10.0):
+    return text_testing.TestResult(
+        test_name="t", input_text="in", output_text="out", passed=passed, issues=[],
+        length_ratio=1.0, context=context, latency_seconds=latency,
+        tokens_per_sec=tokens_per_sec, parse_failed=parse_failed, error=error
+    )
+
+class TestRunTestSuite:
+    """Test cases for running test cases concurrently against the stub."""
+
+    def test_repeats_and_concurrency(self, stub):
+        """Test every case runs once per repeat and runs overlap."""
+        cases = text_testing.TEST_CASES[:4]
+        results = asyncio.run(run_test_suite(cases, FakeUser(), concurrency=4, repeats=2))
+        assert len(results) == 8
+        assert sorted(r.run for r in results) == [1] * 4 + [2] * 4
+        assert all(not r.error and r.latency_seconds > 0 for r in results)
+        assert stub.max_active > 1
+
+    def test_every_repeat_reaches_the_model(self, stub):
+        """Test identical concurrent repeats are not coalesced into shared generations."""
+        cases = text_testing.TEST_CASES[:3]
+        results = asyncio.run(run_test_suite(cases, FakeUser(), concurrency=16, repeats=3))
+        assert stub.requests == 9
+        assert all(r.queue_seconds is not None and r.generation_seconds > 0 for r in results)
+        assert all(r.generation_seconds <= r.latency_seconds for r in results)
+
+    @pytest.mark.parametrize("stub", [StubConfig(mode="canned", canned=["I cannot help with that."])], indirect=True)
+    def test_parse_failures_recorded(self, stub):
+        """Test unusable model output is counted as a parse failure."""
+        results = asyncio.run(run_test_suite(text_testing.TEST_CASES[:2], FakeUser()))
+        assert all(r.parse_failed and not r.passed for r in results)
+        assert performance_by_context(results)["overall"]["parse_failure_rate"] == 1.0
+
+    def test_endpoint_with_baseline(self, stub, tmp_path, monkeypatch):
+        """Test the endpoint saves a baseline and compares the next run to it."""
+        monkeypatch.setattr(text_testing, "QA_REPORT_DIR", str(tmp_path))
+        first = asyncio.run(run_all_tests(QARunRequest(concurrency=3, save_baseline=True), current_user=FakeUser()))
+        assert first["baseline_comparison"] is None
+        assert (tmp_path / "baseline.json").exists()
+
+        second = asyncio.run(run_all_tests(QARunRequest(concurrency=3), current_user=FakeUser()))
+        assert set(second["baseline_comparison"]["changes"]) == set(second["performance"])
+        assert second["qa_report"]["generated"]
+        report = open(second["qa_report"]["location"], encoding="utf-8").read()
+        assert "## Performance" in report and "## Baseline Comparison" in report
+
+class TestPerformanceStats:
+    """Test cases for per-context statistics and baseline comparison."""
+
+    def test_by_context(self):
+        """Test stats are grouped per context with an overall entry."""
+        results = [
+            make_result("goals", 1.0), make_result("goals", 3.0, passed=False),
+            make_result("challenges", 2.0, parse_failed=True), make_result("challenges", 9.0, error=True),
+        ]
+        stats = performance_by_context(results)
+        assert list(stats) == ["overall", "challenges", "goals"]
+        assert stats["goals"]["pass_rate"] == 0.5
+        assert stats["goals"]["latency_seconds"]["p95"] == 3.0
+        assert stats["challenges"]["parse_failure_rate"] == 1.0
+        assert stats["challenges"]["error_rate"] == 0.5
+        assert stats["challenges"]["latency_seconds"]["count"] == 1
+
+    def test_regressions_flagged(self):
+        """Test slower p95 and lower pass rates are reported as regressions."""
+        baseline = {"created": "2025-01-01", "model": "m", "performance": performance_by_context(
+            [make_result("goals", 1.0), make_result("goals", 1.0)]
+        )}
+        current = performance_by_context([make_result("goals", 1.0), make_result("goals", 2.0, passed=False)])
+        comparison = compare_to_baseline(current, baseline)
+        assert comparison["changes"]["goals"]["p95_seconds"] == 1.0
+        assert comparison["changes"]["goals"]["pass_rate"] == -0.5
+        assert any("p95 latency up" in r for r in comparison["regressions"])
+        assert any("pass rate down" in r for r in comparison["regressions"])
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,36 @@
+"""
+Test suite for incremental refined_text parsing used by streaming refinement.
+"""
+import json
+import pytest
+from app.core.json_extract import JSONObjectExtractor
+
+class TestRefinedTextStreaming:
+    """Test cases for streaming refined_text with JSONObjectExtractor."""
+
+    def feed_all(self, pieces):
+        parser = JSONObjectExtractor()
+        deltas = [parser.feed(p) for p in pieces]
+        return parser, deltas
+
+    def test_token_by_token(self):
+        """Test text is emitted as soon as its tokens arrive."""
+        pieces = ['{"refined', '_text": "The ', 'results ', 'were', ' clear."', ', "suggestions": []}']
+        parser, deltas = self.feed_all(pieces)
+        assert deltas == ["", "The ", "results ", "were", " clear.", ""]
+        assert parser.streamed_text == "The results were clear."
+
+    def test_escapes_split_across_chunks(self):
+        """Test escapes and unicode sequences split between chunks decode correctly."""
+        value = 'Line one\nSaid "hi" µm \\ done'
+        encoded = json.dumps({"refined_text": value})
+        parser, _ = self.feed_all([encoded[i:i + 3] for i in range(0, len(encoded), 3)])
+        assert parser.streamed_text == value
+
+    def test_fenced_preamble_ignored(self):
+        """Test text before the JSON object is not emitted."""
+        parser, _ = self.feed_all(['Sure! ```json\n', '{"refined_text": "ok"}', '\n```'])
+        assert parser.streamed_text == "ok"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,79 @@
+"""
+Test suite for single-flight request coalescing.
+"""
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+class TestSingleFlight:
+    """Test cases for SingleFlight."""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent keys run the work once and all get the result."""
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "refined"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("same", work) for _ in range(5)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [r for r, _ in results] == ["refined"] * 5
+        assert sum(1 for _, shared in results if shared) == 4
+        assert flights.in_flight() == 0
+
+    def test_distinct_keys_run_separately(self):
+        """Test different keys are not coalesced."""
+        flights = SingleFlight()
+
+        async def run():
+            return await asyncio.gather(
+                flights.do("a", lambda: asyncio.sleep(0, result="a")),
+                flights.do("b", lambda: asyncio.sleep(0, result="b")),
+            )
+
+        results = asyncio.run(run())
+        assert [r for r, _ in results] == ["a", "b"]
+        assert flights.stats()["executions"] == 2
+
+    def test_errors_reach_every_waiter(self):
+        """Test a failing flight raises in all callers and is not retained."""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            return await asyncio.gather(
+                *(flights.do("k", work) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flights.in_flight() == 0
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test a disconnecting caller leaves the shared work running for the rest."""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flights.do("k", work))
+            second = asyncio.ensure_future(flights.do("k", work))
+            await asyncio.sleep(0.005)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == ("done", True)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
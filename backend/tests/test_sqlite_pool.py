@@ -0,0 +1,120 @@
+"""
+Test suite for the SQLite connection manager.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import pytest
+from app.core.sqlite_pool import SQLiteConnectionManager
+
+@pytest.fixture
+def manager(tmp_path):
+    db = SQLiteConnectionManager(str(tmp_path / "data" / "test.db"), readers=2)
+    db.write(lambda conn: conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    yield db
+    db.close()
+
+def count(conn):
+    return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+class TestSQLiteConnectionManager:
+    """Test cases for SQLiteConnectionManager."""
+
+    def test_wal_and_pragmas(self, manager):
+        """Test the database runs in WAL mode with tuned pragmas on readers."""
+        assert manager.read(lambda conn: conn.execute("PRAGMA journal_mode").fetchone()[0]) == "wal"
+        assert manager.read(lambda conn: conn.execute("PRAGMA synchronous").fetchone()[0]) == 1  # NORMAL
+        assert manager.read(lambda conn: conn.execute("PRAGMA busy_timeout").fetchone()[0]) == 5000
+
+    def test_write_commits_and_returns(self, manager):
+        """Test a write runs in a committed transaction and returns its result."""
+        row_id = manager.write(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('a')").lastrowid)
+        assert row_id == 1
+        with sqlite3.connect(manager.db_path) as conn:
+            assert count(conn) == 1
+
+    def test_failed_write_rolls_back(self, manager):
+        """Test an exception rolls back the whole transaction and is raised to the caller."""
+        def failing(conn):
+            conn.execute("INSERT INTO items (name) VALUES ('a')")
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            manager.write(failing)
+        assert manager.read(count) == 0
+        assert manager.stats()["write_errors"] == 1
+
+    def test_readers_are_read_only(self, manager):
+        """Test pooled connections cannot write."""
+        with pytest.raises(sqlite3.OperationalError):
+            manager.read(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('a')"))
+
+    def test_reads_proceed_during_a_write(self, manager):
+        """Test a reader sees the last committed state while a write transaction is open."""
+        manager.write(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('a')"))
+        in_write = threading.Event()
+        release = threading.Event()
+
+        def slow_write(conn):
+            conn.execute("INSERT INTO items (name) VALUES ('b')")
+            in_write.set()
+            release.wait(5)
+
+        future = manager.submit_write(slow_write)
+        assert in_write.wait(5)
+        start = time.perf_counter()
+        assert manager.read(count) == 1
+        assert time.perf_counter() - start < 1.0
+        release.set()
+        future.result()
+        assert manager.read(count) == 2
+
+    def test_writes_are_serialized_in_order(self, manager):
+        """Test queued writes run one at a time in submission order."""
+        futures = [
+            manager.submit_write(lambda conn, i=i: conn.execute("INSERT INTO items (name) VALUES (?)", (str(i),)))
+            for i in range(20)
+        ]
+        for future in futures:
+            future.result()
+        names = manager.read(lambda conn: [row[0] for row in conn.execute("SELECT name FROM items ORDER BY id")])
+        assert names == [str(i) for i in range(20)]
+
+    def test_nested_write_is_rejected(self, manager):
+        """Test calling write() from inside a write fails instead of deadlocking."""
+        with pytest.raises(RuntimeError):
+            manager.write(lambda conn: manager.write(lambda inner: None))
+
+    def test_reader_pool_is_bounded(self, manager):
+        """Test no more than max_readers connections are opened."""
+        def borrow():
+            manager.read(lambda conn: time.sleep(0.05))
+
+        threads = [threading.Thread(target=borrow) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert manager.stats()["readers"] <= 2
+
+    def test_async_wrappers(self, manager):
+        """Test awrite and aread run without blocking the event loop."""
+        async def run():
+            await manager.awrite(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('a')"))
+            return await asyncio.gather(*(manager.aread(count) for _ in range(4)))
+
+        assert asyncio.run(run()) == [1, 1, 1, 1]
+
+    def test_close_flushes_queued_writes(self, tmp_path):
+        """Test close waits for queued writes to commit."""
+        db = SQLiteConnectionManager(str(tmp_path / "close.db"))
+        db.write(lambda conn: conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        for _ in range(10):
+            db.submit_write(lambda conn: conn.execute("INSERT INTO items (name) VALUES ('a')"))
+        db.close()
+        with sqlite3.connect(db.db_path) as conn:
+            assert count(conn) == 10
+
+if __name__ == "__main__":
+    pytest.main([__file__])
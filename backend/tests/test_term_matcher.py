@@ -0,0 +1,70 @@
+"""
+Test suite for single-pass terminology matching.
+"""
+import pytest
+from app.core.term_matcher import AhoCorasick, TermMatch, TermMatcher
+from app.services.knowledge_base import term_matcher
+
+class TestAhoCorasick:
+    """Test cases for the Aho-Corasick automaton."""
+
+    def test_overlapping_matches(self):
+        """Test every occurrence is reported, including overlaps and suffixes."""
+        automaton = AhoCorasick()
+        for word in ["he", "she", "his", "hers"]:
+            automaton.add(word, word)
+        found = sorted((start, end, value) for start, end, value in automaton.iter("ushers"))
+        assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+    def test_no_match(self):
+        """Test text without keywords yields nothing."""
+        automaton = AhoCorasick()
+        automaton.add("tumor", "medical")
+        assert list(automaton.iter("nothing to see here")) == []
+
+class TestTermMatcher:
+    """Test cases for TermMatcher."""
+
+    def test_word_boundaries_and_case(self):
+        """Test literals match case-insensitively on word boundaries only."""
+        matcher = TermMatcher({"medical_terms": ["tumor"]})
+        text = "Tumor growth; tumors and TUMOR, antitumor."
+        assert matcher.find(text) == [
+            TermMatch("tumor", "medical_terms", 0, 5),
+            TermMatch("tumor", "medical_terms", 25, 30),
+        ]
+
+    def test_leftmost_longest_within_category(self):
+        """Test a longer term wins over the term it contains."""
+        matcher = TermMatcher({"research_methods": ["PCR", "RT-PCR", "qPCR"]})
+        assert matcher.extract("RT-PCR then PCR and qPCR") == {"research_methods": ["rt-pcr", "pcr", "qpcr"]}
+
+    def test_offsets_point_at_text(self):
+        """Test match offsets slice the original text."""
+        text = "We ran a Western blot and flow cytometry for the NIH R01."
+        for match in term_matcher.find(text):
+            assert text[match.start:match.end].lower() == match.term.lower() or match.category == "proper_nouns"
+
+class TestDomainExtraction:
+    """Test cases for the knowledge base vocabulary and structural rules."""
+
+    def test_categories(self):
+        """Test vocabulary, abbreviations and proper nouns are all tagged."""
+        terms = term_matcher.extract("Dr. Garcia ran qPCR on DNA from the EGFR tumor samples for the NIH grant.")
+        assert terms["research_methods"] == ["qpcr"]
+        assert terms["medical_terms"] == ["tumor"]
+        assert terms["funding_terms"] == ["nih", "grant"]
+        assert terms["abbreviations"] == ["dna", "egfr", "nih"]
+        assert terms["new_abbreviations"] == ["EGFR"]
+        assert terms["proper_nouns"] == ["garcia"]
+
+    def test_lowercase_words_are_not_abbreviations(self):
+        """Test ordinary short words are not reported as abbreviations."""
+        assert "abbreviations" not in term_matcher.extract("the data was not ready for the lab")
+
+    def test_sentence_words_skipped(self):
+        """Test sentence-initial pronouns are not proper nouns."""
+        assert "proper_nouns" not in term_matcher.extract("This is fine. They agreed.")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
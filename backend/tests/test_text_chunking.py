@@ -0,0 +1,54 @@
+"""
+Test suite for splitting long text into model-sized chunks.
+"""
+import pytest
+from app.core.text_chunking import split_into_chunks, join_chunks
+from app.api.endpoints.text import merge_suggestions
+
+SAMPLE = (
+    "This week I finished the dose calculation pipeline. The results match the reference within 2%.\n\n"
+    "I also started on the Monte Carlo comparison! It is slow, but promising.\n\n"
+    "Next steps:\n- tune the kernel\n- write up methods"
+)
+
+class TestSplitIntoChunks:
+    """Test cases for split_into_chunks."""
+
+    @pytest.mark.parametrize("max_chars", [20, 60, 100, 1000])
+    def test_round_trip(self, max_chars):
+        """Test joining chunks with their separators restores the text exactly."""
+        chunks, separators = split_into_chunks(SAMPLE, max_chars)
+        assert join_chunks(chunks, separators) == SAMPLE
+
+    @pytest.mark.parametrize("max_chars", [20, 60, 100])
+    def test_chunks_respect_limit(self, max_chars):
+        """Test no chunk is longer than the limit."""
+        chunks, _ = split_into_chunks(SAMPLE, max_chars)
+        assert all(len(chunk) <= max_chars for chunk in chunks)
+
+    def test_prefers_paragraph_boundaries(self):
+        """Test paragraphs that fit are kept whole."""
+        chunks, separators = split_into_chunks(SAMPLE, 100)
+        assert chunks[0] == "This week I finished the dose calculation pipeline. The results match the reference within 2%."
+        assert separators[0] == "\n\n"
+
+    def test_short_text_is_one_chunk(self):
+        """Test text under the limit is not split."""
+        assert split_into_chunks("Short text.", 600) == (["Short text."], [""])
+
+    def test_unbroken_text_is_hard_split(self):
+        """Test a run without whitespace is still bounded."""
+        chunks, separators = split_into_chunks("x" * 25, 10)
+        assert chunks == ["x" * 10, "x" * 10, "x" * 5]
+        assert join_chunks(chunks, separators) == "x" * 25
+
+class TestMergeSuggestions:
+    """Test cases for merge_suggestions."""
+
+    def test_deduplicates_in_order(self):
+        """Test duplicate suggestions across chunks are merged."""
+        merged = merge_suggestions([["Fix tense", "Add structure"], ["fix  tense", "Define IMRT"]])
+        assert merged == ["Fix tense", "Add structure", "Define IMRT"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
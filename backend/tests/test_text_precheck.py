@@ -0,0 +1,91 @@
+"""
+Test suite for the local text pre-checker (LLM fast path).
+"""
+import pytest
+from app.services.text_precheck import SymSpellIndex, TextPrechecker, damerau_levenshtein
+
+class TestSymSpellIndex:
+    """Test cases for the deletion index."""
+
+    def test_distance(self):
+        """Test transpositions count as a single edit."""
+        assert damerau_levenshtein("becuase", "because", 2) == 1
+        assert damerau_levenshtein("analysis", "analysis", 2) == 0
+        assert damerau_levenshtein("cat", "elephant", 2) == 3
+
+    def test_lookup_prefers_frequent_words(self):
+        """Test closer, then more frequent, candidates come first."""
+        index = SymSpellIndex()
+        index.add("data", 100)
+        index.add("date", 5)
+        assert index.lookup("dara", max_distance=1)[0][0] == "data"
+        assert index.lookup("data")[0] == ("data", 0, 100)
+
+class TestTextPrechecker:
+    """Test cases for TextPrechecker."""
+
+    @pytest.fixture
+    def checker(self):
+        return TextPrechecker()
+
+    def test_clean_text_skips_llm(self, checker):
+        """Test already clean text is returned unchanged on the fast path."""
+        result = checker.check("I finished the analysis this week.")
+        assert not result.needs_llm
+        assert result.text == "I finished the analysis this week."
+        assert result.fixes == []
+
+    def test_mechanical_fixes(self, checker):
+        """Test whitespace, punctuation, capitalization and contractions are fixed locally."""
+        result = checker.check("i dont have results yet ,the  machine was down")
+        assert not result.needs_llm
+        assert result.text == "I don't have results yet, the machine was down"
+
+    def test_misspellings_need_llm(self, checker):
+        """Test a likely misspelling is left to the model instead of corrected locally."""
+        result = checker.check("The experiment failed becuase of the detector.")
+        assert result.needs_llm
+        assert result.reason == "spelling"
+
+    @pytest.mark.parametrize("text", [
+        "The method seems sound.",
+        "The hire starts next week.",
+        "We moved into the new wing.",
+        "The intro needs work.",
+    ])
+    def test_real_words_never_rewritten(self, checker, text):
+        """Test plausible real words missing from the lexicon are not 'corrected' to a neighbour."""
+        result = checker.check(text)
+        assert result.needs_llm or result.text == text
+
+    def test_unknown_words_need_llm(self, checker):
+        """Test unfamiliar vocabulary is left to the model."""
+        result = checker.check("The xylophonic reticulation was suboptimal.")
+        assert result.needs_llm
+        assert result.reason == "unknown_word"
+
+    def test_long_text_needs_llm(self, checker):
+        """Test text above the size limit always goes to the model."""
+        assert checker.check("word " * 200).needs_llm
+
+    def test_learning_extends_lexicon(self, checker):
+        """Test words the model kept from the input become known."""
+        assert checker.check("The dosimetric review is done.").needs_llm
+        checker.learn("the dosimetric review is done", "The dosimetric review is done.")
+        assert not checker.check("The dosimetric review is done.").needs_llm
+
+    def test_model_introduced_words_not_learned(self, checker):
+        """Test words that appear only in model output are never learned."""
+        checker.learn("The review is done.", "The dosimetric review is done.")
+        assert not checker.is_known("dosimetric")
+
+    def test_learned_word_cap(self, checker):
+        """Test the learned-word cap holds within a single call."""
+        checker.max_learned_words = 2
+        text = "glorbex frimble quazzle snorpit"
+        checker.learn(text, text)
+        assert checker.stats()["learned_words"] == 2
+        assert not checker.is_known("snorpit")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+"""
+Test suite for the text refinement path: cache, request coalescing and batches.
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from scripts.ollama_stub import StubConfig, create_stub_app
+from app.api.endpoints import text
+from app.api.endpoints.text import (
+    BatchRefinementField, BatchRefinementRequest, TextRefinementRequest, perform_text_refinement, refine_batch
+)
+from app.services.ollama_client import ollama_client
+
+TEXT = "i finished the analysis of the cohort data and started writing the methods section"
+OTHER_TEXT = "the reviewer asked for more detail about the sequencing protocol we used"
+
+class FakeUser:
+    id = 1
+    role = "student"
+
+@pytest.fixture
+def stub(request):
+    """Point the global Ollama client at an in-process stub with an empty refinement cache."""
+    config = getattr(request, "param", StubConfig(latency_ms=20, tokens_per_sec=0))
+    stub_app = create_stub_app(config)
+    previous = ollama_client._client
+    ollama_client._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_app))
+    text.refinement_cache.clear()
+    yield stub_app.state.stub
+    ollama_client._client = previous
+    text.refinement_cache.clear()
+
+def refine(text_=TEXT, **kwargs):
+    return perform_text_refinement(TextRefinementRequest(text=text_, allow_fast_path=False, **kwargs))
+
+class TestRefinementCache:
+    """Test cases for reading and writing the refinement cache."""
+
+    def test_cached_result_reused(self, stub):
+        """Test a repeated refinement is served from the cache."""
+        async def run():
+            await refine()
+            return await refine()
+
+        response = asyncio.run(run())
+        assert response.cached and response.path == "cache"
+        assert stub.requests == 1
+
+    def test_use_cache_false_does_not_fill_cache(self, stub):
+        """Test refinements that opt out of the cache leave it untouched."""
+        asyncio.run(refine(use_cache=False))
+        assert text.refinement_cache.stats()["entries"] == 0
+
+        response = asyncio.run(refine())
+        assert not response.cached
+        assert stub.requests == 2
+
+def batch(*fields):
+    request = BatchRefinementRequest(fields=[BatchRefinementField(name=name, text=text_) for name, text_ in fields])
+    return asyncio.run(refine_batch(request, current_user=FakeUser()))
+
+class TestRefineBatch:
+    """Test cases for the /refine-batch endpoint."""
+
+    def test_fields_refined_by_name(self, stub):
+        """Test every field gets its own result in request order."""
+        response = batch(("progress_text", TEXT), ("challenges_text", OTHER_TEXT))
+        assert [r.name for r in response.results] == ["progress_text", "challenges_text"]
+        assert (response.refined_count, response.failed_count) == (2, 0)
+        assert response.results[1].result.original_text == OTHER_TEXT
+
+    def test_duplicate_field_names_rejected(self, stub):
+        """Test repeated field names are a 400 and nothing is sent to the model."""
+        with pytest.raises(HTTPException) as error:
+            batch(("progress_text", TEXT), ("progress_text", OTHER_TEXT))
+        assert error.value.status_code == 400
+        assert stub.requests == 0
+
+    def test_per_field_errors(self, stub):
+        """Test a failing field is reported on its own and the others still succeed."""
+        response = batch(("progress_text", TEXT), ("goals_text", "too short"))
+        assert (response.refined_count, response.failed_count) == (1, 1)
+        failed = response.results[1]
+        assert failed.status_code == 400 and failed.result is None
+        assert "at least 10 characters" in failed.error
+        assert response.results[0].result is not None
+
+    def test_all_unavailable_passed_through(self, stub, monkeypatch):
+        """Test a batch the backend turned away entirely fails with 503 and Retry-After."""
+        monkeypatch.setattr(text, "fast_path_refinement", lambda request: None)
+        monkeypatch.setattr(ollama_client, "is_unavailable", lambda: True)
+        monkeypatch.setattr(ollama_client, "retry_after", lambda: 7)
+        with pytest.raises(HTTPException) as error:
+            batch(("progress_text", TEXT), ("challenges_text", OTHER_TEXT))
+        assert error.value.status_code == 503
+        assert error.value.headers["Retry-After"] == "7"
+        assert stub.requests == 0
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,55 @@
+"""
+Test suite for streaming ZIP builder.
+"""
+import io
+import zipfile
+import pytest
+from app.core.zipstream import stream_zip, safe_arcname_part
+
+class TestStreamZip:
+    """Test cases for stream_zip."""
+
+    def test_archive_round_trip(self, tmp_path):
+        """Test streamed chunks form a valid archive with all entries."""
+        first = tmp_path / "slides.pdf"
+        first.write_bytes(b"%PDF" + b"x" * 200_000)
+        second = tmp_path / "notes.txt"
+        second.write_bytes(b"meeting notes")
+
+        data = b"".join(stream_zip([
+            ("Jane Doe/presentation/slides.pdf", str(first)),
+            ("Jane Doe/updates/notes.txt", str(second)),
+        ]))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.testzip() is None
+            assert archive.read("Jane Doe/presentation/slides.pdf") == first.read_bytes()
+            assert archive.read("Jane Doe/updates/notes.txt") == b"meeting notes"
+
+    def test_chunks_are_bounded(self, tmp_path):
+        """Test no single chunk holds much more than one read block."""
+        big = tmp_path / "data.bin"
+        big.write_bytes(b"\0" * (1024 * 1024))
+
+        chunks = list(stream_zip([("data.bin", str(big))], chunk_size=16 * 1024))
+
+        assert len(chunks) > 1
+        assert max(len(c) for c in chunks) < 17 * 1024
+
+    def test_duplicate_names_are_suffixed(self, tmp_path):
+        """Test duplicate archive names get a numeric suffix."""
+        src = tmp_path / "report.pdf"
+        src.write_bytes(b"report")
+
+        data = b"".join(stream_zip([("a/report.pdf", str(src)), ("a/report.pdf", str(src))]))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["a/report.pdf", "a/report (2).pdf"]
+
+    def test_safe_arcname_part(self):
+        """Test path separators are stripped from archive components."""
+        assert safe_arcname_part("../etc/passwd") == "etcpasswd"
+        assert safe_arcname_part("  ") == "unnamed"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
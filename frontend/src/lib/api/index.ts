@@ -255,6 +255,14 @@ export const updateApi = {
       method: 'POST',
       body: JSON.stringify({ text, context })
     });
+  },
+
+  // Refine several named fields (progress, challenges, next steps...) in one request
+  refineFields: async (fields: { name: string; text: string; context?: string }[]) => {
+    return await apiFetch('/text/refine-batch', {
+      method: 'POST',
+      body: JSON.stringify({ fields })
+    });
   }
 };
 